@@ -1,32 +1,45 @@
 import datetime
+import gzip
 import re
 import pyperclip
 import platform
-from json import loads
+from json import dumps, loads
 from logging import DEBUG, Formatter, StreamHandler, getLogger
-from os import environ
+from os import path as os_path, replace as os_replace
 from platform import system
-from threading import Thread
+from threading import Thread, local
 from time import sleep, time
-from typing import Literal, Optional
+from typing import Callable, Dict, List, Literal, Optional, Tuple
+from urllib.parse import urlparse
 from weakref import finalize
 
 from selenium.common.exceptions import (
     NoSuchElementException,
     StaleElementReferenceException,
     TimeoutException,
+    WebDriverException,
 )
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.wait import WebDriverWait
 from undetected_chromedriver import ChromeOptions
 
+from UnlimitedGPT.internal import scripts
 from UnlimitedGPT.internal.selectors import ChatGPTVariables as CGPTV
+from UnlimitedGPT.internal.bridge import FetchBridge
+from UnlimitedGPT.internal.cancellation import CancellationToken
+from UnlimitedGPT.internal.display import shared_display
 from UnlimitedGPT.internal.driver import ChatGPTDriver
-from UnlimitedGPT.internal.exceptions import InvalidConversationID
-from UnlimitedGPT.internal.objects import ChatGPTResponse, Conversations, DefaultAccount, SessionData, SharedConversations, User
+from UnlimitedGPT.internal.exceptions import ExportIncomplete, InvalidConversationID, InvalidSnapshot, RateLimitExceeded
+from UnlimitedGPT.internal.latency import GenerationWatchdog, LatencyModel
+from UnlimitedGPT.internal.locator import SelectorStats
+from UnlimitedGPT.internal.navigator import SettingsNavigator
+from UnlimitedGPT.internal.objects import ChatGPTResponse, Conversations, DefaultAccount, SessionData, SharedConversations, User, WorkerHealth
+from UnlimitedGPT.internal.retry import CircuitBreaker, RetryPolicy, mark_submitted, resilient
+from UnlimitedGPT.internal.search import SearchIndex
 
 class ChatGPT:
     """
@@ -41,14 +54,48 @@ class ChatGPT:
         verbose (bool, optional): Whether to enable verbose logging. Defaults to False.
         headless (bool, optional): Whether to run the browser in headless mode. Defaults to False.
         chrome_args (list): Additional arguments for the Chrome browser. Defaults to [].
+        isolate_accounts (bool, optional): Whether to keep every account switched to in its own browser context, so switching back is instant. Defaults to False.
+        capture_stream (bool, optional): Whether to read responses from the conversation event stream instead of the rendered page. Defaults to False.
+        retry_policy (Optional[RetryPolicy], optional): The retry policy of sending, regenerating and data calls. Defaults to None (no retries).
+        circuit_breaker (Optional[CircuitBreaker], optional): The circuit breaker of this instance, which must not be shared. Defaults to None.
+        max_dom_nodes (Optional[int], optional): DOM size after which old conversation turns are pruned from the page. Defaults to None.
+        max_heap_mb (Optional[float], optional): Renderer heap size, in MB, after which old conversation turns are pruned from the page. Defaults to None.
+        search_index (Optional[SearchIndex], optional): A local search index every message sent and its response are added to. Defaults to None.
+        latency_model (Optional[LatencyModel], optional): Learns how long responses take, to give up on stalled ones early. Can be shared between instances. Defaults to a new one.
+        state (Optional[dict], optional): A state from `snapshot` to start from, see `restore`. Defaults to None.
 
     Raises:
     ----------
         InvalidConversationID: If the conversation ID is invalid.
         ValueError: If the session token is not provided.
         ValueError: If the proxy is invalid.
+        InvalidSnapshot: If the state is not one `snapshot` returns.
     """
 
+    # Messages longer than this are transferred in chunks and submitted in one script call
+    _large_message_threshold = 64 * 1024
+    _transfer_chunk_size = 256 * 1024
+    # Time the app has to take a submitted message, in seconds
+    _submit_timeout = 10
+    # Put in front of the parts of a split message, so it is answered once, after the last part
+    _part_header = 'Part {index} of {count}, do not answer yet, only reply "OK" until every part is sent.\n\n'
+    _last_part_header = "Part {index} of {count}, the last one. Answer the whole message now.\n\n"
+    # The latest conversation turns are never pruned, as the app may still update them
+    _prune_keep_turns = 10
+    # A page too large with nothing left to prune is reloaded at most this often, in seconds
+    _min_reload_interval = 600
+    # After a reload that left the page too large, it is only reloaded again once it grew this much more
+    _reload_growth = 1.25
+    # The conversation request answers with its headers right away, so a capture not started by then never will
+    _capture_first_event = 10
+    # Truncated responses are assembled from at most this many segments, in case the button never goes away
+    _max_segments = 10
+    # The local storage kept by snapshots: the onboarding flag, the session sync message and the theme
+    _snapshot_storage_keys = ("oai/apps/hasSeenOnboarding/chat", "nextauth.message", "theme")
+    _snapshot_version = 1
+    # The ID opening every line of an export
+    _export_id = re.compile(rb'\{"id": "([^"\\]+)"')
+
     def __init__(
         self,
         session_token: str,
@@ -58,6 +105,15 @@ class ChatGPT:
         verbose: bool = False,
         headless: bool = False,
         chrome_args: list = [],
+        isolate_accounts: bool = False,
+        capture_stream: bool = False,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        max_dom_nodes: Optional[int] = None,
+        max_heap_mb: Optional[float] = None,
+        search_index: Optional[SearchIndex] = None,
+        latency_model: Optional[LatencyModel] = None,
+        state: Optional[dict] = None,
     ) -> None:
         self._session_token = session_token
         self._conversation_id = conversation_id
@@ -67,6 +123,33 @@ class ChatGPT:
         self._chrome_args = chrome_args or []
         self._seen_onboarding = False
         self._history_and_training_enabled = True
+        self._isolate_accounts = isolate_accounts
+        self._capture_stream = capture_stream
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self._resilient = local()
+        self._messages_sent = 0
+        self._errors = 0
+        self._performance_enabled = False
+        self._max_dom_nodes = max_dom_nodes
+        self._max_heap_mb = max_heap_mb
+        self.search_index = search_index
+        self.latency_model = latency_model or LatencyModel()
+        self.stalls = 0
+        self._last_prompt_length = 0
+        self.pruned_turns = 0
+        self.page_reloads = 0
+        self._last_reload = 0.0
+        self._reload_floor = (0.0, 0.0)
+        self._account_windows: Dict[str, str] = {}
+        self._account_contexts: Dict[str, str] = {}
+        self._account_sessions: Dict[str, SessionData] = {}
+        self._account_conversations: Dict[str, str] = {}
+        self._state = state
+        if state is not None:
+            self._validate_state(state)
+            self._seen_onboarding = state["settings"]["seen_onboarding"]
+            self._history_and_training_enabled = state["settings"]["history_and_training_enabled"]
         self._init_logger(verbose)
 
         if self._proxy and not re.findall(
@@ -83,21 +166,20 @@ class ChatGPT:
         """
         self._is_active = False
         if hasattr(self, "driver"):
+            for context_id in list(getattr(self, "_account_contexts", {}).values()):
+                self._dispose_context(context_id)
             self.logger.debug("Closing browser...")
             self.driver.quit()
-        if hasattr(self, "display"):
-            self.logger.debug("Closing display...")
-            self.display.stop()
+        if getattr(self, "_uses_display", False):
+            self._uses_display = False
+            shared_display.release()
 
     def _get_out_of_menu(self) -> None:
         """
-        Get out of any menu present.
+        Get out of any menu present, checking that it actually closed.
         """
-        for i in range(5):
-            # First escape click is to remove the options menu
-            # Second escape click is to get out of the settings menu
-            # The rest are just to be safe
-            self.driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+        if not self._navigator.close():
+            self.logger.debug("Could not get out of the menu")
 
     def _init_logger(self, verbose: bool) -> None:
         """
@@ -127,25 +209,11 @@ class ChatGPT:
 
         Notes:
         ----------
-            If the system is Linux and the DISPLAY environment variable is not set, a virtual display will be started.
+            If the system is Linux and the DISPLAY environment variable is not set, a virtual display will be started,
+            shared with every other instance of the process.
         """
-        if system() == "Linux" and "DISPLAY" not in environ:
-            self.logger.debug("Starting virtual display...")
-            try:
-                from pyvirtualdisplay.display import Display
-
-                self.display = Display()
-                self.display.start()
-            except ModuleNotFoundError:
-                raise ValueError(
-                    "Please install PyVirtualDisplay to start a virtual display by running `pip install PyVirtualDisplay`"
-                )
-            except FileNotFoundError as e:
-                if "No such file or directory: 'Xvfb'" in str(e):
-                    raise ValueError(
-                        "Please install Xvfb to start a virtual display by running `sudo apt install xvfb`"
-                    )
-                raise e
+        if system() == "Linux":
+            self._uses_display = shared_display.acquire()
 
         self.logger.debug("Initializing browser...")
 
@@ -177,6 +245,9 @@ class ChatGPT:
                 },
             )
 
+        if self._state is not None:
+            self._seed_state(self._state)
+
         if self._disable_moderation:
             self.logger.debug("Blocking moderation...")
             self.driver.execute_cdp_cmd(
@@ -184,42 +255,98 @@ class ChatGPT:
                 {"urls": ["https://chat.openai.com/backend-api/moderations"]},
             )
 
-        self.logger.debug("Ensuring Cloudflare cookies...")
-        self._ensure_cf()
+        if self._capture_stream:
+            self._install_stream_capture()
+
+        self._navigator = SettingsNavigator(self.driver, self.logger)
+        self.bridge = FetchBridge(self.driver, self.logger)
+
+        # A restored Cloudflare clearance spares the challenge, unless it turns out to have expired
+        restored_clearance = self._state is not None and any(
+            cookie["name"] == "cf_clearance" for cookie in self._state["cookies"]
+        )
+        if not restored_clearance:
+            self.logger.debug("Ensuring Cloudflare cookies...")
+            self._ensure_cf()
 
         self.logger.debug("Opening chat page...")
-        self.driver.get(f"{CGPTV.chat_url}/{self._conversation_id}")
+        self.driver.get(self._conversation_url(self._conversation_id))
+        if restored_clearance and self.driver.find_elements(*CGPTV.cf_challenge_form):
+            self.logger.debug("Restored Cloudflare cookies expired, ensuring new ones...")
+            self._ensure_cf()
+            self.driver.get(self._conversation_url(self._conversation_id))
         self._check_blocking_elements()
 
+        if self._isolate_accounts:
+            self._account_windows[self._session_token] = self.driver.current_window_handle
+
+        self._started_at = time()
         self._is_active = True
         Thread(target=self._keep_alive, daemon=True).start()
 
+    def _seed_state(self, state: dict) -> None:
+        """
+        Pre-seeds the cookies and local storage of a snapshot, before any page is loaded.
+
+        Args:
+        ----------
+            state (dict): The state, from `snapshot`.
+        """
+        self.logger.debug(f"Restoring {len(state['cookies'])} cookies and {len(state['local_storage'])} local storage items...")
+        if state["cookies"]:
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": state["cookies"]})
+        if state["local_storage"]:
+            self.driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument",
+                {"source": scripts.seed_local_storage % dumps(state["local_storage"])},
+            )
+
     def _keep_alive(self) -> None:
         """
         Keep the session alive by updating the local storage.
         """
         while self._is_active:
-            self.logger.debug("Updating session...")
-            payload = (
-                '{"event":"session","data":{"trigger":"getSession"},"timestamp":%d}'
-                % int(time())
-            )
-            try:
-                self.driver.execute_script(
-                    'window.localStorage.setItem("nextauth.message", arguments[0])',
-                    payload,
-                )
-            except Exception as e:
-                self.logger.debug(f"Failed to update session: {str(e)}")
+            self._refresh_session()
             sleep(60)
 
-    def _check_blocking_elements(self, ignore_conversation_alert: bool = False) -> None:
+    def _refresh_session(self) -> None:
+        """
+        Update the local storage of the active window, making the page refresh its session.
+
+        Notes:
+        ----------
+            Only the active window can be reached without switching to another one, which would pull it from
+            under a running call. Isolated accounts are refreshed when they are switched back to instead.
+        """
+        self.logger.debug("Updating session...")
+        payload = (
+            '{"event":"session","data":{"trigger":"getSession"},"timestamp":%d}'
+            % int(time())
+        )
+        try:
+            self.driver.execute_script(
+                'window.localStorage.setItem("nextauth.message", arguments[0])',
+                payload,
+            )
+        except Exception as e:
+            self.logger.debug(f"Failed to update session: {str(e)}")
+
+    def _check_blocking_elements(self, ignore_conversation_alert: bool = False, intro_timeout: float = 5) -> None:
         """
         Check for blocking elements and dismiss them.
+
+        Args:
+        ----------
+            ignore_conversation_alert (bool, optional): Whether to dismiss an "unable to load conversation" alert instead of raising. Defaults to False.
+            intro_timeout (float, optional): Time to wait for the intro to show up. Defaults to 5.
+
+        Raises:
+        ----------
+            InvalidConversationID: If the conversation could not be loaded.
         """
         self.logger.debug("Looking for blocking elements...")
         try:
-            intro = WebDriverWait(self.driver, 5).until(
+            intro = WebDriverWait(self.driver, intro_timeout).until(
                 EC.presence_of_element_located(CGPTV.intro)
             )
             self.logger.debug("Dismissing intro...")
@@ -240,6 +367,23 @@ class ChatGPT:
             self.driver.refresh()
             self._seen_onboarding = True
 
+    def _check_rate_limit(self) -> None:
+        """
+        Check the visible alerts and the error notices of the latest turn for a rate limit notice.
+        Answers are never checked, as they may well mention rate limits themselves.
+
+        Raises:
+        ----------
+            RateLimitExceeded: If the account has hit a rate limit or usage cap.
+        """
+        texts = self.driver.execute_script(
+            scripts.latest_errors, CGPTV.alert[1], CGPTV.conversation_turn[1], CGPTV.turn_error[1]
+        )
+        for text in texts or []:
+            if any(phrase in text.lower() for phrase in CGPTV.rate_limit_phrases):
+                self.logger.debug(f"Rate limited: {text}")
+                raise RateLimitExceeded(text)
+
     def _ensure_cf(self, retry: int = 3) -> None:
         """
         Ensure Cloudflare cookies are set.
@@ -252,24 +396,28 @@ class ChatGPT:
         ----------
             TimeoutException: If the Cloudflare challenge fails.
         """
-        self.logger.debug("Opening new tab...")
+        backoff = self.retry_policy or RetryPolicy()
         original_window = self.driver.current_window_handle
-        self.driver.switch_to.new_window("tab")
+        for attempt in range(1, retry + 2):
+            self.logger.debug("Opening new tab...")
+            self.driver.switch_to.new_window("tab")
 
-        self.logger.debug("Getting Cloudflare challenge...")
-        self.driver.get("https://chat.openai.com/api/auth/session")
-        try:
-            WebDriverWait(self.driver, 10).until_not(
-                EC.presence_of_element_located(CGPTV.cf_challenge_form)
-            )
-        except TimeoutException:  # type: ignore
-            self.logger.debug(f"Cloudflare challenge failed, retrying {retry}...")
-            if retry > 0:
+            self.logger.debug("Getting Cloudflare challenge...")
+            self.driver.get("https://chat.openai.com/api/auth/session")
+            try:
+                WebDriverWait(self.driver, 10).until_not(
+                    EC.presence_of_element_located(CGPTV.cf_challenge_form)
+                )
+                break
+            except TimeoutException:  # type: ignore
                 self.logger.debug("Closing tab...")
                 self.driver.close()
                 self.driver.switch_to.window(original_window)
-                return self._ensure_cf(retry - 1)
-            raise ValueError("Cloudflare challenge failed")
+                if attempt > retry:
+                    raise ValueError("Cloudflare challenge failed")
+                delay = backoff.delay(attempt)
+                self.logger.debug(f"Cloudflare challenge failed, retrying in {delay:.1f}s ({retry - attempt + 1} left)...")
+                sleep(delay)
         self.logger.debug("Cloudflare challenge passed")
 
         self.logger.debug("Validating authorization...")
@@ -287,368 +435,1190 @@ class ChatGPT:
         self.driver.close()
         self.driver.switch_to.window(original_window)
 
-    def _get_conversation_id(self):
+    def _get_conversation_id(self, timeout: float = 2) -> None:
         """
-        Gets the conversation ID.
+        Gets the ID of the conversation just started: from the captured event stream, or the `/c/<conversation_id>`
+        URL the app moves to. Only if neither has it, the latest updated conversation is assumed to be this one,
+        which another client of the account could have updated since.
+
+        Args:
+        ----------
+            timeout (float, optional): Time to wait for the app to move to the conversation's URL. Defaults to 2.
         """
-        logs_raw = self.driver.get_log("performance")
+        conversation_id = None
+        if self._capture_stream:
+            capture = self.driver.execute_script("return window.__unlimitedgptCapture || null;")
+            conversation_id = capture and capture["conversation_id"]
 
-        conv_response_id = next(
-            log_["params"]["requestId"]
-            for log_ in reversed([loads(lr["message"])["message"] for lr in logs_raw])
-            if
-            log_["method"] == "Network.responseReceived"
-            # and json
-            and "json" in log_["params"]["response"]["mimeType"]
-            # and status 200
-            and log_["params"]["response"]["status"] == 200
-            # and conversations
-            and "/backend-api/conversations" in log_["params"]["response"]["url"]
-        )
+        if not conversation_id:
+            prefix = CGPTV.conversation_route.format(conversation_id="")
 
-        ret = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": conv_response_id})
+            def url_conversation_id(driver) -> Optional[str]:
+                path = urlparse(driver.current_url).path
+                return (path[len(prefix):].strip("/") or None) if path.startswith(prefix) else None
 
-        self._conversation_id = loads(ret["body"])["items"][0]["id"]
+            try:
+                conversation_id = WebDriverWait(self.driver, timeout, 0.1).until(url_conversation_id)
+            except TimeoutException:  # type: ignore
+                pass
 
+        if not conversation_id:
+            self.logger.debug("Conversation ID not in the stream or the URL, getting the latest conversation...")
+            response_data = self.bridge.fetch(f"{CGPTV.conversations_path}?offset=0&limit=1&order=updated")
+            conversation_id = response_data["items"][0]["id"]
+
+        self._conversation_id = conversation_id
         self.logger.debug(f"Conversation id: {self._conversation_id}")
 
-    def _open_shared_conversations_popup(self):
+    @staticmethod
+    def _conversation_url(conversation_id: str) -> str:
         """
-        Opens the shared conversations popup.
+        Gets the URL of a conversation, on the route the app opens it on, or of a new chat if there is no conversation.
         """
-        self.logger.debug("Opening shared conversations popup...")
-        try:
-            menu_button_clicked = self.driver.safe_click(CGPTV.menu_button)
-            if not menu_button_clicked:
-                self.logger.debug("Could not click menu button")
-                return self._get_out_of_menu()
+        if not conversation_id:
+            return f"{CGPTV.chat_url}/"
+        return CGPTV.base_url + CGPTV.conversation_route.format(conversation_id=conversation_id)
 
-            self.logger.debug("Clicked menu button")
+    def _navigate_in_app(self, path: str, timeout: float = 5) -> bool:
+        """
+        Navigates within the already-loaded page, without reloading it.
 
-            settings_button_clicked = self.driver.safe_click(CGPTV.menu_settings)
-            if not settings_button_clicked:
-                self.logger.debug("Could not click settings button")
-                return self._get_out_of_menu()
+        Args:
+        ----------
+            path (str): The path to navigate to, e.g. `/c/<conversation_id>`.
+            timeout (float, optional): Time to wait for the navigation to finish. Defaults to 5.
 
-            self.logger.debug("Clicked settings button")
+        Returns:
+        ----------
+            bool: Whether the navigation succeeded. If it didn't, a full page load is needed.
+        """
+        if not self.driver.current_url.startswith("https://chat.openai.com/"):
+            return False
 
-            # Click "Data controls" button
-            data_controls_clicked = self.driver.safe_click(
-                CGPTV.data_controls, timeout=60
-            )
-            if not data_controls_clicked:
-                self.logger.debug("Could not click data controls button")
-                return self._get_out_of_menu()
-            
-            self.logger.debug("Clicked data controls button")
+        try:
+            method = self.driver.execute_script(scripts.navigate_in_app, path)
+        except WebDriverException:  # type: ignore
+            method = None
+        if not method:
+            self.logger.debug("In-app navigation is not available")
+            return False
+        self.logger.debug(f"Navigating to {path} through the {method}...")
 
-            # Click the "Manage" button for Shared Links
-            shared_links_manage_clicked = self.driver.safe_click(
-                CGPTV.shared_links_manage, timeout=60
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                lambda driver: urlparse(driver.current_url).path.rstrip("/") == path.rstrip("/")
             )
-            if not shared_links_manage_clicked:
-                self.logger.debug("Could not click shared links manage button")
-                return self._get_out_of_menu()
-
-            self.logger.debug("Clicked shared links manage button")
-        except:
-            self.logger.debug("Could not open shared conversations popup")
-
-        return self._get_out_of_menu()
+            WebDriverWait(self.driver, timeout).until(
+                EC.element_to_be_clickable(CGPTV.textbox)
+            )
+        except TimeoutException:  # type: ignore
+            self.logger.debug(f"In-app navigation to {path} did not finish")
+            return False
+        return True
 
-    def _get_new_response(self):
-        body = self.driver.find_element(By.TAG_NAME, "body")
+    def _get_textbox(self, timeout: float = 60) -> WebElement:
+        """
+        Gets the message textbox, reusing the cached handle while it is still attached.
 
-        if platform.system() == "Darwin":  # macOS
-            key_command = Keys.COMMAND
-        else:
-            key_command = Keys.LEFT_CONTROL
+        Args:
+        ----------
+            timeout (float, optional): Time to wait for the textbox. Defaults to 60.
 
-        body.send_keys(key_command, Keys.LEFT_SHIFT, "c")
-        return pyperclip.paste()
+        Returns:
+        ----------
+            WebElement: The textbox.
 
-    def get_user_data(self) -> Optional[DefaultAccount]:
+        Raises:
+        ----------
+            TimeoutException: If the textbox could not be found.
         """
-        Gets the user data.
+        textbox = self.driver.find(CGPTV.textbox, timeout=timeout, clickable=True)
+        if textbox is None:
+            raise TimeoutException("Could not find the textbox")
+        return textbox
 
-        Returns
-        ---------
-            Optional[Accounts]: a list of the accounts.
+    def _type_message(self, textbox: WebElement, message: str, delay: float, chunk_size: int) -> None:
         """
-        self.logger.debug("Getting user data...")
+        Types a message like a human would, in chunks with a delay between them.
 
-        logs_raw = self.driver.get_log("performance")
+        The whole message is typed inside the page in one WebDriver call.
+        If the page refuses the insertion, the remaining chunks are inserted through CDP instead.
+        Both insert text rather than dispatch key events: the app only listens to the input events,
+        and `Input.dispatchKeyEvent` would take two WebDriver calls per character.
 
-        datas = (
-            log_["params"]["requestId"]
-            for log_ in reversed([loads(lr["message"])["message"] for lr in logs_raw])
-            if (
-                log_["method"] == "Network.responseReceived"
-                and "json" in log_["params"]["response"]["mimeType"]
-                and int(log_["params"]["response"]["status"]) == 200
-                and "backend-api/accounts/check/" in log_["params"]["response"]["url"]
-            )
+        Args:
+        ----------
+            textbox (WebElement): The textbox to type into.
+            message (str): The message to type.
+            delay (float): Time to wait between chunks, in seconds.
+            chunk_size (int): The number of characters typed at once.
+        """
+        chunk_size = max(chunk_size, 1)
+        chunks = (len(message) + chunk_size - 1) // chunk_size
+        self.driver.set_script_timeout(chunks * delay + 30)
+        typed = self.driver.execute_async_script(
+            scripts.type_text, textbox, message, chunk_size, delay
         )
-        try:
-            data = next(datas)
-        except StopIteration:
-            self.logger.debug("Could not find user data")
-            return None
-
-        ret = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": data})
-
-        response_data = loads(ret["body"])
+        if typed is not None:
+            return
 
-        return DefaultAccount(**response_data["accounts"]['default'])
+        self.logger.debug("In-page typing is not supported, typing through CDP...")
+        typed = textbox.get_attribute("value") or ""
+        textbox.click()
+        for index in range(len(typed), len(message), chunk_size):
+            self.driver.execute_cdp_cmd(
+                "Input.insertText", {"text": message[index:index + chunk_size]}
+            )
+            sleep(delay)
 
-    def get_conversations(self) -> Conversations:
+    def _submit_large_message(self, textbox: WebElement, message: str) -> None:
         """
-        Get a list of conversations.
+        Submits a large message by transferring it into a page-side buffer in chunks,
+        then setting and submitting it in a single script call.
 
-        Returns:
+        Args:
         ----------
-            Conversations: A list of conversations.
+            textbox (WebElement): The textbox to submit the message with.
+            message (str): The message to submit.
+
+        Raises:
+        ----------
+            TimeoutException: If the message could not be submitted.
         """
-        self.logger.debug("Getting conversations...")
-        logs_raw = self.driver.get_log("performance")
-
-        datas = (
-            log_["params"]["requestId"]
-            for log_ in reversed([loads(lr["message"])["message"] for lr in logs_raw])
-            if (
-                log_["method"] == "Network.responseReceived"
-                and "json" in log_["params"]["response"]["mimeType"]
-                and log_["params"]["response"]["status"] == 200
-                and "/backend-api/conversations" in log_["params"]["response"]["url"]
+        self.logger.debug(f"Transferring {len(message)} characters in chunks...")
+        for index in range(0, len(message), self._transfer_chunk_size):
+            self.driver.execute_script(
+                scripts.append_to_buffer,
+                message[index:index + self._transfer_chunk_size],
+                index == 0,
             )
-        )
-        try:
-            data = next(datas)
-        except StopIteration:
-            self.logger.debug("Could not find conversations")
-            return None
 
-        self.logger.debug("Found conversations")
+        self.driver.set_script_timeout(self._submit_timeout + 20)
+        if not self.driver.execute_async_script(scripts.submit_buffer, textbox, self._submit_timeout * 1000):
+            raise TimeoutException("Could not submit the message")
 
-        ret = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": data})
+    @staticmethod
+    def _split_message(message: str, max_length: int) -> List[str]:
+        """
+        Splits a message into parts of at most `max_length` characters, preferring line and word boundaries.
 
-        response_data = loads(ret["body"])
+        Args:
+        ----------
+            message (str): The message to split.
+            max_length (int): The maximum length of a part.
 
-        return Conversations(
-            response_data["items"],
-            response_data["has_missing_conversations"],
-            response_data["limit"],
-            response_data["offset"],
-            response_data["total"]
+        Returns:
+        ----------
+            List[str]: The parts, in order.
+        """
+        parts = []
+        while len(message) > max_length:
+            cut = message.rfind("\n", 0, max_length)
+            if cut <= 0:
+                cut = message.rfind(" ", 0, max_length)
+            if cut <= 0:
+                cut = max_length
+            parts.append(message[:cut])
+            message = message[cut:].lstrip("\n ")
+        if message:
+            parts.append(message)
+        return parts
+
+    def _install_stream_capture(self) -> None:
+        """
+        Installs the conversation event stream capture on every page the current tab loads.
+        """
+        self.logger.debug("Installing event stream capture...")
+        self.driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument",
+            {"source": scripts.capture_conversation_stream},
         )
 
-    def get_shared_conversations(self, timeout: float = 5) -> Optional[SharedConversations]:
+    def _wait_for_capture(
+        self,
+        watchdog: GenerationWatchdog,
+        on_progress: Optional[Callable[[str], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        previous: Optional[ChatGPTResponse] = None,
+    ) -> Optional[dict]:
         """
-        Get a list of shared conversations.
+        Waits for the captured event stream of the latest message to finish.
 
         Args:
         ----------
-            timeout (float, optional): Time to wait for the message to continue regenerating before timing out.
+            watchdog (GenerationWatchdog): Watches the stream, and gives up once no new events arrive in time.
+            on_progress (Optional[Callable[[str], None]], optional): Called with the text so far whenever it grows. Defaults to None.
+            cancel_token (Optional[CancellationToken], optional): Stops the wait once cancelled. Defaults to None.
+            previous (Optional[ChatGPTResponse], optional): The response so far, when continuing it, which the text passed to `on_progress` is assembled with. Defaults to None.
 
         Returns:
         ----------
-            SharedConversations: A list of shared conversations, or None if unsuccessful.
+            Optional[dict]: The capture, or None if no stream finished in time, or the capture is not installed on the page
+            or did not start within `_capture_first_event` seconds, in which case the page is read instead.
         """
-        self.logger.debug("Getting shared conversations...")
-        logs_raw = self.driver.get_log("performance")
+        length = 0
+        captured = False
+        while cancel_token is None or not cancel_token.cancelled:
+            installed, capture = self.driver.execute_script(
+                "return [!!window.__unlimitedgptCaptureInstalled, window.__unlimitedgptCapture || null];"
+            )
+            if not installed:
+                # The page was loaded without the capture (e.g. before it was installed), so nothing will ever arrive,
+                # but the next message can still be captured
+                self.logger.debug("The event stream capture is not installed on the page, installing it...")
+                self.driver.execute_script(scripts.capture_conversation_stream)
+                return None
+            if not capture and time() - watchdog.started > self._capture_first_event:
+                self.logger.debug("The event stream capture did not start")
+                return None
+            if capture:
+                captured = True
+                watchdog.update(capture["events"])
+                if on_progress is not None and len(capture["text"]) > length:
+                    length = len(capture["text"])
+                    on_progress(self._stitch(previous, capture["text"], capture["message_id"]))
+                if capture["done"]:
+                    return capture
+            if watchdog.check():
+                if not captured and watchdog.expired == "no progress":
+                    # The stream was never seen at all, so the page may still have the response
+                    watchdog.expired = None
+                return None
+            sleep(0.25)
+        return None
+
+    def _wait_for_streaming(
+        self, watchdog: GenerationWatchdog, cancel_token: Optional[CancellationToken] = None
+    ) -> bool:
+        """
+        Waits for the streaming response on the page to finish.
 
-        start_time = time()
-        end_time = start_time + timeout
-        opened_popup = False
+        Args:
+        ----------
+            watchdog (GenerationWatchdog): Watches the length of the streaming text, and gives up once it stops growing for too long.
+            cancel_token (Optional[CancellationToken], optional): Stops the wait once cancelled. Defaults to None.
 
-        while time() < end_time:
-            try:
-                data = next(
-                    log_["params"]["requestId"]
-                    for log_ in reversed([loads(lr["message"])["message"] for lr in logs_raw])
-                    if (
-                        log_["method"] == "Network.responseReceived"
-                        and "json" in log_["params"]["response"]["mimeType"]
-                        and log_["params"]["response"]["status"] == 200
-                        and "/backend-api/shared_conversations" in log_["params"]["response"]["url"]
-                    )
-                )
-                break  # Found data, exit the loop
-            except StopIteration:
-                if not opened_popup:
-                    self.logger.debug("Could not find conversations, opening shared conversations popup...")
-                    self._open_shared_conversations_popup()
-                    opened_popup = True
-                else:
-                    self.logger.debug("Could not find conversations, refreshing logs...")
-                logs_raw = self.driver.get_log("performance")  # Refresh logs
+        Returns:
+        ----------
+            bool: Whether the response finished, or never started streaming within 10 seconds.
+        """
+        streamed = False
+        while cancel_token is None or not cancel_token.cancelled:
+            progress = self.driver.execute_script(scripts.generation_progress, CGPTV.streaming[1])
+            if progress is None:
+                # Some responses are rendered at once, without ever streaming
+                if streamed or time() - watchdog.started > 10:
+                    return True
+            else:
+                streamed = True
+                watchdog.update(progress)
+            if watchdog.check():
+                return False
+            sleep(0.25)
+        return False
+
+    def _wait_for_response(
+        self,
+        timeout: float,
+        on_progress: Optional[Callable[[str], None]] = None,
+        prompt_length: int = 0,
+        cancel_token: Optional[CancellationToken] = None,
+        auto_continue: bool = False,
+    ) -> Optional[ChatGPTResponse]:
+        """
+        Waits for ChatGPT to finish responding, then gets the response.
 
-        else:
-            self.logger.debug("Timeout reached, failed to get shared conversations")
-            return None
+        The wait is given up early once no new text arrives within the window learned by the latency model,
+        so a stalled generation fails in seconds instead of at the timeout.
 
-        self.logger.debug("Found shared conversations")
+        Args:
+        ----------
+            timeout (float): Time to wait for each segment of the response before timing out, whatever the latency model says.
+            on_progress (Optional[Callable[[str], None]], optional): Called with the text so far while it streams in, when capturing the stream. Defaults to None.
+            prompt_length (int, optional): The length of the prompt, which the expected latency depends on. Defaults to 0.
+            cancel_token (Optional[CancellationToken], optional): Stops generation once cancelled. Defaults to None.
+            auto_continue (bool, optional): Whether to continue generating truncated responses, and assemble the segments. Defaults to False.
 
-        ret = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": data})
+        Returns:
+        ----------
+            Optional[ChatGPTResponse]: The response, or None if it could not be found.
 
-        response_data = loads(ret["body"])
+        Raises:
+        ----------
+            RateLimitExceeded: If the account has hit a rate limit or usage cap.
+        """
+        self.logger.debug("Waiting for completion...")
+        self._messages_sent += 1
+        started = time()
+        response = self._wait_for_segment(timeout, on_progress, prompt_length, cancel_token)
+        segment_timings = [time() - started]
+        while (
+            auto_continue
+            and response is not None
+            and not response.failed
+            and not response.cancelled
+            and len(segment_timings) < self._max_segments
+            and self._continue_generating()
+        ):
+            self.logger.debug(f"Response truncated, continuing (segment {len(segment_timings) + 1})...")
+            started = time()
+            segment = self._wait_for_segment(timeout, on_progress, prompt_length, cancel_token, previous=response)
+            segment_timings.append(time() - started)
+            if segment is None or segment.failed:
+                # What was generated until then is still worth returning
+                self.logger.debug("Continuing failed, returning the response so far")
+                break
+            response = segment
+
+        if response is not None:
+            response.segment_timings = segment_timings
+        return response
+
+    @staticmethod
+    def _stitch(previous: Optional[ChatGPTResponse], text: str, message_id: Optional[str]) -> str:
+        """
+        Assembles a continued segment with the response so far. A continued message keeps its ID and
+        its text holds the whole message, as does the latest response copied from the page, so only
+        the text of a different message is appended.
+        """
+        if previous is None or message_id is None or message_id == previous.message_id:
+            return text
+        return previous.response + text
 
-        return SharedConversations(
-            response_data["items"],
-            response_data["has_missing_conversations"],
-            response_data["limit"],
-            response_data["offset"],
-            response_data["total"]
-        )
+    def _continue_generating(self) -> bool:
+        """
+        Clicks "Continue generating" if the latest response was truncated.
 
-    def send_message(
+        Returns:
+        ----------
+            bool: Whether the response was truncated and is being continued.
+        """
+        if self._capture_stream:
+            capture = self.driver.execute_script("return window.__unlimitedgptCapture || null;")
+            # The stream tells whether the response was cut at the token limit, without waiting for the button
+            if capture is not None and capture.get("finish_reason") not in (None, "max_tokens"):
+                return False
+            self.driver.execute_script("window.__unlimitedgptCapture = null;")
+            if capture is not None and capture.get("finish_reason") == "max_tokens":
+                # Truncated for sure, so the button is worth waiting for while it renders
+                return self.driver.safe_click(CGPTV.continue_generating, timeout=2)
+        # Most responses are complete, so the button is only looked up once, without waiting
+        return self.driver.safe_click(CGPTV.continue_generating, timeout=0)
+
+    def _wait_for_segment(
         self,
-        message: str,
-        timeout: int = 240,
-        input_mode: Literal["INSTANT", "SLOW"] = "INSTANT",
-        input_delay: float = 0.1,
-    ) -> ChatGPTResponse:
+        timeout: float,
+        on_progress: Optional[Callable[[str], None]] = None,
+        prompt_length: int = 0,
+        cancel_token: Optional[CancellationToken] = None,
+        previous: Optional[ChatGPTResponse] = None,
+    ) -> Optional[ChatGPTResponse]:
         """
-        Send a message to ChatGPT.
+        Waits for ChatGPT to finish generating, then gets what it generated.
 
         Args:
         ----------
-            message (str): Message to send.
-            timeout (int, optional): Timeout in seconds. Defaults to 240.
-            input_mode(list, optional): The input mode. Defaults to 'INSTANT'.
-            input_delay(float, optional): The input delay. Defaults to 0.1.
+            timeout (float): Time to wait before timing out, whatever the latency model says.
+            on_progress (Optional[Callable[[str], None]], optional): Called with the text so far while it streams in, when capturing the stream. Defaults to None.
+            prompt_length (int, optional): The length of the prompt, which the expected latency depends on. Defaults to 0.
+            cancel_token (Optional[CancellationToken], optional): Stops generation once cancelled. Defaults to None.
+            previous (Optional[ChatGPTResponse], optional): The response so far, when continuing it, which the segment is assembled with. Defaults to None.
 
         Returns:
         ----------
-            ChatGPTResponse: Response from ChatGPT.
+            Optional[ChatGPTResponse]: The response, or None if it could not be found.
 
         Raises:
         ----------
-            TimeoutException: If the message fails to send.
-            ValueError: If the response is invalid.
-            ValueError: If the response is not found.
+            RateLimitExceeded: If the account has hit a rate limit or usage cap.
         """
-        assert input_mode in ["INSTANT", "SLOW"], "Invalid input mode"
-        self.logger.debug(
-            f'Sending message with mode {input_mode}{f" with {input_delay} delay" if input_mode == "SLOW" else ""}...'
-        )
-
-        textbox = WebDriverWait(self.driver, 60).until(
-            EC.element_to_be_clickable(CGPTV.textbox)
-        )
-        if input_mode == "INSTANT":
-            self.driver.execute_script(
-                "arguments[0].value = arguments[1];", textbox, message
-            )
-        else:
-            for char in message:
-                try:
-                    textbox.send_keys(char)
-                except StaleElementReferenceException:
-                    textbox = WebDriverWait(self.driver, 60).until(
-                        EC.element_to_be_clickable(CGPTV.textbox)
+        watchdog = self.latency_model.watch(self._session_token, prompt_length, timeout)
+        if self._capture_stream:
+            capture = self._wait_for_capture(watchdog, on_progress, cancel_token, previous)
+            if cancel_token is not None and cancel_token.cancelled:
+                return self._stop_generating(watchdog, previous)
+            if capture is not None:
+                if capture["status"] == 429:
+                    raise RateLimitExceeded(str(capture["error"] or "Too many requests"))
+                if capture["text"]:
+                    self.logger.debug("Captured response from the event stream")
+                    watchdog.finish()
+                    if capture["conversation_id"]:
+                        self._conversation_id = capture["conversation_id"]
+                    return ChatGPTResponse(
+                        response = self._stitch(previous, capture["text"], capture["message_id"]),
+                        conversation_id = self._conversation_id,
+                        message_id = capture["message_id"],
+                        parent_message_id = capture["parent_message_id"],
                     )
-                    textbox.send_keys(char)
-
-        textbox.send_keys("a")
-        textbox.send_keys(Keys.BACKSPACE)
-        textbox.send_keys(Keys.ENTER)
-
-        self.logger.debug("Waiting for completion...")
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located(CGPTV.streaming)
-            )
-        except:
-            pass
-        try:
-            WebDriverWait(self.driver, timeout).until_not(
-                EC.presence_of_element_located(CGPTV.streaming)
-            )
-        except:
+            if watchdog.expired is None:
+                self.logger.debug("Could not capture the response, falling back to the page...")
+
+        finished = watchdog.expired is None and self._wait_for_streaming(watchdog, cancel_token)
+        if cancel_token is not None and cancel_token.cancelled:
+            return self._stop_generating(watchdog, previous)
+        if finished:
+            watchdog.finish()
+        else:
+            self.logger.debug(f"Gave up waiting for the response ({watchdog.expired})")
+            self._errors += 1
+            if watchdog.expired != "deadline":
+                self.stalls += 1
             return ChatGPTResponse(
                 response = None,
                 failed = True,
                 conversation_id = self._conversation_id
             )
+        self._check_rate_limit()
         
         self.logger.debug("Getting response...")
         response = self._get_new_response()
         if response is None:
+            self._errors += 1
             self.logger.debug("Response not found, resetting conversation...")
             self.reset_conversation()
             return None
-
-        if not self._conversation_id:
-            self.logger.debug(f"New conversation, attempting to catch the ID...")
-            try:
-                self._get_conversation_id()
-            except:
-                pass
-
         return ChatGPTResponse(response = response, conversation_id = self._conversation_id)
 
-    def regenerate_response(
-        self,
-        message_timeout: int = 240,
-        click_timeout: int = 20,
+    def _stop_generating(
+        self, watchdog: GenerationWatchdog, previous: Optional[ChatGPTResponse] = None
     ) -> ChatGPTResponse:
         """
-        Regenerate the response.
+        Stops the response being generated, then gets what was generated so far.
 
         Args:
         ----------
-            message_timeout (int, optional): Time to wait for the message to regenerate before timing out. Defaults to 240.
-            click_timeout (int, optional): Time to wait for the click to succeed before timing out. Defaults to 20.
+            watchdog (GenerationWatchdog): The watchdog of the response, telling whether any text was generated.
+            previous (Optional[ChatGPTResponse], optional): The response so far, when continuing it. Defaults to None.
 
         Returns:
         ----------
-            response (ChatGPTResponse): The newly regenerated response data.
-
-        Raises:
-        ----------
-            TimeoutException: If the message fails to send.
-            TimeoutException: If the click fails to succeed.
-            ValueError: If the response is invalid.
-            ValueError: If the response is not found.
+            ChatGPTResponse: The partial response, marked as cancelled.
         """
-        self.logger.debug("Regenerating response...")
+        self.logger.debug("Cancelled, stopping generation...")
+        if not self.driver.safe_click(CGPTV.stop_generating, timeout=2):
+            self.logger.debug("Could not click stop generating button")
+
+        # The stream ends, or the page stops streaming, shortly after the click
+        deadline = time() + 5
+        if self._capture_stream:
+            capture = self.driver.execute_script("return window.__unlimitedgptCapture || null;")
+            while capture is not None and not capture["done"] and time() < deadline:
+                sleep(0.25)
+                capture = self.driver.execute_script("return window.__unlimitedgptCapture || null;")
+            if capture is not None:
+                if capture["conversation_id"]:
+                    self._conversation_id = capture["conversation_id"]
+                return ChatGPTResponse(
+                    response = self._stitch(previous, capture["text"], capture["message_id"]),
+                    conversation_id = self._conversation_id,
+                    message_id = capture["message_id"],
+                    parent_message_id = capture["parent_message_id"],
+                    cancelled = True,
+                )
+        while self.driver.execute_script(scripts.generation_progress, CGPTV.streaming[1]) is not None and time() < deadline:
+            sleep(0.25)
+        # Without any text streamed in, copying the latest response would copy the previous one
+        # (or, when continuing, the response so far)
+        if watchdog.progress:
+            response = self._get_new_response()
+        else:
+            response = previous.response if previous is not None else ""
+        return ChatGPTResponse(response = response, conversation_id = self._conversation_id, cancelled = True)
 
-        # Click "Regenerate response" button
-        regenerate_response_clicked = self.driver.safe_click(
-            CGPTV.regenerate_response, timeout=click_timeout
-        )
-        if not regenerate_response_clicked:
-            self.logger.debug("Could not click regenerate response button")
-            raise TimeoutException("Could not click regenerate response button")
+    def _get_new_response(self):
+        body = self.driver.find_element(By.TAG_NAME, "body")
 
-        self.logger.debug("Waiting for completion...")
-        try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located(CGPTV.streaming)
-            )
-        except:
-            pass
+        if platform.system() == "Darwin":  # macOS
+            key_command = Keys.COMMAND
+        else:
+            key_command = Keys.LEFT_CONTROL
+
+        body.send_keys(key_command, Keys.LEFT_SHIFT, "c")
+        return pyperclip.paste()
+
+    def ping(self) -> bool:
+        """
+        Cheaply checks whether the browser and the page still respond.
+
+        Returns:
+        ----------
+            bool: Whether the page responded.
+        """
         try:
-            WebDriverWait(self.driver, message_timeout).until_not(
-                EC.presence_of_element_located(CGPTV.streaming)
-            )
-        except:
-            return ChatGPTResponse(
-                response = None,
-                failed = True,
-                conversation_id = self._conversation_id
-            )
-        
-        self.logger.debug("Getting response...")
-        response = self._get_new_response()
-        if response is None:
-            self.logger.debug("Response not found, resetting conversation...")
-            self.reset_conversation()
+            return self.driver.execute_script("return document.readyState;") in ("interactive", "complete")
+        except WebDriverException:  # type: ignore
+            return False
+
+    def get_page_metrics(self) -> Dict[str, float]:
+        """
+        Gets the renderer's metrics through CDP, such as `JSHeapUsedSize` and `Nodes`.
+
+        Returns:
+        ----------
+            Dict[str, float]: The metrics, by name.
+        """
+        if not self._performance_enabled:
+            self.driver.execute_cdp_cmd("Performance.enable", {})
+            self._performance_enabled = True
+        metrics = self.driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        return {metric["name"]: metric["value"] for metric in metrics}
+
+    def prune_conversation(self, keep_turns: Optional[int] = None) -> Optional[int]:
+        """
+        Hides the old conversation turns on the page, so the renderer no longer lays out and paints
+        the whole conversation. The nodes stay in place, as the app still owns them, and the
+        conversation itself is untouched.
+
+        Args:
+        ----------
+            keep_turns (Optional[int], optional): The number of latest turns to keep. Defaults to 10.
+
+        Returns:
+        ----------
+            Optional[int]: The number of turns hidden, or None if the turns could not be found on the page.
+        """
+        keep_turns = self._prune_keep_turns if keep_turns is None else keep_turns
+        pruned = self.driver.execute_script(
+            scripts.prune_conversation_turns, CGPTV.conversation_turn[1], keep_turns
+        )
+        if pruned:
+            self.logger.debug(f"Pruned {pruned} conversation turns")
+            self.pruned_turns += pruned
+        return pruned
+
+    def _page_size(self) -> Tuple[float, float]:
+        """
+        Measures the nodes of the page that pruning can shrink (hidden turns excluded), and the renderer's heap in bytes.
+        """
+        dom_nodes = js_heap_used = 0.0
+        if self._max_dom_nodes is not None:
+            dom_nodes = self.driver.execute_script(scripts.visible_node_count)
+        if self._max_heap_mb is not None:
+            js_heap_used = self.get_page_metrics().get("JSHeapUsedSize", 0)
+        return dom_nodes, js_heap_used
+
+    def _check_page_size(self) -> None:
+        """
+        Prunes the old conversation turns once the visible DOM crosses its threshold. When the heap crosses
+        its threshold, which hidden turns still count towards, or there is nothing left to prune, the conversation
+        is reloaded instead, at most every `_min_reload_interval` seconds and only if the page grew since a
+        reload that did not bring it under the thresholds.
+        """
+        if self._max_dom_nodes is None and self._max_heap_mb is None:
+            return
+        try:
+            dom_nodes, js_heap_used = self._page_size()
+        except WebDriverException:  # type: ignore
+            self.logger.debug("Could not measure the page")
+            return
+
+        too_many_nodes = self._max_dom_nodes is not None and dom_nodes > self._max_dom_nodes
+        too_much_heap = self._max_heap_mb is not None and js_heap_used > self._max_heap_mb * 1024 * 1024
+        if not (too_many_nodes or too_much_heap):
+            return
+
+        self.logger.debug(f"Page is too large ({dom_nodes:.0f} visible nodes, {js_heap_used / 1024 / 1024:.0f} MB heap)")
+        if too_many_nodes and not too_much_heap and self.prune_conversation():
+            return
+
+        # A fresh page is the only way to shrink the heap, but reloading after every message would
+        # cost more than the memory it frees, as would reloading a page a reload did not shrink
+        floor_nodes, floor_heap = self._reload_floor
+        if not (
+            (too_many_nodes and dom_nodes > floor_nodes * self._reload_growth)
+            or (too_much_heap and js_heap_used > floor_heap * self._reload_growth)
+        ):
+            self.logger.debug("The page has not grown since a reload that did not shrink it enough")
+            return
+        if time() - self._last_reload < self._min_reload_interval:
+            self.logger.debug("The page was reloaded recently")
+            return
+        self.logger.debug("Reloading the conversation...")
+        self._last_reload = time()
+        self.driver.get(self._conversation_url(self._conversation_id))
+        self._check_blocking_elements(ignore_conversation_alert=True)
+        self.page_reloads += 1
+
+        try:
+            self.prune_conversation()
+            dom_nodes, js_heap_used = self._page_size()
+        except WebDriverException:  # type: ignore
+            return
+        self._reload_floor = (
+            dom_nodes if too_many_nodes and dom_nodes > self._max_dom_nodes else 0.0,
+            js_heap_used if too_much_heap and js_heap_used > self._max_heap_mb * 1024 * 1024 else 0.0,
+        )
+
+    def get_health(self) -> WorkerHealth:
+        """
+        Gets the health of this instance: whether the page responds, its memory and DOM size, and its error count.
+
+        Returns:
+        ----------
+            WorkerHealth: The health of this instance.
+        """
+        start_time = time()
+        responsive = self.ping()
+        ping_latency = time() - start_time
+        js_heap_used = dom_nodes = None
+        if responsive:
+            try:
+                metrics = self.get_page_metrics()
+                js_heap_used = int(metrics.get("JSHeapUsedSize", 0))
+                dom_nodes = int(metrics.get("Nodes", 0))
+            except WebDriverException:  # type: ignore
+                self.logger.debug("Could not get page metrics")
+        return WorkerHealth(
+            responsive,
+            ping_latency if responsive else None,
+            js_heap_used,
+            dom_nodes,
+            self._messages_sent,
+            self._errors,
+            time() - self._started_at,
+        )
+
+    def snapshot(self) -> dict:
+        """
+        Captures the state of this instance, to rebuild an equivalent one with `restore` should its browser crash:
+        the cookies of the page (session and Cloudflare clearance included), the local storage flags,
+        the current conversation and the settings.
+
+        Returns:
+        ----------
+            dict: The state, serializable to JSON.
+        """
+        cookie_fields = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+        cookies = [
+            # Session cookies have no expiry to set
+            {field: cookie[field] for field in cookie_fields if field in cookie and not (field == "expires" and cookie.get("session"))}
+            for cookie in self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+            if cookie["domain"].lstrip(".").endswith("openai.com")
+        ]
+        local_storage = self.driver.execute_script(
+            "return Object.fromEntries(arguments[0].map((key) => [key, localStorage.getItem(key)]).filter(([key, value]) => value !== null));",
+            list(self._snapshot_storage_keys),
+        )
+        return {
+            "version": self._snapshot_version,
+            "session_token": self._session_token,
+            "conversation_id": self._conversation_id,
+            "cookies": cookies,
+            "local_storage": local_storage,
+            "settings": {
+                "seen_onboarding": self._seen_onboarding,
+                "history_and_training_enabled": self._history_and_training_enabled,
+            },
+            "options": {
+                "proxy": self._proxy,
+                "disable_moderation": self._disable_moderation,
+                "headless": self._headless,
+                "chrome_args": self._chrome_args,
+                "isolate_accounts": self._isolate_accounts,
+                "capture_stream": self._capture_stream,
+            },
+        }
+
+    @classmethod
+    def _validate_state(cls, state: dict) -> None:
+        """
+        Checks that a state is one `snapshot` returns, before anything is started from it.
+
+        Raises:
+        ----------
+            InvalidSnapshot: If it is not, or is from an unknown version.
+        """
+        if not isinstance(state, dict):
+            raise InvalidSnapshot(f"A snapshot is a dict, not {type(state).__name__}")
+        if state.get("version") != cls._snapshot_version:
+            raise InvalidSnapshot(f"Unknown snapshot version {state.get('version')}")
+        fields = {
+            "session_token": str,
+            "conversation_id": str,
+            "cookies": list,
+            "local_storage": dict,
+            "settings": dict,
+            "options": dict,
+        }
+        for field, field_type in fields.items():
+            if not isinstance(state.get(field), field_type):
+                raise InvalidSnapshot(f"Snapshot field {field} is missing or not a {field_type.__name__}")
+        for setting in ("seen_onboarding", "history_and_training_enabled"):
+            if not isinstance(state["settings"].get(setting), bool):
+                raise InvalidSnapshot(f"Snapshot setting {setting} is missing or not a bool")
+
+    @classmethod
+    def restore(cls, state: dict, **kwargs) -> "ChatGPT":
+        """
+        Builds an instance equivalent to the one a state was captured from, with its cookies and
+        local storage seeded before the page loads, so no settings clicks or Cloudflare challenge are needed.
+
+        Args:
+        ----------
+            state (dict): The state, from `snapshot`.
+            **kwargs: Passed to `ChatGPT`, overriding the options of the state (e.g. `verbose`, `retry_policy`).
+
+        Returns:
+        ----------
+            ChatGPT: The new instance, on the conversation of the state.
+
+        Raises:
+        ----------
+            InvalidSnapshot: If the state is not one `snapshot` returns, or is from an unknown version.
+        """
+        cls._validate_state(state)
+        options = {
+            "session_token": state["session_token"],
+            "conversation_id": state["conversation_id"],
+            **state["options"],
+            **kwargs,
+        }
+        return cls(state=state, **options)
+
+    @property
+    def conversation_id(self) -> str:
+        """
+        The ID of the current conversation, empty for a new one.
+        """
+        return self._conversation_id
+
+    @property
+    def is_available(self) -> bool:
+        """
+        Whether this instance should receive traffic, i.e. its circuit breaker is not open.
+        """
+        return self.circuit_breaker is None or self.circuit_breaker.state != CircuitBreaker.OPEN
+
+    def get_selector_stats(self) -> Dict[str, SelectorStats]:
+        """
+        Gets the lookup statistics of every selector used so far.
+
+        Returns:
+        ----------
+            Dict[str, SelectorStats]: The lookups, misses, cache hits, average latency and working strategy of each selector.
+        """
+        return self.driver.selector_engine.stats()
+
+    @resilient
+    def get_user_data(self) -> Optional[DefaultAccount]:
+        """
+        Gets the user data.
+
+        Returns
+        ---------
+            Optional[Accounts]: a list of the accounts.
+        """
+        self.logger.debug("Getting user data...")
+
+        response_data = self.bridge.fetch(CGPTV.accounts_check_path)
+        if response_data is None:
+            self.logger.debug("Could not find user data")
             return None
 
+        return DefaultAccount(**response_data["accounts"]['default'])
+
+    @resilient
+    def get_conversations(self) -> Conversations:
+        """
+        Get a list of conversations.
+
+        Returns:
+        ----------
+            Conversations: A list of conversations.
+        """
+        self.logger.debug("Getting conversations...")
+        return self.get_conversations_page()
+
+    @resilient
+    def get_conversations_page(
+        self,
+        offset: int = 0,
+        limit: int = 28,
+        order: Literal["updated", "created"] = "updated",
+    ) -> Optional[Conversations]:
+        """
+        Get a page of conversations straight from the backend API, without relying on what the page has loaded.
+
+        Args:
+        ----------
+            offset (int, optional): The offset of the first conversation. Defaults to 0.
+            limit (int, optional): The maximum number of conversations to return. Defaults to 28.
+            order (Literal['updated', 'created'], optional): The order of the conversations. Defaults to 'updated'.
+
+        Returns:
+        ----------
+            Conversations: A page of conversations, or None if unsuccessful.
+        """
+        self.logger.debug(f"Getting conversations page at offset {offset}...")
+        response_data = self.bridge.fetch(
+            f"{CGPTV.conversations_path}?offset={offset}&limit={limit}&order={order}"
+        )
+        if response_data is None:
+            return None
+
+        return Conversations(
+            response_data["items"],
+            response_data.get("has_missing_conversations", False),
+            response_data["limit"],
+            response_data["offset"],
+            response_data["total"]
+        )
+
+    @resilient
+    def get_shared_conversations(self, timeout: float = 5) -> Optional[SharedConversations]:
+        """
+        Get a list of shared conversations.
+
+        Args:
+        ----------
+            timeout (float, optional): Time to wait for the request to finish before timing out.
+
+        Returns:
+        ----------
+            SharedConversations: A list of shared conversations, or None if unsuccessful.
+        """
+        self.logger.debug("Getting shared conversations...")
+        response_data = self.bridge.fetch(f"{CGPTV.shared_conversations_path}?order=created", timeout=timeout)
+        if response_data is None:
+            self.logger.debug("Failed to get shared conversations")
+            return None
+
+        self.logger.debug("Found shared conversations")
+
+        return SharedConversations(
+            response_data["items"],
+            response_data.get("has_missing_conversations", False),
+            response_data["limit"],
+            response_data["offset"],
+            response_data["total"]
+        )
+
+    def export_conversations(
+        self,
+        path: str,
+        concurrency: int = 8,
+        compress: Optional[bool] = None,
+        checkpoint: Optional[str] = None,
+        page_size: int = 100,
+    ) -> int:
+        """
+        Export every conversation, with its full message tree, to a JSON lines file.
+
+        Conversations are listed a page at a time and fetched `concurrency` at a time in a single round trip,
+        each being written as soon as it arrives, so memory stays flat however many there are.
+
+        Args:
+        ----------
+            path (str): The file to write to, appended to when resuming.
+            concurrency (int, optional): The number of conversations fetched at once. Defaults to 8.
+            compress (Optional[bool], optional): Whether to gzip the file. Defaults to whether the path ends with '.gz'.
+            checkpoint (Optional[str], optional): A file keeping track of the exported conversations, to resume from. Defaults to None.
+            page_size (int, optional): The number of conversations listed at once. Defaults to 100.
+
+        Returns:
+        ----------
+            int: The number of conversations exported by this call.
+
+        Raises:
+        ----------
+            ExportIncomplete: If a page of conversations could not be listed. What was exported so far is kept, call again with the same checkpoint to resume.
+        """
+        if compress is None:
+            compress = path.endswith(".gz")
+        opener = gzip.open if compress else open
+
+        exported = set()
+        if checkpoint and os_path.exists(checkpoint):
+            with open(checkpoint) as f:
+                exported = {line.strip() for line in f if line.strip()}
+            # Only what actually made it to the file counts, e.g. not what an interrupted write lost
+            exported &= self._recover_export(path, opener)
+            self.logger.debug(f"Resuming export, {len(exported)} conversations already exported")
+
+        count = failed = 0
+        mode = "at" if exported else "wt"
+        checkpoint_file = open(checkpoint, "a") if checkpoint else None
+        try:
+            with opener(path, mode, encoding="utf-8") as output:
+                offset = 0
+                while True:
+                    page = self.get_conversations_page(offset, page_size)
+                    if page is None:
+                        raise ExportIncomplete(
+                            f"Could not list the conversations at offset {offset}, {count} exported before stopping"
+                        )
+                    if not page.conversations:
+                        break
+                    ids = [
+                        conversation.conversation_id
+                        for conversation in page.conversations
+                        if conversation.conversation_id not in exported
+                    ]
+                    for start in range(0, len(ids), concurrency):
+                        batch = ids[start:start + concurrency]
+                        conversations = self.bridge.batch(
+                            [f"{CGPTV.conversation_path}/{conversation_id}" for conversation_id in batch]
+                        )
+                        for conversation_id, conversation in zip(batch, conversations):
+                            if conversation is None:
+                                failed += 1
+                                continue
+                            output.write(dumps({"id": conversation_id, **conversation}) + "\n")
+                            exported.add(conversation_id)
+                            count += 1
+                            if checkpoint_file:
+                                checkpoint_file.write(conversation_id + "\n")
+                        output.flush()
+                        if checkpoint_file:
+                            checkpoint_file.flush()
+                    self.logger.debug(f"Exported {count} conversations...")
+
+                    offset += len(page.conversations)
+                    if offset >= page.total:
+                        break
+        finally:
+            if checkpoint_file:
+                checkpoint_file.close()
+
+        self.logger.debug(f"Exported {count} conversations, {failed} failed")
+        return count
+
+    def _recover_export(self, path: str, opener: Callable) -> set:
+        """
+        Read the IDs of the conversations in an export a line at a time, cutting it after its last complete line
+        if it was cut short, so resuming appends to a valid file. A plain file is truncated in place, a gzip file
+        has its complete lines copied to a new one, as a gzip member cannot be cut.
+
+        Args:
+        ----------
+            path (str): The export.
+            opener (Callable): `open` or `gzip.open`.
+
+        Returns:
+        ----------
+            set: The IDs of the conversations in the file.
+        """
+        if not os_path.exists(path):
+            return set()
+
+        ids = set()
+        complete = 0  # Uncompressed size of the complete lines
+        truncated = False
+        try:
+            with opener(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        truncated = True
+                        break
+                    # The ID is written first, so it is read without parsing the whole conversation
+                    match = self._export_id.match(line)
+                    ids.add(match.group(1).decode() if match else loads(line)["id"])
+                    complete += len(line)
+        except (EOFError, OSError):  # A gzip member without its end, or a corrupt one
+            truncated = True
+
+        if truncated:
+            self.logger.debug(f"Export was cut short, keeping its {len(ids)} complete conversations...")
+            if opener is open:
+                with open(path, "r+b") as f:
+                    f.truncate(complete)
+            else:
+                with opener(path, "rb") as source, opener(f"{path}.tmp", "wb") as output:
+                    remaining = complete
+                    while remaining:
+                        chunk = source.read(min(remaining, 1 << 20))
+                        output.write(chunk)
+                        remaining -= len(chunk)
+                os_replace(f"{path}.tmp", path)
+        return ids
+
+    @resilient
+    def send_message(
+        self,
+        message: str,
+        timeout: int = 240,
+        input_mode: Literal["INSTANT", "SLOW"] = "INSTANT",
+        input_delay: float = 0.1,
+        input_chunk_size: int = 1,
+        max_message_length: Optional[int] = None,
+        on_progress: Optional[Callable[[str], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        auto_continue: bool = False,
+        first_part: int = 0,
+    ) -> ChatGPTResponse:
+        """
+        Send a message to ChatGPT.
+
+        Args:
+        ----------
+            message (str): Message to send.
+            timeout (int, optional): Timeout in seconds. Defaults to 240.
+            input_mode(list, optional): The input mode. Defaults to 'INSTANT'.
+            input_delay(float, optional): The delay between typed chunks in SLOW mode. Defaults to 0.1.
+            input_chunk_size(int, optional): The number of characters typed at once in SLOW mode. Defaults to 1.
+            max_message_length(Optional[int], optional): If set, longer messages are split and sent as a sequence of numbered parts, ChatGPT being told to only answer the last one, whose response is returned. The response tells how many parts were answered in `parts_sent`, and is `failed` if a part got no response. An exception raised midway has the same attribute. Defaults to None.
+            on_progress(Optional[Callable[[str], None]], optional): Called with the response text so far while it streams in, requires `capture_stream`. Defaults to None.
+            cancel_token(Optional[CancellationToken], optional): Once cancelled, generation is stopped and the response so far is returned, marked as `cancelled`. Defaults to None.
+            auto_continue(bool, optional): Whether to press "Continue generating" whenever the response is truncated, and return the whole response. `timeout` applies to each segment. Defaults to False.
+            first_part(int, optional): With `max_message_length`, the part to start from, e.g. the `parts_sent` of a split message that failed, in the same conversation. Defaults to 0.
+
+        Returns:
+        ----------
+            ChatGPTResponse: Response from ChatGPT.
+
+        Raises:
+        ----------
+            TimeoutException: If the message fails to send.
+            ValueError: If the response is invalid.
+            ValueError: If the response is not found.
+            ValueError: If `max_message_length` is too short to fit the part headers, or `first_part` is not one of the parts.
+            RateLimitExceeded: If the account has hit a rate limit or usage cap.
+        """
+        assert input_mode in ["INSTANT", "SLOW"], "Invalid input mode"
+        if max_message_length and len(message) > max_message_length:
+            # Room for the longest header, whatever the number of parts
+            reserved = max(
+                len(header.format(index=len(message), count=len(message)))
+                for header in (self._part_header, self._last_part_header)
+            )
+            if max_message_length <= reserved:
+                raise ValueError(f"max_message_length must be over {reserved} to fit the part headers")
+            parts = self._split_message(message, max_message_length - reserved)
+            if not 0 <= first_part < len(parts):
+                raise ValueError(f"first_part must be within the {len(parts)} parts of the message")
+            self.logger.debug(f"Splitting message into {len(parts)} parts, starting from part {first_part + 1}...")
+            for index in range(first_part, len(parts)):
+                header = self._last_part_header if index == len(parts) - 1 else self._part_header
+                try:
+                    # Only the response to the last part is the answer worth streaming
+                    response = self.send_message(
+                        header.format(index=index + 1, count=len(parts)) + parts[index],
+                        timeout, input_mode, input_delay, input_chunk_size,
+                        on_progress=on_progress if index == len(parts) - 1 else None,
+                        cancel_token=cancel_token,
+                        auto_continue=auto_continue,
+                    )
+                except BaseException as e:
+                    e.parts_sent = index
+                    raise
+                if response is None:
+                    response = ChatGPTResponse(response = "", failed = True, conversation_id = self._conversation_id)
+                if response.failed or response.cancelled:
+                    response.parts_sent = index
+                    break
+                response.parts_sent = index + 1
+            return response
+
+        if cancel_token is not None and cancel_token.cancelled:
+            self.logger.debug("Cancelled before sending the message")
+            return ChatGPTResponse(response = "", conversation_id = self._conversation_id, cancelled = True)
+
+        self.logger.debug(
+            f'Sending message with mode {input_mode}{f" with {input_delay} delay per {input_chunk_size} characters" if input_mode == "SLOW" else ""}...'
+        )
+
+        textbox = self._get_textbox()
+        if self._capture_stream:
+            self.driver.execute_script("window.__unlimitedgptCapture = null;")
+        if input_mode == "INSTANT" and len(message) > self._large_message_threshold:
+            self._submit_large_message(textbox, message)
+            mark_submitted(self)
+        else:
+            if input_mode == "INSTANT":
+                self.driver.execute_script(
+                    "arguments[0].value = arguments[1];", textbox, message
+                )
+            else:
+                try:
+                    self._type_message(textbox, message, input_delay, input_chunk_size)
+                except StaleElementReferenceException:  # type: ignore
+                    textbox = self._get_textbox()
+                    self.driver.execute_script("arguments[0].value = '';", textbox)
+                    self._type_message(textbox, message, input_delay, input_chunk_size)
+
+            textbox.send_keys("a")
+            textbox.send_keys(Keys.BACKSPACE)
+            textbox.send_keys(Keys.ENTER)
+            mark_submitted(self)
+
+        self._last_prompt_length = len(message)
+        response = self._wait_for_response(timeout, on_progress, len(message), cancel_token, auto_continue)
+        if response is None or response.failed:
+            return response
+
+        if not self._conversation_id:
+            self.logger.debug(f"New conversation, attempting to catch the ID...")
+            try:
+                self._get_conversation_id()
+            except:
+                pass
+            response.conversation_id = self._conversation_id
+
+        if self.search_index is not None:
+            self.search_index.add_response(response, message)
+        self._check_page_size()
+        return response
+
+    @resilient
+    def regenerate_response(
+        self,
+        message_timeout: int = 240,
+        click_timeout: int = 20,
+        cancel_token: Optional[CancellationToken] = None,
+        auto_continue: bool = False,
+    ) -> ChatGPTResponse:
+        """
+        Regenerate the response.
+
+        Args:
+        ----------
+            message_timeout (int, optional): Time to wait for the message to regenerate before timing out. Defaults to 240.
+            click_timeout (int, optional): Time to wait for the click to succeed before timing out. Defaults to 20.
+            cancel_token (Optional[CancellationToken], optional): Once cancelled, generation is stopped and the response so far is returned, marked as `cancelled`. Defaults to None.
+            auto_continue (bool, optional): Whether to press "Continue generating" whenever the response is truncated, and return the whole response. Defaults to False.
+
+        Returns:
+        ----------
+            response (ChatGPTResponse): The newly regenerated response data.
+
+        Raises:
+        ----------
+            TimeoutException: If the message fails to send.
+            TimeoutException: If the click fails to succeed.
+            RateLimitExceeded: If the account has hit a rate limit or usage cap.
+            ValueError: If the response is invalid.
+            ValueError: If the response is not found.
+        """
+        if cancel_token is not None and cancel_token.cancelled:
+            self.logger.debug("Cancelled before regenerating the response")
+            return ChatGPTResponse(response = "", conversation_id = self._conversation_id, cancelled = True)
+
+        self.logger.debug("Regenerating response...")
+        if self._capture_stream:
+            self.driver.execute_script("window.__unlimitedgptCapture = null;")
+
+        # Click "Regenerate response" button
+        regenerate_response_clicked = self.driver.safe_click(
+            CGPTV.regenerate_response, timeout=click_timeout
+        )
+        if not regenerate_response_clicked:
+            self.logger.debug("Could not click regenerate response button")
+            raise TimeoutException("Could not click regenerate response button")
+        mark_submitted(self)
+
+        response = self._wait_for_response(
+            message_timeout,
+            prompt_length=self._last_prompt_length,
+            cancel_token=cancel_token,
+            auto_continue=auto_continue,
+        )
+        if response is None or response.failed:
+            return response
+
         self.logger.debug("Regenerated response")
-        return ChatGPTResponse(response = response, conversation_id = self._conversation_id)
+        self._check_page_size()
+        return response
 
     def reset_conversation(self) -> None:
         """
@@ -658,11 +1628,16 @@ class ChatGPT:
             return self.logger.debug("Current URL is not chat page, skipping reset")
 
         self.logger.debug("Resetting conversation...")
+        if self._navigate_in_app("/"):
+            self._conversation_id = ""
+            return self.logger.debug("Conversation reset")
+
         button = CGPTV.new_chat if self._history_and_training_enabled else CGPTV.clear_chat
         clicked = self.driver.safe_click(button, timeout=60)
         if not clicked:
             self.logger.debug(f"{button[1]} button not found")
             return self._get_out_of_menu()
+        self._conversation_id = ""
         self.logger.debug("Conversation reset")
 
     def clear_conversations(self) -> None:
@@ -671,17 +1646,8 @@ class ChatGPT:
         """
         self.logger.debug("Clearing all conversations...")
         try:
-            menu_button_clicked = self.driver.safe_click(CGPTV.menu_button, timeout=60)
-            if not menu_button_clicked:
-                self.logger.debug("Could not click menu button")
-                return self._get_out_of_menu()
-            self.logger.debug("Clicked menu button")
-
-            settings_button_clicked = self.driver.safe_click(CGPTV.menu_settings)
-            if not settings_button_clicked:
-                self.logger.debug("Could not click settings button")
+            if not self._navigator.open_tab("General"):
                 return self._get_out_of_menu()
-            self.logger.debug("Clicked settings button")
 
             clear_button_clicked = self.driver.safe_click(CGPTV.menu_clear_conversations)
             if not clear_button_clicked:
@@ -703,6 +1669,75 @@ class ChatGPT:
             self.logger.debug(f"Could not find menu buttons, exc: {e}")
             return self._get_out_of_menu()
 
+    def _set_theme(self, theme: Literal["LIGHT", "DARK", "OPPOSITE", "SYSTEM"]) -> bool:
+        """
+        Selects a theme in the settings dialog, opening it if needed. Leaves the dialog open.
+
+        Args:
+        ----------
+            theme (Literal['LIGHT', 'DARK', 'OPPOSITE', 'SYSTEM']): The theme to switch to.
+
+        Returns:
+        ----------
+            bool: Whether the theme is now set.
+        """
+        current_theme_value = self.driver.find_element(
+            *CGPTV.outer_html
+        ).get_attribute("class")
+        current_theme = "LIGHT" if "light" in current_theme_value else "DARK"
+        if theme == current_theme:
+            self.logger.debug("Theme is already set to the desired theme")
+            return True
+        self.logger.debug(f"Current theme is {current_theme}")
+
+        if theme == "OPPOSITE":
+            if current_theme == "SYSTEM":
+                self.logger.debug("Theme cannot be set to opposite of system theme")
+                return False
+            target_theme = "dark" if current_theme == "LIGHT" else "light"
+        else:
+            target_theme = theme.lower()
+
+        if not self._navigator.open_tab("General"):
+            return False
+
+        button_element = self.driver.find_element(*CGPTV.theme_button)
+        ActionChains(self.driver).move_to_element(button_element).perform()
+        button_clicked = self.driver.safe_click(CGPTV.theme_button, timeout=60)
+        if not button_clicked:
+            self.logger.debug("Could not click theme button")
+            return False
+        self.logger.debug("Clicked theme button")
+
+        try:
+            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "[role='option']")))
+        except TimeoutException: # type: ignore
+            self.logger.debug("Could not load theme options")
+            return False
+
+        options = self.driver.find_elements(By.CSS_SELECTOR, "[role='option']")
+        if not options:
+            self.logger.debug("Could not find theme options")
+            return False
+
+        try:
+            for option in options:
+                safe_option = WebDriverWait(self.driver, 10).until(
+                    EC.element_to_be_clickable(option)
+                )
+                if safe_option.text.lower() == target_theme:
+                    safe_option.click()
+                    break
+            else:
+                self.logger.debug(f"Could not find theme option {theme}")
+                return False
+        except:
+            self.logger.debug(f"Could not click theme option {theme}")
+            return False
+
+        self.logger.debug(f"Selected theme {target_theme}")
+        return True
+
     def switch_theme(
         self, theme: Literal["LIGHT", "DARK", "OPPOSITE", "SYSTEM"]
     ) -> None:
@@ -722,91 +1757,149 @@ class ChatGPT:
         """
         self.logger.debug(f"Switching theme to {theme}...")
         try:
-            menu_button_clicked = self.driver.safe_click(CGPTV.menu_button)
-            if not menu_button_clicked:
-                self.logger.debug("Could not click menu button")
-                return self._get_out_of_menu()
-            self.logger.debug("Clicked menu button")
+            if self._set_theme(theme):
+                self.logger.debug("Theme switched")
+        except NoSuchElementException as e: # type: ignore
+            self.logger.debug("Could not find theme buttons")
+        return self._get_out_of_menu()
 
-            settings_button_clicked = self.driver.safe_click(CGPTV.menu_settings)
-            if not settings_button_clicked:
-                self.logger.debug("Could not click settings button")
-                return self._get_out_of_menu()
-            self.logger.debug("Clicked settings button")
-
-            current_theme_value = self.driver.find_element(
-                *CGPTV.outer_html
-            ).get_attribute("class")
-            current_theme = "LIGHT" if "light" in current_theme_value else "DARK"
-            if theme == current_theme:
-                self.logger.debug("Theme is already set to the desired theme")
-                return self._get_out_of_menu()
-            self.logger.debug(f"Current theme is {current_theme}")
+    def _read_session_page(self) -> SessionData:
+        """
+        Reads the session data from the currently opened `/api/auth/session` page.
 
-            button_element = self.driver.find_element(*CGPTV.theme_button)
-            ActionChains(self.driver).move_to_element(button_element).perform()
-            button_clicked = self.driver.safe_click(CGPTV.theme_button, timeout=60)
-            if not button_clicked:
-                self.logger.debug("Could not click theme button")
-                return self._get_out_of_menu()
-            self.logger.debug("Clicked theme button")
+        Returns:
+        ----------
+            SessionData: The session data.
+
+        Raises:
+        ----------
+            ValueError: If the session token is invalid.
+        """
+        response = self.driver.page_source
+        if response[0] != "{":
+            response = self.driver.find_element(By.TAG_NAME, "pre").text
+        response = loads(response)
+        if (not response) or (
+            "error" in response and response["error"] == "RefreshAccessTokenError"
+        ):
+            raise ValueError("Invalid session token")
+        return SessionData(
+            User(**response["user"]),
+            response["expires"],
+            response["accessToken"],
+            response["authProvider"],
+        )
+
+    def _open_account_context(self, session_token: str) -> SessionData:
+        """
+        Opens a new isolated browser context for an account, with its own cookie jar, and signs into it.
+
+        Args:
+        ----------
+            session_token (str): The session token for authentication.
+
+        Returns:
+        ----------
+            SessionData: The account's session data.
+
+        Raises:
+        ----------
+            ValueError: If the session token is invalid.
+            ValueError: If the Cloudflare challenge fails.
+        """
+        self.logger.debug("Creating browser context...")
+        original_window = self.driver.current_window_handle
+        context_id = self.driver.execute_cdp_cmd(
+            "Target.createBrowserContext", {"disposeOnDetach": False}
+        )["browserContextId"]
+        opened = False
+        try:
+            handle = self._open_target(context_id)
+            self.driver.switch_to.window(handle)
+
+            self.driver.execute_cdp_cmd(
+                "Network.setCookie",
+                {
+                    "domain": "chat.openai.com",
+                    "path": "/",
+                    "name": "__Secure-next-auth.session-token",
+                    "value": session_token,
+                    "httpOnly": True,
+                    "secure": True,
+                },
+            )
+            if self._disable_moderation:
+                self.driver.execute_cdp_cmd(
+                    "Network.setBlockedURLs",
+                    {"urls": ["https://chat.openai.com/backend-api/moderations"]},
+                )
+            if self._capture_stream:
+                self._install_stream_capture()
 
+            self.logger.debug("Validating authorization...")
+            self.driver.get("https://chat.openai.com/api/auth/session")
             try:
-                WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "[role='option']")))
-            except TimeoutException: # type: ignore
-                self.logger.debug("Could not load theme options")
-                return self._get_out_of_menu()
+                WebDriverWait(self.driver, 10).until_not(
+                    EC.presence_of_element_located(CGPTV.cf_challenge_form)
+                )
+            except TimeoutException:  # type: ignore
+                raise ValueError("Cloudflare challenge failed")
+            session_data = self._read_session_page()
+            self.logger.debug("Authorization is valid")
+
+            self.logger.debug("Opening chat page...")
+            self.driver.get(f"{CGPTV.chat_url}/")
+            self._seen_onboarding = False  # The new context has its own local storage
+            self._check_blocking_elements(ignore_conversation_alert=True)
+            opened = True
+        finally:
+            if not opened:
+                # Disposing of the context also closes its window
+                self._dispose_context(context_id)
+                self.driver.switch_to.window(original_window)
 
-            options = self.driver.find_elements(By.CSS_SELECTOR, "[role='option']")
-            if not options:
-                self.logger.debug("Could not find theme options")
-                return self._get_out_of_menu()
-            
-            if theme == "OPPOSITE":
-                if current_theme == "SYSTEM":
-                    self.logger.debug("Theme cannot be set to opposite of system theme")
-                    return self._get_out_of_menu()
+        self._account_windows[session_token] = handle
+        self._account_contexts[session_token] = context_id
+        return session_data
 
-                opposite_theme = "dark" if current_theme == "LIGHT" else "light"
-                try:
-                    for option in options:
-                        safe_option = WebDriverWait(self, 10).until(
-                            EC.element_to_be_clickable(option)
-                        )
-                        if safe_option.text.lower() == opposite_theme.lower():
-                            try:
-                                safe_option.click()
-                            except:
-                                self.logger.debug("Could not click opposite theme option")
-                                return self._get_out_of_menu()
-                except:
-                    self.logger.debug(f"Could not find theme option {theme}")
-                    return self._get_out_of_menu()
-
-                self.logger.debug(f"Selected opposite theme of {current_theme}")
-            else:
-                try:
-                    for option in options:
-                        safe_option = WebDriverWait(self, 10).until(
-                            EC.element_to_be_clickable(option)
-                        )
-                        if safe_option.text.lower() == theme.lower():
-                            try:
-                                safe_option.click()
-                            except:
-                                self.logger.debug("Could not click opposite theme option")
-                                return self._get_out_of_menu()
-                except:
-                    self.logger.debug(f"Could not find theme option {theme}")
-                    return self._get_out_of_menu()
-
-                self.logger.debug(f"Selected theme {theme}")
-
-            self.logger.debug("Theme switched")
-            self._get_out_of_menu()
-        except NoSuchElementException as e: # type: ignore
-            self.logger.debug("Could not find theme buttons")
-            return self._get_out_of_menu()
+    def _open_target(self, context_id: Optional[str] = None) -> str:
+        """
+        Open a blank window, in a browser context or in the one of the active window.
+
+        Args:
+        ----------
+            context_id (Optional[str], optional): The browser context to open it in. Defaults to None (the active window's).
+
+        Returns:
+        ----------
+            str: The handle of the new window, without switching to it.
+        """
+        if context_id is None:
+            context_id = self.driver.execute_cdp_cmd("Target.getTargetInfo", {})["targetInfo"]["browserContextId"]
+        target_id = self.driver.execute_cdp_cmd(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+        )["targetId"]
+        # Window handles are the target IDs, older chromedriver versions prefix them with "CDwindow-"
+        return next(
+            handle for handle in self.driver.window_handles if handle.endswith(target_id)
+        )
+
+    def _dispose_context(self, context_id: str) -> None:
+        """
+        Dispose of a browser context, closing its windows and dropping its cookies and storage.
+
+        Args:
+        ----------
+            context_id (str): The browser context.
+        """
+        try:
+            self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except WebDriverException as e:  # type: ignore
+            self.logger.debug(f"Failed to dispose of browser context: {str(e)}")
+        for token, account_context in list(self._account_contexts.items()):
+            if account_context == context_id:
+                del self._account_contexts[token]
+                self._account_windows.pop(token, None)
 
     def switch_account(self, session_token: str) -> SessionData:
         """
@@ -824,9 +1917,35 @@ class ChatGPT:
         ----------
             ValueError: If the session token is not provided.
             ValueError: If the response is invalid.
+
+        Notes:
+        ----------
+            When `isolate_accounts` is enabled, every account gets its own browser context on its first switch.
+            Switching back to it later only switches the active tab, and restores its conversation.
         """
         self.logger.debug("Switching account...")
-        self.conversation_id = (
+        if self._isolate_accounts:
+            self._account_conversations[self._session_token] = self._conversation_id
+            handle = self._account_windows.get(session_token)
+            if handle in self.driver.window_handles:
+                self.driver.switch_to.window(handle)
+                self._refresh_session()
+                if session_token not in self._account_sessions:
+                    # The account the instance was started with
+                    self._account_sessions[session_token] = self.get_session_data()
+                session_data = self._account_sessions[session_token]
+            else:
+                if session_token in self._account_contexts:
+                    # Its window was closed, start over in a new context
+                    self._dispose_context(self._account_contexts[session_token])
+                session_data = self._open_account_context(session_token)
+                self._account_sessions[session_token] = session_data
+            self._session_token = session_token
+            self._conversation_id = self._account_conversations.get(session_token, "")
+            self.logger.debug("Switched account")
+            return session_data
+
+        self._conversation_id = (
             ""  # Old conversation ID cannot be loaded in the new account
         )
         self.driver.execute_cdp_cmd(
@@ -844,24 +1963,12 @@ class ChatGPT:
 
         self.logger.debug("Validating authorization...")
         self.driver.get("https://chat.openai.com/api/auth/session")
-        response = self.driver.page_source
-        if response[0] != "{":
-            response = self.driver.find_element(By.TAG_NAME, "pre").text
-        response = loads(response)
-        if (not response) or (
-            "error" in response and response["error"] == "RefreshAccessTokenError"
-        ):
-            raise ValueError("Invalid session token")
-        session_data = SessionData(
-            User(**response["user"]),
-            response["expires"],
-            response["accessToken"],
-            response["authProvider"],
-        )
+        session_data = self._read_session_page()
         self.logger.debug("Authorization is valid")
+        self._session_token = session_token
 
         self.logger.debug("Opening chat page...")
-        self.driver.get(f"{CGPTV.chat_url}/{self._conversation_id}")
+        self.driver.get(self._conversation_url(self._conversation_id))
         self.logger.debug("Opened chat page")
         self._check_blocking_elements(ignore_conversation_alert=True)
         self.logger.debug("Switched account")
@@ -877,22 +1984,24 @@ class ChatGPT:
         """
         self.logger.debug("Getting account data...")
         self.logger.debug("Opening new tab...")
-        self.driver.execute_script("window.open();")
-        self.driver.switch_to.window(self.driver.window_handles[-1])
-        self.driver.get("https://chat.openai.com/api/auth/session")
-        response = self.driver.page_source
-        if response[0] != "{":
-            response = self.driver.find_element(By.TAG_NAME, "pre").text
-        response = loads(response)
-        session_data = SessionData(
-            User(**response["user"]),
-            response["expires"],
-            response["accessToken"],
-            response["authProvider"],
-        )
-        self.logger.debug("Closing tab...")
-        self.driver.close()
-        self.driver.switch_to.window(self.driver.window_handles[0])
+        original_window = self.driver.current_window_handle
+        self.driver.switch_to.window(self._open_target())
+        try:
+            self.driver.get("https://chat.openai.com/api/auth/session")
+            response = self.driver.page_source
+            if response[0] != "{":
+                response = self.driver.find_element(By.TAG_NAME, "pre").text
+            response = loads(response)
+            session_data = SessionData(
+                User(**response["user"]),
+                response["expires"],
+                response["accessToken"],
+                response["authProvider"],
+            )
+        finally:
+            self.logger.debug("Closing tab...")
+            self.driver.close()
+            self.driver.switch_to.window(original_window)
         return session_data
 
     def logout(self) -> None:
@@ -917,69 +2026,91 @@ class ChatGPT:
             self.logger.debug("Logout successful")
             return
 
-    def toggle_chat_history(self, state: bool = False) -> None:
+    def _set_chat_history(self, state: bool) -> bool:
         """
-        Toggle chat history.
+        Sets the chat history toggle in the settings dialog, opening it if needed. Leaves the dialog open.
 
         Args:
         ----------
-            state (bool, optional): The state to set the chat history toggle to. Defaults to False.
-        """
-        self.logger.debug("Disabling chat history...")
-        try:
-            menu_button_clicked = self.driver.safe_click(CGPTV.menu_button)
-            if not menu_button_clicked:
-                self.logger.debug("Could not click menu button")
-                return self._get_out_of_menu()
-
-            self.logger.debug("Clicked menu button")
-
-            settings_button_clicked = self.driver.safe_click(CGPTV.menu_settings)
-            if not settings_button_clicked:
-                self.logger.debug("Could not click settings button")
-                return self._get_out_of_menu()
-
-            self.logger.debug("Clicked settings button")
-
-            wait = WebDriverWait(self.driver, 60)
-
-            # Click "Data controls" button
-            data_controls_clicked = self.driver.safe_click(
-                CGPTV.data_controls, timeout=60
-            )
-            if not data_controls_clicked:
-                self.logger.debug("Could not click data controls button")
-                return self._get_out_of_menu()
+            state (bool): The state to set the chat history toggle to.
 
-            # Click "Disable chat history" button
-            # Not using safe_click because it there are some checks that need to be done before clicking
-            chat_history_toggle = wait.until(
-                EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, f'button[aria-label="Chat history & training"]')
-                )
-            )
-            current_state = (
-                True
-                if chat_history_toggle.get_attribute("aria-checked") == "true"
-                else False
+        Returns:
+        ----------
+            bool: Whether the toggle is now in the desired state.
+        """
+        if not self._navigator.open_tab("DataControls"):
+            return False
+
+        # Click "Disable chat history" button
+        # Not using safe_click because it there are some checks that need to be done before clicking
+        chat_history_toggle = WebDriverWait(self.driver, 60).until(
+            EC.element_to_be_clickable(
+                (By.CSS_SELECTOR, f'button[aria-label="Chat history & training"]')
             )
-            if current_state == state:
-                self.logger.debug("Chat history is already set to the desired state")
-                return self._get_out_of_menu()
-
+        )
+        current_state = (
+            True
+            if chat_history_toggle.get_attribute("aria-checked") == "true"
+            else False
+        )
+        if current_state == state:
+            self.logger.debug("Chat history is already set to the desired state")
+        else:
             chat_history_toggle.click()
             self.logger.debug(
                 f'Chat history is now {"enabled" if state else "disabled"}'
             )
+        self._history_and_training_enabled = state
+        return True
+
+    def toggle_chat_history(self, state: bool = False) -> None:
+        """
+        Toggle chat history.
+
+        Args:
+        ----------
+            state (bool, optional): The state to set the chat history toggle to. Defaults to False.
+        """
+        self.logger.debug(f'{"Enabling" if state else "Disabling"} chat history...')
+        try:
+            self._set_chat_history(state)
         except:
             self.logger.debug(
                 f'Could not {"enable" if state else "disable"} chat history'
             )
-        
-        self._history_and_training_enabled = state
 
         return self._get_out_of_menu()
 
+    def apply_settings(
+        self,
+        theme: Optional[Literal["LIGHT", "DARK", "OPPOSITE", "SYSTEM"]] = None,
+        chat_history: Optional[bool] = None,
+    ) -> bool:
+        """
+        Apply several settings in one opening of the settings dialog.
+
+        Args:
+        ----------
+            theme (Optional[Literal['LIGHT', 'DARK', 'OPPOSITE', 'SYSTEM']], optional): The theme to switch to. Defaults to None (unchanged).
+            chat_history (Optional[bool], optional): The state to set the chat history toggle to. Defaults to None (unchanged).
+
+        Returns:
+        ----------
+            bool: Whether every setting was applied.
+        """
+        self.logger.debug("Applying settings...")
+        applied = True
+        try:
+            if theme is not None:
+                applied = self._set_theme(theme) and applied
+            if chat_history is not None:
+                applied = self._set_chat_history(chat_history) and applied
+        except:
+            self.logger.debug("Could not apply settings")
+            applied = False
+
+        return self._navigator.close() and applied
+
     def switch_conversation(self, conversation_id: str) -> None:
         """
         Switch the conversation.
@@ -993,7 +2124,12 @@ class ChatGPT:
             InvalidConversationID: If the conversation ID is invalid.
         """
         self.logger.debug("Switching conversation...")
-        self.driver.get(f"{CGPTV.chat_url}/{conversation_id}")
-        self._check_blocking_elements()
+        start_time = time()
+        if self._navigate_in_app(CGPTV.conversation_route.format(conversation_id=conversation_id)):
+            # The intro only comes with a page load, so it is not waited for
+            self._check_blocking_elements(intro_timeout=0)
+        else:
+            self.driver.get(self._conversation_url(conversation_id))
+            self._check_blocking_elements()
         self._conversation_id = conversation_id
-        self.logger.debug(f"Switched conversation to {conversation_id}")
+        self.logger.debug(f"Switched conversation to {conversation_id} in {time() - start_time:.2f}s")
@@ -5,3 +5,12 @@ An unofficial Python wrapper for OpenAI's ChatGPT API
 """
 
 from UnlimitedGPT.UnlimitedGPT import ChatGPT
+from UnlimitedGPT.internal.cancellation import CancellationToken
+from UnlimitedGPT.internal.coalesce import RequestCoalescer
+from UnlimitedGPT.internal.latency import LatencyModel
+from UnlimitedGPT.internal.process import ProcessChatGPT
+from UnlimitedGPT.internal.retry import CircuitBreaker, RetryPolicy
+from UnlimitedGPT.internal.scheduler import AccountScheduler, FairScheduler
+from UnlimitedGPT.internal.search import SearchIndex
+from UnlimitedGPT.internal.store import ConversationStore
+from UnlimitedGPT.internal.supervisor import WorkerSupervisor
@@ -0,0 +1,98 @@
+from json import loads
+from logging import Logger
+from typing import Any, List, Optional, Union
+
+from selenium.common.exceptions import TimeoutException
+
+from UnlimitedGPT.internal import scripts
+from UnlimitedGPT.internal.driver import ChatGPTDriver
+
+Request = Union[str, dict]
+
+
+class FetchBridge:
+    """
+    Runs backend API requests with `fetch()` inside the already-authenticated page, batching
+    any number of them into a single WebDriver round trip.
+
+    Args:
+    ----------
+        driver (ChatGPTDriver): The driver whose page the requests run in.
+        logger (Logger): The logger to log to.
+    """
+
+    def __init__(self, driver: ChatGPTDriver, logger: Logger) -> None:
+        self.driver = driver
+        self.logger = logger
+        self.round_trips = 0
+
+    def __repr__(self):
+        return f"<FetchBridge round_trips={self.round_trips}>"
+
+    @staticmethod
+    def _normalize(request: Request) -> dict:
+        if isinstance(request, str):
+            request = {"path": request}
+        return {
+            "path": request["path"],
+            "method": request.get("method", "GET"),
+            "body": request.get("body"),
+        }
+
+    def batch(self, requests: List[Request], timeout: float = 60) -> List[Optional[Any]]:
+        """
+        Run several requests in parallel, in a single round trip.
+
+        Args:
+        ----------
+            requests (List[Union[str, dict]]): The paths to get, or `{"path", "method", "body"}` dicts, the body being sent as JSON.
+            timeout (float, optional): Time to wait for every request to finish. Defaults to 60.
+
+        Returns:
+        ----------
+            List[Optional[Any]]: The decoded JSON bodies, in the order of the requests, None for the failed ones.
+        """
+        requests = [self._normalize(request) for request in requests]
+        if not requests:
+            return []
+
+        self.logger.debug(f"Fetching {len(requests)} requests in one round trip...")
+        self.driver.set_script_timeout(timeout)
+        self.round_trips += 1
+        try:
+            rets = self.driver.execute_async_script(scripts.fetch_backend_api, requests)
+        except TimeoutException:  # type: ignore
+            self.logger.debug(f"Timed out fetching {len(requests)} requests")
+            return [None] * len(requests)
+
+        results = []
+        for request, ret in zip(requests, rets):
+            if not 200 <= ret["status"] < 300:
+                self.logger.debug(f"Failed to fetch {request['path']}, status: {ret['status']}")
+                results.append(None)
+                continue
+            try:
+                results.append(loads(ret["body"]) if ret["body"] else {})
+            except ValueError:
+                self.logger.debug(f"Invalid JSON from {request['path']}")
+                results.append(None)
+        return results
+
+    def fetch(
+        self, path: str, method: str = "GET", body: Optional[Any] = None, timeout: float = 30
+    ) -> Optional[Any]:
+        """
+        Run a single request.
+
+        Args:
+        ----------
+            path (str): The path, e.g. `/backend-api/conversations?offset=0&limit=28`.
+            method (str, optional): The HTTP method. Defaults to 'GET'.
+            body (Optional[Any], optional): The body, sent as JSON. Defaults to None.
+            timeout (float, optional): Time to wait for the request to finish. Defaults to 30.
+
+        Returns:
+        ----------
+            Optional[Any]: The decoded JSON body, or None if the request failed.
+        """
+        return self.batch([{"path": path, "method": method, "body": body}], timeout)[0]
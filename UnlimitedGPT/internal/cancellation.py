@@ -0,0 +1,50 @@
+from threading import Event
+from typing import Optional
+
+
+class CancellationToken:
+    """
+    Lets another thread cancel a `send_message` or `regenerate_response` call while it waits for the
+    response: generation is stopped on the page, and the call returns what was generated so far,
+    marked as `cancelled`.
+    """
+
+    def __init__(self) -> None:
+        self.reason: Optional[str] = None
+        self._event = Event()
+
+    def __repr__(self):
+        return f"<CancellationToken cancelled={self.cancelled} reason={self.reason}>"
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether the token has been cancelled.
+        """
+        return self._event.is_set()
+
+    def cancel(self, reason: Optional[str] = None) -> None:
+        """
+        Cancel the calls using this token. Cancelling more than once does nothing.
+
+        Args:
+        ----------
+            reason (Optional[str], optional): Why, for the logs. Defaults to None.
+        """
+        if not self.cancelled:
+            self.reason = reason
+            self._event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the token to be cancelled.
+
+        Args:
+        ----------
+            timeout (Optional[float], optional): Time to wait, in seconds. Defaults to None (forever).
+
+        Returns:
+        ----------
+            bool: Whether it was cancelled.
+        """
+        return self._event.wait(timeout)
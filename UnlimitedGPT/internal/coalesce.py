@@ -0,0 +1,175 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from logging import getLogger
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from UnlimitedGPT.internal.cancellation import CancellationToken
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+
+
+class _SharedCall:
+    """The state of a call in flight: its result, and the callers still waiting for it."""
+
+    def __init__(self) -> None:
+        self.future = Future()
+        self.token = CancellationToken()
+        self.callers = 1
+
+
+class RequestCoalescer:
+    """
+    Lets identical requests in flight at the same time share a single generation: the first caller
+    runs it, and the ones arriving before it finishes wait for its result instead of taking a browser.
+
+    Only coalesce prompts that start a new conversation: every caller gets the same response,
+    conversation included.
+
+    Args:
+    ----------
+        target (Optional[Any], optional): What `send_message` sends through, e.g. a `FairScheduler`. Defaults to None.
+    """
+
+    def __init__(self, target: Optional[Any] = None) -> None:
+        self.target = target
+        self.generations = 0
+        self.coalesced = 0
+        self.logger = getLogger("pyChatGPT")
+        self._lock = Lock()
+        self._in_flight: Dict[Hashable, _SharedCall] = {}
+
+    def __repr__(self):
+        return f"<RequestCoalescer generations={self.generations} coalesced={self.coalesced} in_flight={len(self._in_flight)}>"
+
+    def call(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        Call a function, unless a call with the same key is in flight, in which case its result is shared.
+
+        Args:
+        ----------
+            key (Hashable): Identifies identical calls.
+            func (Callable): The function to call.
+            *args, **kwargs: Passed to the function.
+
+        Returns:
+        ----------
+            Any: The result of the call, or of the one in flight.
+
+        Raises:
+        ----------
+            Exception: Whatever the call raised, raised in every caller sharing it.
+        """
+        return self.share(key, lambda token: func(*args, **kwargs))[0]
+
+    def share(
+        self,
+        key: Hashable,
+        func: Callable[[CancellationToken], Any],
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Call a cancellable function, unless a call with the same key is in flight, in which case its result is shared.
+
+        The function gets a token of its own, cancelled once every caller sharing the call was cancelled,
+        so one caller going away does not stop the others' generation. A cancelled caller stops waiting right away.
+
+        Args:
+        ----------
+            key (Hashable): Identifies identical calls.
+            func (Callable[[CancellationToken], Any]): The function to call, with the shared token.
+            cancel_token (Optional[CancellationToken], optional): The caller's token. Defaults to None.
+
+        Returns:
+        ----------
+            Tuple[Any, bool]: The result (None for a cancelled caller that was waiting), and whether it was shared from another caller's call.
+
+        Raises:
+        ----------
+            Exception: Whatever the call raised, raised in every caller sharing it.
+        """
+        with self._lock:
+            shared = self._in_flight.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._in_flight[key] = _SharedCall()
+                self.generations += 1
+            else:
+                shared.callers += 1
+                self.coalesced += 1
+
+        if not leader:
+            self.logger.debug("Identical request in flight, waiting for its result...")
+            while True:
+                try:
+                    return shared.future.result(0.25), True
+                except FutureTimeoutError:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        self._leave(shared, cancel_token.reason)
+                        return None, True
+
+        done = Event()
+        if cancel_token is not None:
+            Thread(target=self._watch_leader, args=(shared, cancel_token, done), daemon=True).start()
+        try:
+            result = func(shared.token)
+        except BaseException as e:
+            shared.future.set_exception(e)
+            raise
+        else:
+            shared.future.set_result(result)
+            return result, False
+        finally:
+            done.set()
+            with self._lock:
+                del self._in_flight[key]
+
+    def _leave(self, shared: _SharedCall, reason: Optional[str]) -> None:
+        """
+        Stop waiting for a shared call, cancelling it once nobody waits for it anymore.
+        """
+        with self._lock:
+            shared.callers -= 1
+            left = shared.callers
+        if left == 0:
+            shared.token.cancel(reason)
+
+    def _watch_leader(self, shared: _SharedCall, cancel_token: CancellationToken, done: Event) -> None:
+        """
+        Lets the caller running a shared call leave it once cancelled, meant to run in the background.
+        """
+        while not done.is_set():
+            if cancel_token.wait(0.25):
+                return self._leave(shared, cancel_token.reason)
+
+    def send_message(self, message: str, **kwargs) -> ChatGPTResponse:
+        """
+        Send a message through the target, sharing the generation with identical messages in flight.
+        Calls with an `on_progress` callback are never coalesced, as it is called by a single generation.
+
+        Args:
+        ----------
+            message (str): Message to send.
+            **kwargs: Passed to the target's `send_message`, and part of what makes messages identical.
+
+        Returns:
+        ----------
+            ChatGPTResponse: Response from ChatGPT.
+        """
+        if kwargs.get("on_progress") is not None:
+            return self.target.send_message(message, **kwargs)
+        key = ("send_message", message, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return self.target.send_message(message, **kwargs)
+        return self.call(key, self.target.send_message, message, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of generations run, generations saved by coalescing, and requests in flight.
+        """
+        with self._lock:
+            return {
+                "generations": self.generations,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+            }
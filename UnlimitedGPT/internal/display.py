@@ -0,0 +1,213 @@
+import subprocess
+from logging import getLogger
+from os import environ, path as os_path
+from threading import Event, Lock, Thread
+from time import sleep, time
+from typing import Optional, Tuple
+
+
+class PinnedXvfb:
+    """
+    Xvfb started on a given display number, used to restart a display that died where the browsers
+    using it expect it, since PyVirtualDisplay always picks a free number of its own.
+
+    Args:
+    ----------
+        number (int): The display number.
+        size (Tuple[int, int]): The size of the display.
+    """
+
+    def __init__(self, number: int, size: Tuple[int, int]) -> None:
+        self.display = number
+        self.size = size
+        self._process: Optional[subprocess.Popen] = None
+        self._old_display: Optional[str] = None
+
+    def start(self, timeout: float = 10) -> None:
+        """
+        Start Xvfb and wait for its socket, pointing the `DISPLAY` environment variable at it until stopped.
+
+        Raises:
+        ----------
+            FileNotFoundError: If Xvfb is not installed.
+            RuntimeError: If Xvfb exited or did not open the display in time.
+        """
+        self._process = subprocess.Popen(
+            ["Xvfb", f":{self.display}", "-screen", "0", f"{self.size[0]}x{self.size[1]}x24", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        end_time = time() + timeout
+        while not self._socket_exists():
+            if not self.is_alive() or time() >= end_time:
+                self.stop()
+                raise RuntimeError(f"Xvfb could not open display :{self.display}")
+            sleep(0.1)
+        self._old_display = environ.get("DISPLAY")
+        environ["DISPLAY"] = f":{self.display}"
+
+    def _socket_exists(self) -> bool:
+        return os_path.exists(f"/tmp/.X11-unix/X{self.display}")
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def stop(self) -> None:
+        """
+        Stop Xvfb, and point the `DISPLAY` environment variable back where it was before starting it.
+        """
+        if self._process is None:
+            return
+        self._process.terminate()
+        try:
+            self._process.wait(5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+        if environ.get("DISPLAY") == f":{self.display}":
+            if self._old_display is None:
+                del environ["DISPLAY"]
+            else:
+                environ["DISPLAY"] = self._old_display
+
+
+class SharedDisplay:
+    """
+    A process-wide virtual display, started by the first ChatGPT instance that needs one, shared by
+    every other instance, and stopped once the last of them is closed. Xvfb is restarted if it dies.
+
+    Args:
+    ----------
+        size (Tuple[int, int], optional): The size of the display. Defaults to (1024, 768).
+        check_interval (float, optional): Time between checks that Xvfb is still running, in seconds. Defaults to 10.
+    """
+
+    def __init__(self, size: Tuple[int, int] = (1024, 768), check_interval: float = 10) -> None:
+        self.size = size
+        self.check_interval = check_interval
+        self.restarts = 0
+        self.logger = getLogger("pyChatGPT")
+        self._lock = Lock()
+        self._display = None
+        self._number: Optional[int] = None
+        self._users = 0
+        self._stopped = Event()
+
+    def __repr__(self):
+        return f"<SharedDisplay size={self.size} users={self._users} running={self.is_running} restarts={self.restarts}>"
+
+    @property
+    def users(self) -> int:
+        """
+        The number of instances using the display.
+        """
+        return self._users
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Whether the display has been started and Xvfb is still running.
+        """
+        return self._display is not None and self._display.is_alive()
+
+    def _start(self) -> None:
+        """
+        Starts Xvfb, which also points the `DISPLAY` environment variable at it. A restart keeps
+        the display number, so the browsers already started keep a valid `DISPLAY`.
+
+        Raises:
+        ----------
+            ValueError: If PyVirtualDisplay or Xvfb is not installed.
+        """
+        try:
+            if self._number is not None:
+                display = PinnedXvfb(self._number, self.size)
+            else:
+                from pyvirtualdisplay.display import Display
+
+                display = Display(size=self.size)
+            display.start()
+        except ModuleNotFoundError:
+            raise ValueError(
+                "Please install PyVirtualDisplay to start a virtual display by running `pip install PyVirtualDisplay`"
+            )
+        except FileNotFoundError as e:
+            if "No such file or directory: 'Xvfb'" in str(e):
+                raise ValueError(
+                    "Please install Xvfb to start a virtual display by running `sudo apt install xvfb`"
+                )
+            raise e
+        self._display = display
+        self._number = display.display
+
+    def _stop(self) -> None:
+        if self._display is None:
+            return
+        try:
+            self._display.stop()
+        except Exception as e:
+            self.logger.debug(f"Could not stop virtual display: {e}")
+        self._display = None
+
+    def _ensure_running(self) -> None:
+        if self._display is not None and not self._display.is_alive():
+            self.logger.debug("Virtual display died, restarting it...")
+            self._stop()
+            self.restarts += 1
+        if self._display is None:
+            self._start()
+
+    def acquire(self) -> bool:
+        """
+        Start using the display, starting it (or restarting it) if needed, unless a display
+        other than this one is already set through the `DISPLAY` environment variable.
+
+        Returns:
+        ----------
+            bool: Whether the display is used, in which case `release` must be called once done with it.
+
+        Raises:
+        ----------
+            ValueError: If PyVirtualDisplay or Xvfb is not installed.
+        """
+        with self._lock:
+            if self._users == 0:
+                if "DISPLAY" in environ:
+                    return False
+                self.logger.debug("Starting virtual display...")
+            self._ensure_running()
+            self._users += 1
+            if self._users == 1:
+                self._stopped = Event()
+                Thread(target=self._watch, args=(self._stopped,), daemon=True).start()
+            return True
+
+    def release(self) -> None:
+        """
+        Stop using the display, stopping it if no other instance uses it.
+        """
+        with self._lock:
+            if self._users == 0:
+                return
+            self._users -= 1
+            if self._users == 0:
+                self.logger.debug("Closing virtual display...")
+                self._stopped.set()
+                self._stop()
+                self._number = None
+
+    def _watch(self, stopped: Event) -> None:
+        """
+        Restarts Xvfb if it dies while the display is in use, meant to run in the background.
+        """
+        while not stopped.wait(self.check_interval):
+            with self._lock:
+                if self._users == 0:
+                    return
+                try:
+                    self._ensure_running()
+                except Exception as e:
+                    self.logger.debug(f"Could not restart virtual display: {e}")
+
+
+shared_display = SharedDisplay()
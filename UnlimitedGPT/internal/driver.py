@@ -1,7 +1,9 @@
+from typing import Optional
+
 import undetected_chromedriver as uc
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+from selenium.webdriver.remote.webelement import WebElement
+
+from UnlimitedGPT.internal.locator import SelectorEngine
 
 class ChatGPTDriver(uc.Chrome):
     """
@@ -10,10 +12,24 @@ class ChatGPTDriver(uc.Chrome):
     """
 
     def __init__(self, options: uc.ChromeOptions, headless: bool = False):
-        caps = DesiredCapabilities.CHROME
-        caps['goog:loggingPrefs'] = {'performance': 'ALL'}
-        
-        super().__init__(options=options, headless=headless, desired_capabilities=caps)
+        super().__init__(options=options, headless=headless)
+        self.selector_engine = SelectorEngine(self)
+
+    def find(self, mark, timeout: float = 10, clickable: bool = False) -> Optional[WebElement]:
+        """
+        Finds an element through its selector's fallback strategies.
+
+        Args:
+        ----------
+            mark: (By, str): The element to find.
+            timeout: (float): The amount of time to wait for the element.
+            clickable: (bool): Whether the element must be visible and enabled.
+
+        Returns:
+        ----------
+            Optional[WebElement]: The element, or None if it could not be found.
+        """
+        return self.selector_engine.find(mark, timeout=timeout, clickable=clickable)
 
     def safe_click(self, mark, timeout: int = 10) -> bool:
         """
@@ -28,12 +44,15 @@ class ChatGPTDriver(uc.Chrome):
         ----------
             bool: Whether or not the element was clicked.
         """
-        wait = WebDriverWait(self, timeout)
-        try:
-            wait.until(EC.visibility_of_element_located(mark))
-            element = wait.until(EC.element_to_be_clickable(mark))
-            element.click()
-        except:
-            return False
-        else:
-            return True
+        for _ in range(2):
+            element = self.find(mark, timeout=timeout, clickable=True)
+            if element is None:
+                return False
+            try:
+                element.click()
+            except:
+                # The cached handle may have been replaced, look it up again
+                self.selector_engine.forget(mark)
+            else:
+                return True
+        return False
@@ -4,3 +4,27 @@ class UnlimitedGPTException(BaseException):
 
 class InvalidConversationID(UnlimitedGPTException):
     pass
+
+
+class RateLimitExceeded(UnlimitedGPTException):
+    pass
+
+
+class CircuitOpen(UnlimitedGPTException):
+    pass
+
+
+class WorkerCrashed(UnlimitedGPTException):
+    pass
+
+
+class DeadlineExceeded(UnlimitedGPTException):
+    pass
+
+
+class ExportIncomplete(UnlimitedGPTException):
+    pass
+
+
+class InvalidSnapshot(UnlimitedGPTException):
+    pass
@@ -0,0 +1,240 @@
+from collections import deque
+from threading import Lock
+from time import time
+from typing import Dict, Hashable, Optional, Tuple
+
+
+class LatencySamples:
+    """Class holding the recent latencies of the responses to similar prompts."""
+
+    def __init__(self, history: int = 200):
+        """
+        Initialize a LatencySamples object.
+
+        Args:
+        ----------
+            history (int, optional): The number of recent responses kept. Defaults to 200.
+        """
+        self.first_progress = deque(maxlen=history)
+        self.gaps = deque(maxlen=history)
+        self.totals = deque(maxlen=history)
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    @staticmethod
+    def percentile(samples: deque, fraction: float) -> float:
+        """
+        A percentile of some samples, in seconds, e.g. `percentile(samples.totals, 0.99)`.
+        """
+        if not samples:
+            return 0.0
+        samples = sorted(samples)
+        return samples[min(int(fraction * len(samples)), len(samples) - 1)]
+
+    def __repr__(self):
+        return f"<LatencySamples responses={len(self)} p99_first_progress={self.percentile(self.first_progress, 0.99):.3f} p99_gap={self.percentile(self.gaps, 0.99):.3f} p99_total={self.percentile(self.totals, 0.99):.3f}>"
+
+
+class LatencyModel:
+    """
+    Learns how long responses take for each account and prompt size, so a stalled generation can
+    be told apart from a slow one long before the timeout.
+
+    Two windows are derived from the p99 of the recent responses, times `headroom`: the time
+    allowed before the first text arrives, and the time allowed between two pieces of text.
+    Total durations are only recorded, not enforced: how long a response takes depends on its
+    length, which the prompt does not predict, so a response still receiving text is only ever
+    cut by the timeout given to `send_message`, the hard cap of both windows.
+    It can be shared between instances, e.g. a pool of workers. A `ProcessChatGPT` gets a copy of it.
+
+    Args:
+    ----------
+        history (int, optional): The number of recent responses kept per account and prompt size. Defaults to 200.
+        min_samples (int, optional): The responses needed before the learned windows replace the defaults. Defaults to 20.
+        headroom (float, optional): What the p99 latencies are multiplied by. Defaults to 3.
+        min_window (float, optional): The shortest window, in seconds. Defaults to 10.
+        first_progress (float, optional): The time allowed before the first text arrives until enough responses are seen, in seconds. Defaults to 60.
+        stall (float, optional): The time allowed without new text until enough responses are seen, in seconds. Defaults to 60.
+    """
+
+    def __init__(
+        self,
+        history: int = 200,
+        min_samples: int = 20,
+        headroom: float = 3,
+        min_window: float = 10,
+        first_progress: float = 60,
+        stall: float = 60,
+    ) -> None:
+        self.history = history
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.min_window = min_window
+        self.first_progress = first_progress
+        self.stall = stall
+        self._lock = Lock()
+        self._samples: Dict[Tuple[Hashable, Optional[int]], LatencySamples] = {}
+
+    def __getstate__(self) -> dict:
+        # Sent to a worker process, without the lock
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f"<LatencyModel responses={sum(len(samples) for (_, size), samples in self._samples.items() if size is None)} headroom={self.headroom}>"
+
+    @staticmethod
+    def _size_class(prompt_length: int) -> int:
+        """
+        Groups prompt lengths by powers of 4, so the prompts of a class take comparable time to read.
+        """
+        return max(prompt_length, 0).bit_length() // 2
+
+    def record(self, account: Hashable, prompt_length: int, first_progress: float, max_gap: float, total: float) -> None:
+        """
+        Record the latencies of a finished response.
+
+        Args:
+        ----------
+            account (Hashable): The account that responded.
+            prompt_length (int): The length of the prompt, in characters.
+            first_progress (float): The time until the first text arrived, in seconds.
+            max_gap (float): The longest time between two pieces of text, in seconds.
+            total (float): The time until the response finished, in seconds.
+        """
+        with self._lock:
+            # Every response also counts towards the account as a whole, used for unseen prompt sizes
+            for key in ((account, self._size_class(prompt_length)), (account, None)):
+                samples = self._samples.get(key)
+                if samples is None:
+                    samples = self._samples[key] = LatencySamples(self.history)
+                samples.first_progress.append(first_progress)
+                samples.gaps.append(max_gap)
+                samples.totals.append(total)
+
+    def windows(self, account: Hashable, prompt_length: int, timeout: float) -> Tuple[float, float, float]:
+        """
+        Get the windows of a response.
+
+        Args:
+        ----------
+            account (Hashable): The account responding.
+            prompt_length (int): The length of the prompt, in characters.
+            timeout (float): The hard cap, in seconds.
+
+        Returns:
+        ----------
+            Tuple[float, float, float]: The time allowed before the first text, between two pieces of text, and for the whole response (always the timeout).
+        """
+        with self._lock:
+            samples = self._samples.get((account, self._size_class(prompt_length)))
+            if samples is None or len(samples) < self.min_samples:
+                samples = self._samples.get((account, None))
+            if samples is None or len(samples) < self.min_samples:
+                return min(self.first_progress, timeout), min(self.stall, timeout), timeout
+
+            def window(latencies: deque) -> float:
+                return min(max(LatencySamples.percentile(latencies, 0.99) * self.headroom, self.min_window), timeout)
+
+            return window(samples.first_progress), window(samples.gaps), timeout
+
+    def watch(self, account: Hashable, prompt_length: int, timeout: float) -> "GenerationWatchdog":
+        """
+        Start watching a response against its windows.
+
+        Args:
+        ----------
+            account (Hashable): The account responding.
+            prompt_length (int): The length of the prompt, in characters.
+            timeout (float): The hard cap, in seconds.
+
+        Returns:
+        ----------
+            GenerationWatchdog: The watchdog, fed with the progress of the response.
+        """
+        return GenerationWatchdog(self, account, prompt_length, timeout)
+
+
+class GenerationWatchdog:
+    """
+    Tracks whether new text is still arriving for a response.
+
+    Args:
+    ----------
+        model (LatencyModel): The model giving the windows, and learning from the response once finished.
+        account (Hashable): The account responding.
+        prompt_length (int): The length of the prompt, in characters.
+        timeout (float): The hard cap, in seconds.
+    """
+
+    def __init__(self, model: LatencyModel, account: Hashable, prompt_length: int, timeout: float) -> None:
+        self.model = model
+        self.account = account
+        self.prompt_length = prompt_length
+        self.first_window, self.stall_window, self.deadline = model.windows(account, prompt_length, timeout)
+        self.started = time()
+        self.first_progress: Optional[float] = None
+        self.last_progress: Optional[float] = None
+        self.max_gap = 0.0
+        self.progress = 0
+        self.expired: Optional[str] = None
+
+    def __repr__(self):
+        return f"<GenerationWatchdog progress={self.progress} first_window={self.first_window:.1f} stall_window={self.stall_window:.1f} deadline={self.deadline:.1f} expired={self.expired}>"
+
+    def update(self, progress: int) -> bool:
+        """
+        Report the progress of the response, e.g. the length of its text so far.
+
+        Returns:
+        ----------
+            bool: Whether it grew since the last update.
+        """
+        if progress <= self.progress:
+            return False
+        now = time()
+        if self.last_progress is None:
+            self.first_progress = now
+        else:
+            self.max_gap = max(self.max_gap, now - self.last_progress)
+        self.last_progress = now
+        self.progress = progress
+        return True
+
+    def check(self) -> bool:
+        """
+        Check whether the response ran out of time, setting `expired` to why.
+
+        Returns:
+        ----------
+            bool: Whether it ran out of time.
+        """
+        now = time()
+        if now - self.started > self.deadline:
+            self.expired = "deadline"
+        elif self.last_progress is None and now - self.started > self.first_window:
+            self.expired = "no progress"
+        elif self.last_progress is not None and now - self.last_progress > self.stall_window:
+            self.expired = "stalled"
+        return self.expired is not None
+
+    def finish(self) -> None:
+        """
+        Let the model learn from the response, once it finished.
+        """
+        if self.first_progress is None:
+            return
+        now = time()
+        self.model.record(
+            self.account,
+            self.prompt_length,
+            self.first_progress - self.started,
+            max(self.max_gap, now - self.last_progress),
+            now - self.started,
+        )
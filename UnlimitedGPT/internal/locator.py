@@ -0,0 +1,213 @@
+from time import sleep, time
+from typing import Dict, List, Optional, Tuple
+
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+from selenium.webdriver.remote.webelement import WebElement
+
+from UnlimitedGPT.internal.selectors import ChatGPTVariables as CGPTV
+
+Mark = Tuple[str, str]
+
+
+class SelectorStats:
+    """Class holding the lookup statistics of a single selector."""
+
+    def __init__(self, name: str):
+        """
+        Initialize a SelectorStats object.
+
+        Args:
+        ----------
+            name (str): The name of the selector in `ChatGPTVariables`.
+        """
+        self.name = name
+        self.lookups = 0
+        self.misses = 0
+        self.cache_hits = 0
+        self.total_time = 0.0
+        self.miss_streak = 0
+        self.miss_timeout: Optional[float] = None
+        self.last_miss = 0.0
+        self.fast_fails = 0
+        self.strategy: Optional[Mark] = None
+
+    @property
+    def miss_rate(self) -> float:
+        return self.misses / self.lookups if self.lookups else 0.0
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_time / self.lookups if self.lookups else 0.0
+
+    def __repr__(self):
+        return f"<SelectorStats name={self.name} lookups={self.lookups} misses={self.misses} cache_hits={self.cache_hits} average_latency={self.average_latency:.3f} strategy={self.strategy}>"
+
+
+class SelectorEngine:
+    """
+    Locates elements through their prioritized fallback strategies, remembering the one that worked
+    and caching the element handles until they go stale.
+
+    Args:
+    ----------
+        driver: The driver to locate the elements with.
+        fast_fail_after (int, optional): Consecutive misses after which lookups of a selector give up early. Defaults to 2.
+        fast_fail_timeout (float, optional): The timeout used once a selector is failing fast, for lookups not waiting longer than the misses did. Defaults to 1.
+        fast_fail_window (float, optional): Time after the last miss when a selector stops failing fast, in seconds. Defaults to 60.
+        probe_every (int, optional): Every this many fast fails, a lookup is let through with its full timeout, in case the element came back. Defaults to 5.
+        poll_frequency (float, optional): Time to wait between lookup attempts. Defaults to 0.1.
+    """
+
+    def __init__(
+        self,
+        driver,
+        fast_fail_after: int = 2,
+        fast_fail_timeout: float = 1,
+        fast_fail_window: float = 60,
+        probe_every: int = 5,
+        poll_frequency: float = 0.1,
+    ) -> None:
+        self.driver = driver
+        self.fast_fail_after = fast_fail_after
+        self.fast_fail_timeout = fast_fail_timeout
+        self.fast_fail_window = fast_fail_window
+        self.probe_every = probe_every
+        self.poll_frequency = poll_frequency
+        self._names: Dict[Mark, str] = {
+            value: name
+            for name, value in vars(CGPTV).items()
+            if isinstance(value, tuple) and len(value) == 2 and not name.startswith("_")
+        }
+        self._preferred: Dict[str, int] = {}
+        self._cache: Dict[str, WebElement] = {}
+        self._stats: Dict[str, SelectorStats] = {}
+
+    def _name(self, mark: Mark) -> str:
+        return self._names.get(mark, f"{mark[0]}={mark[1]}")
+
+    def strategies(self, mark: Mark) -> List[Mark]:
+        """
+        Get the strategies of a selector, the one that last worked first.
+
+        Args:
+        ----------
+            mark (Tuple[str, str]): The selector, e.g. `CGPTV.menu_button`.
+
+        Returns:
+        ----------
+            List[Tuple[str, str]]: The strategies to try, in order.
+        """
+        strategies = CGPTV.fallbacks.get(self._name(mark), [mark])
+        preferred = self._preferred.get(self._name(mark), 0)
+        return [strategies[preferred]] + strategies[:preferred] + strategies[preferred + 1:]
+
+    @staticmethod
+    def _usable(element: WebElement, clickable: bool) -> bool:
+        """
+        Whether an element is still attached to the page (and clickable, if required).
+        """
+        try:
+            enabled = element.is_enabled()
+            return (element.is_displayed() and enabled) if clickable else True
+        except (StaleElementReferenceException, WebDriverException):  # type: ignore
+            return False
+
+    def find(self, mark: Mark, timeout: float = 10, clickable: bool = False, cache: bool = True) -> Optional[WebElement]:
+        """
+        Find an element, trying every strategy of its selector on each poll.
+
+        Args:
+        ----------
+            mark (Tuple[str, str]): The selector, e.g. `CGPTV.menu_button`.
+            timeout (float, optional): Time to wait for the element. Defaults to 10.
+            clickable (bool, optional): Whether the element must be visible and enabled. Defaults to False.
+            cache (bool, optional): Whether a cached handle may be returned. Defaults to True.
+
+        Returns:
+        ----------
+            Optional[WebElement]: The element, or None if it could not be found.
+        """
+        name = self._name(mark)
+        stats = self._stats.setdefault(name, SelectorStats(name))
+        start_time = time()
+        stats.lookups += 1
+
+        cached = self._cache.get(name)
+        if cache and cached is not None:
+            if self._usable(cached, clickable):
+                stats.cache_hits += 1
+                stats.total_time += time() - start_time
+                return cached
+            del self._cache[name]
+
+        # An element that has not been looked up in a while may well be back (a page reloaded, a dialog closed)
+        if stats.miss_streak and start_time - stats.last_miss >= self.fast_fail_window:
+            stats.miss_streak = 0
+            stats.miss_timeout = None
+            stats.fast_fails = 0
+
+        # Only give up early if the misses already waited as long as this caller would,
+        # so a short probe never cuts a later lookup that is willing to wait,
+        # and let a full lookup through now and then so the streak can end
+        requested_timeout = timeout
+        failing_fast = False
+        if stats.miss_streak >= self.fast_fail_after and timeout <= stats.miss_timeout:
+            stats.fast_fails += 1
+            if stats.fast_fails % (self.probe_every + 1):
+                timeout = min(timeout, self.fast_fail_timeout)
+                failing_fast = True
+
+        strategies = CGPTV.fallbacks.get(name, [mark])
+        end_time = start_time + timeout
+        while True:
+            for strategy in self.strategies(mark):
+                try:
+                    elements = self.driver.find_elements(*strategy)
+                except WebDriverException:  # type: ignore
+                    continue
+                element = next((element for element in elements if self._usable(element, clickable)), None)
+                if element is not None:
+                    self._preferred[name] = strategies.index(strategy)
+                    self._cache[name] = element
+                    stats.strategy = strategy
+                    stats.miss_streak = 0
+                    stats.miss_timeout = None
+                    stats.fast_fails = 0
+                    stats.total_time += time() - start_time
+                    return element
+
+            if time() >= end_time:
+                break
+            sleep(self.poll_frequency)
+
+        stats.misses += 1
+        stats.last_miss = time()
+        # Fast fails only repeat what the streak already says, so they do not extend it
+        if not failing_fast:
+            stats.miss_streak += 1
+            stats.miss_timeout = requested_timeout if stats.miss_timeout is None else min(stats.miss_timeout, requested_timeout)
+        stats.total_time += time() - start_time
+        return None
+
+    def forget(self, mark: Optional[Mark] = None) -> None:
+        """
+        Drop cached element handles.
+
+        Args:
+        ----------
+            mark (Optional[Tuple[str, str]], optional): The selector to forget. Defaults to None (all of them).
+        """
+        if mark is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(self._name(mark), None)
+
+    def stats(self) -> Dict[str, SelectorStats]:
+        """
+        Get the lookup statistics of every selector used so far.
+
+        Returns:
+        ----------
+            Dict[str, SelectorStats]: The statistics, by selector name.
+        """
+        return dict(self._stats)
@@ -0,0 +1,157 @@
+from logging import Logger
+from typing import Literal, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.keys import Keys
+
+from UnlimitedGPT.internal.driver import ChatGPTDriver
+from UnlimitedGPT.internal.selectors import ChatGPTVariables as CGPTV
+
+
+class SettingsNavigator:
+    """
+    Keeps track of where the UI is within the menu and the settings dialog, so several
+    settings can be changed in one opening of the dialog.
+
+    Args:
+    ----------
+        driver (ChatGPTDriver): The driver to navigate with.
+        logger (Logger): The logger to log to.
+    """
+
+    CLOSED = "CLOSED"
+    MENU = "MENU"
+    SETTINGS = "SETTINGS"
+
+    def __init__(self, driver: ChatGPTDriver, logger: Logger) -> None:
+        self.driver = driver
+        self.logger = logger
+        self.state = self.CLOSED
+        self.tab: Optional[str] = None
+
+    def __enter__(self) -> "SettingsNavigator":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __repr__(self):
+        return f"<SettingsNavigator state={self.state} tab={self.tab}>"
+
+    def is_open(self) -> bool:
+        """
+        Checks, in a single round trip, whether a menu or a dialog is open on the page.
+
+        Returns:
+        ----------
+            bool: Whether a menu or a dialog is open.
+        """
+        try:
+            return self.driver.execute_script(
+                "return document.querySelector(arguments[0]) !== null;",
+                f"{CGPTV.menu_popup[1]}, {CGPTV.settings_dialog[1]}",
+            )
+        except WebDriverException:  # type: ignore
+            return False
+
+    def _sync_state(self) -> None:
+        """
+        Forgets the tracked state if the page closed the menu on its own, e.g. after a navigation.
+        """
+        if self.state != self.CLOSED and not self.is_open():
+            self.state = self.CLOSED
+            self.tab = None
+
+    def open_menu(self) -> bool:
+        """
+        Opens the account menu.
+
+        Returns:
+        ----------
+            bool: Whether the menu is open.
+        """
+        self._sync_state()
+        if self.state == self.MENU:
+            return True
+        if self.state == self.SETTINGS and not self.close():
+            return False
+
+        if not self.driver.safe_click(CGPTV.menu_button):
+            self.logger.debug("Could not click menu button")
+            return False
+        self.logger.debug("Clicked menu button")
+        self.state = self.MENU
+        return True
+
+    def open_settings(self) -> bool:
+        """
+        Opens the settings dialog, unless it is open already.
+
+        Returns:
+        ----------
+            bool: Whether the settings dialog is open.
+        """
+        self._sync_state()
+        if self.state == self.SETTINGS:
+            return True
+        if not self.open_menu():
+            return False
+
+        if not self.driver.safe_click(CGPTV.menu_settings):
+            self.logger.debug("Could not click settings button")
+            return False
+        self.logger.debug("Clicked settings button")
+        self.state = self.SETTINGS
+        self.tab = "General"
+        return True
+
+    def open_tab(self, tab: Literal["General", "DataControls"]) -> bool:
+        """
+        Opens a tab of the settings dialog, unless it is the current one.
+
+        Args:
+        ----------
+            tab (Literal['General', 'DataControls']): The tab to open.
+
+        Returns:
+        ----------
+            bool: Whether the tab is open.
+        """
+        if not self.open_settings():
+            return False
+        if self.tab == tab:
+            return True
+
+        mark = CGPTV.data_controls if tab == "DataControls" else CGPTV.general
+        if not self.driver.safe_click(mark, timeout=60):
+            self.logger.debug(f"Could not click {tab} tab")
+            return False
+        self.logger.debug(f"Clicked {tab} tab")
+        self.tab = tab
+        return True
+
+    def close(self, attempts: int = 3) -> bool:
+        """
+        Closes any open menu or dialog, checking that it actually closed.
+
+        Args:
+        ----------
+            attempts (int, optional): The maximum number of escape presses. Defaults to 3.
+
+        Returns:
+        ----------
+            bool: Whether everything is closed.
+        """
+        for _ in range(attempts):
+            if not self.is_open():
+                break
+            ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+        else:
+            if self.is_open():
+                self.logger.debug("Could not close the menu")
+                return False
+
+        self.state = self.CLOSED
+        self.tab = None
+        return True
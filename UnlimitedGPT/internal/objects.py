@@ -1,5 +1,66 @@
 from datetime import datetime
-from typing import Any, List, Optional
+from importlib import import_module
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def _import_optional(module: str, package: str) -> Any:
+    """
+    Imports an optional dependency, explaining how to install it if it is missing.
+    """
+    try:
+        return import_module(module)
+    except ModuleNotFoundError:
+        raise ValueError(f"Please install {package} to use this function by running `pip install {package}`")
+
+
+def _columns_to_numpy(columns: Dict[str, list], time_columns: Sequence[str]) -> Dict[str, Any]:
+    """
+    Converts columns of raw backend API values to NumPy arrays: times as `datetime64[us]` (NaT when missing),
+    everything else as string arrays.
+    """
+    np = _import_optional("numpy", "numpy")
+    arrays = {}
+    for name, values in columns.items():
+        if name not in time_columns:
+            arrays[name] = np.array(["" if value is None else value for value in values], dtype=np.str_)
+            continue
+        sample = next((value for value in values if value is not None), None)
+        if isinstance(sample, (int, float)):
+            # Epoch seconds
+            seconds = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            missing = np.isnan(seconds)
+            microseconds = np.round(np.where(missing, 0, seconds) * 1e6).astype(np.int64)
+            arrays[name] = microseconds.astype("datetime64[us]")
+            arrays[name][missing] = np.datetime64("NaT")
+        else:
+            # ISO strings in UTC, whose offset NumPy no longer parses
+            arrays[name] = np.array(
+                ["NaT" if value is None else value.replace("+00:00", "").rstrip("Z") for value in values],
+                dtype="datetime64[us]",
+            )
+    return arrays
+
+
+def _columns_to_arrow(columns: Dict[str, list], time_columns: Sequence[str]) -> Any:
+    """
+    Converts columns of raw backend API values to a PyArrow table, times as UTC timestamps.
+    """
+    pa = _import_optional("pyarrow", "pyarrow")
+    pc = _import_optional("pyarrow.compute", "pyarrow")
+    timestamp = pa.timestamp("us", tz="UTC")
+    arrays = {}
+    for name, values in columns.items():
+        if name not in time_columns:
+            arrays[name] = pa.array(values, pa.string())
+            continue
+        sample = next((value for value in values if value is not None), None)
+        if isinstance(sample, (int, float)):
+            # Epoch seconds
+            microseconds = pc.round(pc.multiply(pa.array(values, pa.float64()), 1e6))
+            arrays[name] = microseconds.cast(pa.int64()).cast(timestamp)
+        else:
+            arrays[name] = pa.array(values, pa.string()).cast(timestamp)
+    return pa.table(arrays)
 
 
 class ChatGPTResponse:
@@ -12,6 +73,11 @@ class ChatGPTResponse:
         response: str,
         failed: bool = False,
         conversation_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        parent_message_id: Optional[str] = None,
+        cancelled: bool = False,
+        segment_timings: Optional[List[float]] = None,
+        parts_sent: Optional[int] = None,
     ):
         """
         Initialize a ChatGPTResponse object.
@@ -21,16 +87,26 @@ class ChatGPTResponse:
             response (str): The response from ChatGPT.
             failed (bool): Whether it failed to get the response from ChatGPT or not.
             conversation_id (Optional[str]): The conversation ID.
+            message_id (Optional[str]): The ID of the response message, known when the event stream is captured.
+            parent_message_id (Optional[str]): The ID of the message it responds to, known when the event stream is captured.
+            cancelled (bool): Whether it was cancelled, in which case it only holds what was generated until then.
+            segment_timings (Optional[List[float]]): How long each generated segment took, in seconds, more than one when a truncated response was continued.
+            parts_sent (Optional[int]): For a message split into parts, the number of parts that were answered, to resume from with `first_part` if it failed.
         """
         self.response = response
         self.failed = failed
         self.conversation_id = conversation_id
+        self.message_id = message_id
+        self.parent_message_id = parent_message_id
+        self.cancelled = cancelled
+        self.segment_timings = segment_timings or []
+        self.parts_sent = parts_sent
 
     def __str__(self):
         return self.response
 
     def __repr__(self):
-        return f'<ChatGPTResponse response="{self.response}" conversation_id="{self.conversation_id}">'
+        return f'<ChatGPTResponse response="{self.response}" conversation_id="{self.conversation_id}" message_id="{self.message_id}"{" cancelled=True" if self.cancelled else ""}>'
 
 
 class User:
@@ -115,7 +191,13 @@ class SessionData:
 class Conversation:
     """Class representing a conversation."""
 
-    def __init__(self, name: str, conversation_id: str, create_time: str):
+    def __init__(
+        self,
+        name: str,
+        conversation_id: str,
+        create_time: str,
+        update_time: Optional[str] = None,
+    ):
         """
         Initialize a Conversation object.
 
@@ -124,16 +206,18 @@ class Conversation:
             name (str): The name of the conversation.
             conversation_id (str): The ID of the conversation.
             create_time (str): The time the conversation was created.
+            update_time (Optional[str]): The time the conversation was last updated, if known.
         """
         self.name = name
         self.conversation_id = conversation_id
         self.create_time = create_time
+        self.update_time = update_time
     
     def __str__(self):
-        return f"Conversation(name='{self.name}', conversation_id='{self.conversation_id}', create_time={self.create_time})"
+        return f"Conversation(name='{self.name}', conversation_id='{self.conversation_id}', create_time={self.create_time}, update_time={self.update_time})"
 
     def __repr__(self):
-        return f"Conversation(name='{self.name}', conversation_id='{self.conversation_id}', create_time={self.create_time})"
+        return f"Conversation(name='{self.name}', conversation_id='{self.conversation_id}', create_time={self.create_time}, update_time={self.update_time})"
 
 class Conversations:
     """Class representing a list of conversations."""
@@ -157,11 +241,66 @@ class Conversations:
             offset (int): The offset of conversations.
             total (int): The total number of conversations.
         """
-        self.conversations = [Conversation(**conversation) for conversation in conversations]
+        # The items are only turned into objects when accessed, the columnar exports read them directly
+        self._items = conversations
+        self._conversations: Optional[List[Conversation]] = None
         self.has_missing_conversations = has_missing_conversations
         self.limit = limit
         self.offset = offset
         self.total = total
+
+    @property
+    def conversations(self) -> List[Conversation]:
+        if self._conversations is None:
+            # The backend API names the fields `id` and `title`, so both shapes are accepted
+            self._conversations = [
+                Conversation(
+                    conversation.get("title", conversation.get("name")),
+                    conversation.get("id", conversation.get("conversation_id")),
+                    conversation.get("create_time"),
+                    conversation.get("update_time"),
+                )
+                for conversation in self._items
+            ]
+        return self._conversations
+
+    def to_columns(self) -> Dict[str, list]:
+        """
+        Get the conversations as columns of raw values, without creating an object per conversation.
+
+        Returns:
+        ----------
+            Dict[str, list]: The `id`, `title`, `create_time` and `update_time` columns.
+        """
+        items = self._items
+        # The shape is told from the first item rather than looked up twice on every item
+        id_key, title_key = ("id", "title") if not items or "id" in items[0] else ("conversation_id", "name")
+        return {
+            "id": [item.get(id_key) for item in items],
+            "title": [item.get(title_key) for item in items],
+            "create_time": [item.get("create_time") for item in items],
+            "update_time": [item.get("update_time") for item in items],
+        }
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Get the conversations as NumPy arrays, times as `datetime64[us]`. Requires `numpy`.
+
+        Returns:
+        ----------
+            Dict[str, numpy.ndarray]: The `id`, `title`, `create_time` and `update_time` arrays.
+        """
+        return _columns_to_numpy(self.to_columns(), ("create_time", "update_time"))
+
+    def to_arrow(self) -> Any:
+        """
+        Get the conversations as a PyArrow table, times as UTC timestamps. Requires `pyarrow`.
+
+        Returns:
+        ----------
+            pyarrow.Table: The `id`, `title`, `create_time` and `update_time` columns.
+        """
+        return _columns_to_arrow(self.to_columns(), ("create_time", "update_time"))
     
     def __str__(self):
         return f"<Conversations conversations={self.conversations} has_missing_conversations={self.has_missing_conversations} limit={self.limit} offset={self.offset} total={self.total}>"
@@ -358,14 +497,103 @@ class SharedConversations:
             offset (int)
             has_missing_conversations (bool)
         """
-        self.conversations = [SharedConversation(**conversation) for conversation in conversations]
+        # The items are only turned into objects when accessed, the columnar exports read them directly
+        self._items = conversations
+        self._conversations: Optional[List[SharedConversation]] = None
         self.total = total
         self.limit = limit
         self.offset = offset
         self.has_missing_conversations = has_missing_conversations
+
+    @property
+    def conversations(self) -> List[SharedConversation]:
+        if self._conversations is None:
+            self._conversations = [SharedConversation(**conversation) for conversation in self._items]
+        return self._conversations
+
+    def to_columns(self) -> Dict[str, list]:
+        """
+        Get the shared conversations as columns of raw values, without creating an object per conversation.
+
+        Returns:
+        ----------
+            Dict[str, list]: The `id`, `title`, `conversation_id`, `create_time` and `update_time` columns.
+        """
+        items = self._items
+        return {
+            "id": [item.get("id") for item in items],
+            "title": [item.get("title") for item in items],
+            "conversation_id": [item.get("conversation_id") for item in items],
+            "create_time": [item.get("create_time") for item in items],
+            "update_time": [item.get("update_time") for item in items],
+        }
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Get the shared conversations as NumPy arrays, times as `datetime64[us]`. Requires `numpy`.
+
+        Returns:
+        ----------
+            Dict[str, numpy.ndarray]: The `id`, `title`, `conversation_id`, `create_time` and `update_time` arrays.
+        """
+        return _columns_to_numpy(self.to_columns(), ("create_time", "update_time"))
+
+    def to_arrow(self) -> Any:
+        """
+        Get the shared conversations as a PyArrow table, times as UTC timestamps. Requires `pyarrow`.
+
+        Returns:
+        ----------
+            pyarrow.Table: The `id`, `title`, `conversation_id`, `create_time` and `update_time` columns.
+        """
+        return _columns_to_arrow(self.to_columns(), ("create_time", "update_time"))
     
     def __str__(self):
         return f"<SharedConversations conversations={self.conversations} has_missing_conversations={self.has_missing_conversations} limit={self.limit} offset={self.offset} total={self.total}>"
 
     def __repr__(self):
         return f"<SharedConversations conversations={self.conversations} has_missing_conversations={self.has_missing_conversations} limit={self.limit} offset={self.offset} total={self.total}>"
+
+class WorkerHealth:
+    """Class representing the health of a ChatGPT instance."""
+
+    def __init__(
+        self,
+        responsive: bool,
+        ping_latency: Optional[float],
+        js_heap_used: Optional[int],
+        dom_nodes: Optional[int],
+        messages_sent: int,
+        errors: int,
+        uptime: float,
+    ):
+        """
+        Initialize a WorkerHealth object.
+
+        Args:
+        ----------
+            responsive (bool): Whether the page responded to a ping.
+            ping_latency (Optional[float]): How long the ping took, in seconds.
+            js_heap_used (Optional[int]): The renderer's used JavaScript heap, in bytes.
+            dom_nodes (Optional[int]): The number of DOM nodes in the page.
+            messages_sent (int): The number of messages sent and regenerated.
+            errors (int): The number of those that failed.
+            uptime (float): Time since the browser was started, in seconds.
+        """
+        self.responsive = responsive
+        self.ping_latency = ping_latency
+        self.js_heap_used = js_heap_used
+        self.dom_nodes = dom_nodes
+        self.messages_sent = messages_sent
+        self.errors = errors
+        self.uptime = uptime
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.messages_sent if self.messages_sent else 0.0
+
+    def __str__(self):
+        return f"<WorkerHealth responsive={self.responsive} ping_latency={self.ping_latency} js_heap_used={self.js_heap_used} dom_nodes={self.dom_nodes} messages_sent={self.messages_sent} errors={self.errors} uptime={self.uptime}>"
+
+    def __repr__(self):
+        return f"<WorkerHealth responsive={self.responsive} ping_latency={self.ping_latency} js_heap_used={self.js_heap_used} dom_nodes={self.dom_nodes} messages_sent={self.messages_sent} errors={self.errors} uptime={self.uptime}>"
@@ -0,0 +1,300 @@
+import multiprocessing
+from logging import getLogger
+from pickle import PicklingError
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Optional, Tuple
+
+from UnlimitedGPT.internal.cancellation import CancellationToken
+from UnlimitedGPT.internal.exceptions import UnlimitedGPTException, WorkerCrashed
+
+
+class _RemoteToken:
+    """Stands in for a `CancellationToken` sent to the worker process, which gets a token of its own."""
+
+    def __init__(self, reason: Optional[str], cancelled: bool) -> None:
+        self.reason = reason
+        self.cancelled = cancelled
+
+
+class _RemoteCallback:
+    """Stands in for a callback (e.g. `on_progress`) sent to the worker process, whose calls are sent back."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+
+class _Cancellations:
+    """
+    The tokens of the calls running in the worker process, by call ID. A cancellation may arrive before
+    its call registered its token, in which case it is kept until the token is registered.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._tokens: Dict[int, CancellationToken] = {}
+        self._early: Dict[int, Optional[str]] = {}
+        self._finished = 0
+
+    def register(self, call_id: int, token: CancellationToken) -> None:
+        with self._lock:
+            self._tokens[call_id] = token
+            if call_id in self._early:
+                token.cancel(self._early.pop(call_id))
+
+    def cancel(self, call_id: int, reason: Optional[str]) -> None:
+        with self._lock:
+            if call_id <= self._finished:
+                return
+            token = self._tokens.get(call_id)
+            if token is None:
+                self._early[call_id] = reason
+        if token is not None:
+            token.cancel(reason)
+
+    def finish(self, call_id: int) -> None:
+        with self._lock:
+            self._tokens.pop(call_id, None)
+            self._early.pop(call_id, None)
+            self._finished = max(self._finished, call_id)
+
+
+def _listen_for_cancellations(cancel_connection, cancellations: _Cancellations) -> None:
+    """
+    Cancels the token of a running call when the proxy asks to, meant to run in the background.
+
+    Each message is a `(call_id, reason)` tuple, ignored once that call has finished.
+    """
+    while True:
+        try:
+            message = cancel_connection.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        cancellations.cancel(*message)
+
+
+def _serve(connection, cancel_connection, args: tuple, kwargs: dict) -> None:
+    """
+    Runs a ChatGPT instance in the worker process, answering the requests sent over the pipe.
+
+    Each request is a `(call_id, kind, name, args, kwargs)` tuple, where kind is either "call" or "get".
+    Each answer is a `(status, value)` tuple, where status is either "ok" or "error", or "progress"
+    for the calls of a callback, with a `(index, args)` value, sent while the call runs.
+    """
+    from UnlimitedGPT.UnlimitedGPT import ChatGPT
+
+    try:
+        chatgpt = ChatGPT(*args, **kwargs)
+    except BaseException as e:
+        connection.send(("error", e))
+        return
+    connection.send(("ok", None))
+
+    cancellations = _Cancellations()
+    Thread(target=_listen_for_cancellations, args=(cancel_connection, cancellations), daemon=True).start()
+
+    def restore(value: Any, call_id: int) -> Any:
+        if isinstance(value, _RemoteToken):
+            token = CancellationToken()
+            if value.cancelled:
+                token.cancel(value.reason)
+            cancellations.register(call_id, token)
+            return token
+        if isinstance(value, _RemoteCallback):
+            index = value.index
+            return lambda *callback_args: connection.send(("progress", (index, callback_args)))
+        return value
+
+    while True:
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        call_id, kind, name, call_args, call_kwargs = request
+        try:
+            value = getattr(chatgpt, name)
+            if kind == "call":
+                call_args = [restore(arg, call_id) for arg in call_args]
+                call_kwargs = {key: restore(arg, call_id) for key, arg in call_kwargs.items()}
+                value = value(*call_args, **call_kwargs)
+            connection.send(("ok", value))
+        except BaseException as e:
+            try:
+                connection.send(("error", e))
+            except Exception:
+                # The exception itself could not be pickled
+                connection.send(("error", UnlimitedGPTException(repr(e))))
+        finally:
+            cancellations.finish(call_id)
+
+    chatgpt.__del__()
+
+
+class ProcessChatGPT:
+    """
+    A ChatGPT instance running in its own process, behind a proxy with the same API.
+
+    Every worker gets its own interpreter, so parsing and WebDriver traffic of many workers
+    spread over all cores, and a crashed browser only takes down its own process.
+
+    Cancellation tokens and callbacks (e.g. `on_progress`) work as with `ChatGPT`: cancelling the
+    token cancels the call in the worker, and the callbacks are called in this process.
+
+    The arguments are sent to the worker process, so the objects among them are copies there:
+    a `LatencyModel` or `CircuitBreaker` no longer learns from or trips on the calls of other
+    instances, and a `SearchIndex` is opened again from its path (an in-memory one starts empty).
+
+    Args:
+    ----------
+        *args: Passed to `ChatGPT`.
+        start_method (str, optional): The multiprocessing start method. Defaults to 'spawn'.
+        **kwargs: Passed to `ChatGPT`.
+
+    Raises:
+    ----------
+        ValueError: If an argument cannot be sent to the worker process.
+        WorkerCrashed: If the worker process died while starting.
+    """
+
+    def __init__(self, *args, start_method: str = "spawn", **kwargs) -> None:
+        self.logger = getLogger("pyChatGPT")
+        self._lock = Lock()
+        context = multiprocessing.get_context(start_method)
+        self._connection, child_connection = context.Pipe()
+        self._cancel_connection, child_cancel_connection = context.Pipe()
+        self._call_id = 0
+        self._process = context.Process(
+            target=_serve, args=(child_connection, child_cancel_connection, args, kwargs), daemon=True
+        )
+        self.logger.debug("Starting worker process...")
+        try:
+            self._process.start()
+        except (AttributeError, TypeError, PicklingError) as e:
+            self._connection.close()
+            self._cancel_connection.close()
+            raise ValueError(f"The arguments of ProcessChatGPT must be picklable to reach the worker process: {e}")
+        child_connection.close()
+        child_cancel_connection.close()
+        self._receive()
+        self.logger.debug(f"Worker process {self._process.pid} is ready")
+
+    def __repr__(self):
+        return f"<ProcessChatGPT pid={self._process.pid} alive={self.is_alive}>"
+
+    @property
+    def is_alive(self) -> bool:
+        """
+        Whether the worker process is still running.
+        """
+        return self._process.is_alive()
+
+    def _receive(self, callbacks: Tuple[Any, ...] = ()) -> Any:
+        while True:
+            try:
+                status, value = self._connection.recv()
+            except (EOFError, OSError):
+                raise WorkerCrashed(f"Worker process exited with code {self._process.exitcode}")
+            if status == "progress":
+                index, callback_args = value
+                callbacks[index](*callback_args)
+                continue
+            if status == "error":
+                raise value
+            return value
+
+    def _forward_cancellation(self, call_id: int, token: CancellationToken, done: Event) -> None:
+        """
+        Forwards the cancellation of a token to the worker process, meant to run in the background.
+        """
+        while not done.is_set():
+            if token.wait(0.1):
+                try:
+                    self._cancel_connection.send((call_id, token.reason))
+                except (BrokenPipeError, OSError):
+                    pass
+                return
+
+    def _request(self, kind: str, name: str, args: tuple = (), kwargs: Optional[dict] = None) -> Any:
+        """
+        Sends a request to the worker process and waits for its answer.
+
+        Raises:
+        ----------
+            WorkerCrashed: If the worker process died.
+        """
+        kwargs = kwargs or {}
+        callbacks = []
+        tokens = []
+
+        def replace(value: Any) -> Any:
+            if isinstance(value, CancellationToken):
+                tokens.append(value)
+                return _RemoteToken(value.reason, value.cancelled)
+            if callable(value):
+                callbacks.append(value)
+                return _RemoteCallback(len(callbacks) - 1)
+            return value
+
+        args = tuple(replace(arg) for arg in args)
+        kwargs = {key: replace(arg) for key, arg in kwargs.items()}
+
+        with self._lock:
+            if not self.is_alive:
+                raise WorkerCrashed(f"Worker process exited with code {self._process.exitcode}")
+            self._call_id += 1
+            done = Event()
+            for token in tokens:
+                Thread(target=self._forward_cancellation, args=(self._call_id, token, done), daemon=True).start()
+            try:
+                try:
+                    self._connection.send((self._call_id, kind, name, args, kwargs))
+                except (BrokenPipeError, OSError):
+                    raise WorkerCrashed("Worker process is gone")
+                return self._receive(tuple(callbacks))
+            finally:
+                done.set()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        from UnlimitedGPT.UnlimitedGPT import ChatGPT
+
+        if callable(getattr(ChatGPT, name, None)):
+            def method(*args, **kwargs):
+                return self._request("call", name, args, kwargs)
+
+            method.__name__ = name
+            return method
+        return self._request("get", name)
+
+    def close(self, timeout: float = 30) -> None:
+        """
+        Close the browser and stop the worker process.
+
+        Args:
+        ----------
+            timeout (float, optional): Time to wait for the process to exit before killing it. Defaults to 30.
+        """
+        if not hasattr(self, "_process"):
+            return
+        if self._process.is_alive():
+            self.logger.debug("Stopping worker process...")
+            try:
+                with self._lock:
+                    self._connection.send(None)
+                    self._cancel_connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.kill()
+        self._connection.close()
+        self._cancel_connection.close()
+
+    def __del__(self) -> None:
+        self.close()
@@ -0,0 +1,268 @@
+from functools import wraps
+from logging import getLogger
+from random import uniform
+from threading import Lock, local
+from time import sleep, time
+from typing import Any, Callable, Tuple, Type
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from UnlimitedGPT.internal.exceptions import CircuitOpen, UnlimitedGPTException
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+
+
+class RetryPolicy:
+    """
+    A retry policy with exponential backoff and jitter.
+
+    Args:
+    ----------
+        max_attempts (int, optional): The maximum number of attempts, including the first one. Defaults to 3.
+        base_delay (float, optional): The delay before the first retry, in seconds. Defaults to 1.
+        max_delay (float, optional): The longest delay between attempts, in seconds. Defaults to 30.
+        jitter (float, optional): The fraction of the delay that is randomized. Defaults to 0.5.
+        retry_on (Tuple[Type[BaseException], ...], optional): The exceptions worth retrying. Defaults to Selenium's timeout and WebDriver errors.
+        retry_failed (bool, optional): Whether to retry failed or missing responses. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1,
+        max_delay: float = 30,
+        jitter: float = 0.5,
+        retry_on: Tuple[Type[BaseException], ...] = (TimeoutException, WebDriverException),
+        retry_failed: bool = True,
+    ) -> None:
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.retry_failed = retry_failed
+        self.logger = getLogger("pyChatGPT")
+
+    def __repr__(self):
+        return f"<RetryPolicy max_attempts={self.max_attempts} base_delay={self.base_delay} max_delay={self.max_delay} jitter={self.jitter}>"
+
+    def delay(self, attempt: int) -> float:
+        """
+        The delay before retrying after the given attempt.
+
+        Args:
+        ----------
+            attempt (int): The attempt that just failed, starting at 1.
+
+        Returns:
+        ----------
+            float: The delay in seconds.
+        """
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return max(delay * (1 + uniform(-self.jitter, self.jitter)), 0)
+
+    def is_failure(self, result: Any) -> bool:
+        """
+        Whether a result counts as a failure worth retrying.
+        """
+        if not self.retry_failed:
+            return False
+        return result is None or (isinstance(result, ChatGPTResponse) and result.failed)
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Call a function, retrying it according to the policy.
+
+        Returns:
+        ----------
+            Any: The result of the last attempt.
+
+        Raises:
+        ----------
+            Exception: The last retryable exception, once the attempts run out, or any other exception right away.
+        """
+        return self.call_while(lambda: True, func, *args, **kwargs)
+
+    def call_while(self, can_retry: Callable[[], bool], func: Callable, *args, **kwargs) -> Any:
+        """
+        Call a function, retrying it according to the policy for as long as `can_retry()` is true,
+        e.g. until a message was submitted and resending it would send it twice.
+
+        Returns:
+        ----------
+            Any: The result of the last attempt.
+
+        Raises:
+        ----------
+            Exception: The last retryable exception, once the attempts run out or it can no longer be retried, or any other exception right away.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                result = func(*args, **kwargs)
+            except self.retry_on as e:
+                if attempt == self.max_attempts or not can_retry():
+                    raise
+                self.logger.debug(f"Attempt {attempt} raised {type(e).__name__}, retrying...")
+            else:
+                if attempt == self.max_attempts or not self.is_failure(result):
+                    return result
+                if not can_retry():
+                    self.logger.debug(f"Attempt {attempt} failed after submitting, not retrying")
+                    return result
+                self.logger.debug(f"Attempt {attempt} failed, retrying...")
+            sleep(self.delay(attempt))
+
+
+class CircuitBreaker:
+    """
+    Takes a failing instance out of rotation after consecutive failures, and lets a single
+    probe through once the recovery time has passed.
+
+    Args:
+    ----------
+        failure_threshold (int, optional): Consecutive failures that open the circuit. Defaults to 5.
+        recovery_time (float, optional): Time to wait before probing an open circuit, in seconds. Defaults to 60.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 60) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._probing = False
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f"<CircuitBreaker state={self.state} failures={self.failures}>"
+
+    def __getstate__(self) -> dict:
+        # Sent to a worker process, without the lock
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        The state of the circuit, moving from OPEN to HALF_OPEN once the recovery time has passed.
+        """
+        with self._lock:
+            if self._state == self.OPEN and time() >= self.opened_at + self.recovery_time:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go through. While half open, only one probing call is let through at a time.
+        """
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self.opened_at = time()
+            self._probing = False
+
+    def release(self) -> None:
+        """
+        Let another probe through after one ended without telling anything about the browser (e.g. an interrupt).
+        """
+        with self._lock:
+            self._probing = False
+
+
+def mark_submitted(instance: Any) -> None:
+    """
+    Record that the current resilient call of an instance submitted something to ChatGPT,
+    so it is no longer retried: resending would send it twice.
+    """
+    instance._resilient.submitted = True
+
+
+def resilient(method: Callable) -> Callable:
+    """
+    Runs a `ChatGPT` method through the instance's circuit breaker and retry policy.
+
+    Nested resilient calls (e.g. the parts of a split message) go straight through,
+    so only the outermost call is retried. An attempt is only retried until it calls
+    `mark_submitted`, e.g. once a message was sent.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        state = self._resilient
+        if getattr(state, "depth", 0):
+            return method(self, *args, **kwargs)
+
+        breaker = self.circuit_breaker
+        policy = self.retry_policy
+        if breaker is not None:
+            if not breaker.allow():
+                raise CircuitOpen(f"Circuit is open, {method.__name__} was not attempted")
+            if breaker.state == CircuitBreaker.HALF_OPEN and not self.ping():
+                breaker.record_failure()
+                raise CircuitOpen("Probe failed, the circuit is open again")
+
+        def attempt():
+            state.submitted = False
+            return method(self, *args, **kwargs)
+
+        failure_types = policy.retry_on if policy is not None else (TimeoutException, WebDriverException)
+        state.depth = 1
+        try:
+            if policy is None:
+                result = attempt()
+            else:
+                result = policy.call_while(lambda: not state.submitted, attempt)
+        except failure_types:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except UnlimitedGPTException:
+            # Not a sign of a sick browser (e.g. a rate limit): the browser did respond
+            if breaker is not None:
+                breaker.record_success()
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            # Interrupted, which tells nothing about the browser
+            if breaker is not None:
+                breaker.release()
+            raise
+        finally:
+            state.depth = 0
+
+        if breaker is not None:
+            if result is None or (isinstance(result, ChatGPTResponse) and result.failed):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return result
+
+    return wrapper
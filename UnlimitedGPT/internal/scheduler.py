@@ -0,0 +1,487 @@
+from collections import deque
+from concurrent.futures import Future
+from logging import getLogger
+from threading import Condition, Lock, RLock, Thread
+from time import sleep, time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from UnlimitedGPT.internal.exceptions import DeadlineExceeded, RateLimitExceeded
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+
+if TYPE_CHECKING:
+    from UnlimitedGPT.UnlimitedGPT import ChatGPT
+    from UnlimitedGPT.internal.supervisor import WorkerSupervisor
+
+
+class AccountUsage:
+    """Class tracking the usage of a single account over a sliding window."""
+
+    def __init__(self, session_token: str, max_messages: int, window: float):
+        """
+        Initialize an AccountUsage object.
+
+        Args:
+        ----------
+            session_token (str): The session token of the account.
+            max_messages (int): The maximum number of messages allowed within the window.
+            window (float): The length of the sliding window in seconds.
+        """
+        self.session_token = session_token
+        self.max_messages = max_messages
+        self.window = window
+        self.sent = deque()
+        self.cooldown_until = 0.0
+
+    def _expire(self, now: float) -> None:
+        while self.sent and self.sent[0] <= now - self.window:
+            self.sent.popleft()
+
+    def remaining(self, now: Optional[float] = None) -> int:
+        """
+        The number of messages the account can still send, 0 while it is cooling down.
+        """
+        now = time() if now is None else now
+        if now < self.cooldown_until:
+            return 0
+        self._expire(now)
+        return max(self.max_messages - len(self.sent), 0)
+
+    def available_at(self, now: Optional[float] = None) -> float:
+        """
+        The time at which the account will be able to send a message again.
+        """
+        now = time() if now is None else now
+        self._expire(now)
+        available_at = max(now, self.cooldown_until)
+        if len(self.sent) >= self.max_messages:
+            available_at = max(available_at, self.sent[len(self.sent) - self.max_messages] + self.window)
+        return available_at
+
+    def __repr__(self):
+        return f"<AccountUsage session_token={self.session_token[:8]}... remaining={self.remaining()} cooldown_until={self.cooldown_until}>"
+
+
+class AccountScheduler:
+    """
+    Sends each prompt through an account that still has quota, switching accounts only when needed.
+
+    Args:
+    ----------
+        chatgpt (ChatGPT): The ChatGPT instance to send the messages with.
+        session_tokens (List[str]): The session tokens of the accounts to rotate between.
+        max_messages (int, optional): The messages allowed per account within the window. Defaults to 25.
+        window (float, optional): The length of the sliding window in seconds. Defaults to 3 hours.
+        cooldown (Optional[float], optional): How long an account rests after being rate limited. Defaults to the window.
+        max_wait (Optional[float], optional): The longest time to wait for quota before giving up. Defaults to None (wait forever).
+
+    Raises:
+    ----------
+        ValueError: If no session tokens are provided.
+    """
+
+    def __init__(
+        self,
+        chatgpt: "ChatGPT",
+        session_tokens: List[str],
+        max_messages: int = 25,
+        window: float = 3 * 60 * 60,
+        cooldown: Optional[float] = None,
+        max_wait: Optional[float] = None,
+    ) -> None:
+        if not session_tokens:
+            raise ValueError("At least one session token is required")
+
+        self.chatgpt = chatgpt
+        self.cooldown = window if cooldown is None else cooldown
+        self.max_wait = max_wait
+        self.logger = getLogger("pyChatGPT")
+        # Guards the usage, only while an account is picked or its usage recorded
+        self._lock = RLock()
+        # The instance sends one message at a time, on the account it was switched to for it
+        self._browser_lock = Lock()
+        self.accounts: Dict[str, AccountUsage] = {
+            token: AccountUsage(token, max_messages, window) for token in session_tokens
+        }
+
+    def __repr__(self):
+        return f"<AccountScheduler accounts={list(self.accounts.values())}>"
+
+    @property
+    def current(self) -> Optional[AccountUsage]:
+        """
+        The account the ChatGPT instance is currently signed into, if it is managed by the scheduler.
+        """
+        return self.accounts.get(self.chatgpt._session_token)
+
+    def _pick(self, now: float) -> Optional[AccountUsage]:
+        """
+        Pick the account to send the next message with, preferring the current one.
+        """
+        current = self.current
+        if current is not None and current.remaining(now) > 0:
+            return current
+
+        candidates = [account for account in self.accounts.values() if account.remaining(now) > 0]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda account: account.remaining(now))
+
+    def _acquire(self) -> AccountUsage:
+        """
+        Wait for an account with available quota and switch to it. Must be called with `_browser_lock` held.
+
+        Raises:
+        ----------
+            RateLimitExceeded: If no account frees up within `max_wait`.
+        """
+        deadline = None if self.max_wait is None else time() + self.max_wait
+        while True:
+            with self._lock:
+                now = time()
+                account = self._pick(now)
+                if account is not None:
+                    break
+                available_at = min(usage.available_at(now) for usage in self.accounts.values())
+
+            if deadline is not None and available_at > deadline:
+                raise RateLimitExceeded("All accounts are rate limited")
+            self.logger.debug(f"All accounts are rate limited, waiting {available_at - now:.0f}s...")
+            sleep(max(available_at - now, 0.1))
+
+        if account is not self.current:
+            self.logger.debug(f"Switching to account {account.session_token[:8]}...")
+            self.chatgpt.switch_account(account.session_token)
+        return account
+
+    def _record(self, account: AccountUsage) -> None:
+        """
+        Count a message against the account's quota if it reached ChatGPT.
+        """
+        state = getattr(self.chatgpt, "_resilient", None)
+        # Instances that do not tell whether the message was submitted are assumed to have submitted it
+        if getattr(state, "submitted", True):
+            with self._lock:
+                account.sent.append(time())
+
+    def send_message(self, message: str, **kwargs) -> ChatGPTResponse:
+        """
+        Send a message through an account with available quota.
+
+        Args:
+        ----------
+            message (str): Message to send.
+            **kwargs: Passed to `ChatGPT.send_message`.
+
+        Returns:
+        ----------
+            ChatGPTResponse: Response from ChatGPT.
+
+        Raises:
+        ----------
+            RateLimitExceeded: If no account frees up within `max_wait`.
+        """
+        while True:
+            with self._browser_lock:
+                account = self._acquire()
+                state = getattr(self.chatgpt, "_resilient", None)
+                if state is not None:
+                    # A call refused before it starts (e.g. by the circuit breaker) submits nothing
+                    state.submitted = False
+                try:
+                    return self.chatgpt.send_message(message, **kwargs)
+                except RateLimitExceeded:
+                    self.logger.debug(f"Account {account.session_token[:8]} was rate limited, cooling down...")
+                    with self._lock:
+                        account.cooldown_until = time() + self.cooldown
+                finally:
+                    self._record(account)
+
+
+class QueueStats:
+    """Class tracking the queue waits of a single priority class."""
+
+    def __init__(self, priority: str, history: int = 1000):
+        """
+        Initialize a QueueStats object.
+
+        Args:
+        ----------
+            priority (str): The name of the priority class.
+            history (int, optional): The number of recent waits kept for the percentiles. Defaults to 1000.
+        """
+        self.priority = priority
+        self.queued = 0
+        self.served = 0
+        self.expired = 0
+        self.waits = deque(maxlen=history)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        A percentile of the recent queue waits, in seconds, e.g. `percentile(0.99)`.
+        """
+        if not self.waits:
+            return 0.0
+        waits = sorted(self.waits)
+        return waits[min(int(fraction * len(waits)), len(waits) - 1)]
+
+    @property
+    def average_wait(self) -> float:
+        return sum(self.waits) / len(self.waits) if self.waits else 0.0
+
+    def __repr__(self):
+        return f"<QueueStats priority={self.priority} queued={self.queued} served={self.served} expired={self.expired} average_wait={self.average_wait:.3f} p99_wait={self.percentile(0.99):.3f}>"
+
+
+class _QueuedRequest:
+    def __init__(
+        self, message: str, kwargs: dict, tenant: str, priority: str, deadline: Optional[float], start: float, finish: float
+    ):
+        self.message = message
+        self.kwargs = kwargs
+        self.tenant = tenant
+        self.priority = priority
+        self.deadline = deadline
+        self.start = start
+        self.finish = finish
+        self.queued_at = time()
+        self.future: "Future[ChatGPTResponse]" = Future()
+
+
+class FairScheduler:
+    """
+    Queues messages in front of a pool of ChatGPT instances, serving higher priority classes first
+    and sharing each class between tenants by weighted fair queuing.
+
+    A worker that frees up always takes the most urgent request at that moment, so batch requests only
+    use capacity interactive ones leave idle, and requests past their deadline are dropped before
+    they reach a browser.
+
+    Args:
+    ----------
+        pool (WorkerSupervisor): The pool of workers sending the messages.
+        priorities (Sequence[str], optional): The priority classes, most urgent first. Defaults to ('interactive', 'batch').
+        weights (Optional[Dict[str, float]], optional): The share of each tenant within a class. Defaults to None (1 each).
+        concurrency (Optional[int], optional): The number of messages sent at once. Defaults to the size of the pool.
+        history (int, optional): The number of recent waits kept per class for the percentiles. Defaults to 1000.
+    """
+
+    def __init__(
+        self,
+        pool: "WorkerSupervisor",
+        priorities: Sequence[str] = ("interactive", "batch"),
+        weights: Optional[Dict[str, float]] = None,
+        concurrency: Optional[int] = None,
+        history: int = 1000,
+    ) -> None:
+        self.pool = pool
+        self.priorities = list(priorities)
+        self.weights: Dict[str, float] = dict(weights or {})
+        self.logger = getLogger("pyChatGPT")
+        self._condition = Condition()
+        self._closed = False
+        self._queues: Dict[str, Dict[str, deque]] = {priority: {} for priority in self.priorities}
+        # Weighted fair queuing state: the virtual time of each class and the last finish tag of each tenant in it
+        self._virtual_time: Dict[str, float] = {priority: 0.0 for priority in self.priorities}
+        self._last_finish: Dict[str, Dict[str, float]] = {priority: {} for priority in self.priorities}
+        self.stats: Dict[str, QueueStats] = {priority: QueueStats(priority, history) for priority in self.priorities}
+
+        for _ in range(concurrency or pool.size):
+            Thread(target=self._dispatch, daemon=True).start()
+
+    def __repr__(self):
+        return f"<FairScheduler priorities={self.priorities} queued={self.queued}>"
+
+    @property
+    def queued(self) -> int:
+        """
+        The number of requests waiting for a worker.
+        """
+        with self._condition:
+            return sum(len(queue) for queues in self._queues.values() for queue in queues.values())
+
+    def set_weight(self, tenant: str, weight: float) -> None:
+        """
+        Set the share of a tenant within every class, relative to the other tenants.
+
+        Args:
+        ----------
+            tenant (str): The tenant.
+            weight (float): Its weight, 1 by default.
+        """
+        if weight <= 0:
+            raise ValueError("Weight must be positive")
+        with self._condition:
+            self.weights[tenant] = weight
+
+    def submit(
+        self,
+        message: str,
+        tenant: str = "default",
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> "Future[ChatGPTResponse]":
+        """
+        Queue a message.
+
+        Args:
+        ----------
+            message (str): Message to send.
+            tenant (str, optional): The tenant sending it. Defaults to 'default'.
+            priority (Optional[str], optional): Its priority class. Defaults to the least urgent one.
+            deadline (Optional[float], optional): Time, in seconds from now, after which it is dropped if it has not reached a browser. Defaults to None.
+            **kwargs: Passed to `ChatGPT.send_message`.
+
+        Returns:
+        ----------
+            Future[ChatGPTResponse]: The future response, failing with `DeadlineExceeded` if the deadline passes first.
+
+        Raises:
+        ----------
+            ValueError: If the priority class is unknown.
+        """
+        priority = priority or self.priorities[-1]
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class {priority}")
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            start = max(self._virtual_time[priority], self._last_finish[priority].get(tenant, 0.0))
+            finish = start + 1 / self.weights.get(tenant, 1.0)
+            self._last_finish[priority][tenant] = finish
+            request = _QueuedRequest(
+                message, kwargs, tenant, priority, None if deadline is None else time() + deadline, start, finish
+            )
+            self._queues[priority].setdefault(tenant, deque()).append(request)
+            self.stats[priority].queued += 1
+            self._condition.notify()
+        return request.future
+
+    def send_message(self, message: str, **kwargs: Any) -> ChatGPTResponse:
+        """
+        Queue a message and wait for its response.
+
+        Args:
+        ----------
+            message (str): Message to send.
+            **kwargs: Passed to `submit`.
+
+        Returns:
+        ----------
+            ChatGPTResponse: Response from ChatGPT.
+
+        Raises:
+        ----------
+            DeadlineExceeded: If the deadline passed before the message reached a browser.
+        """
+        return self.submit(message, **kwargs).result()
+
+    def _expire(self, now: float) -> Optional[float]:
+        """
+        Drops the requests past their deadline, returning the earliest deadline still queued.
+        """
+        earliest = None
+        for priority, queues in self._queues.items():
+            for tenant, queue in list(queues.items()):
+                for request in [request for request in queue if request.deadline is not None]:
+                    if request.deadline <= now:
+                        queue.remove(request)
+                        self.stats[priority].expired += 1
+                        if request.future.set_running_or_notify_cancel():
+                            request.future.set_exception(
+                                DeadlineExceeded(f"Request of {tenant} waited {now - request.queued_at:.1f}s and expired")
+                            )
+                    elif earliest is None or request.deadline < earliest:
+                        earliest = request.deadline
+                if not queue:
+                    del queues[tenant]
+        return earliest
+
+    def _pop(self) -> Optional[_QueuedRequest]:
+        """
+        Takes the most urgent request: the one with the earliest finish tag in the most urgent non-empty class.
+        """
+        self._expire(time())
+        for priority in self.priorities:
+            queues = self._queues[priority]
+            if not queues:
+                continue
+            tenant = min(queues, key=lambda tenant: queues[tenant][0].finish)
+            request = queues[tenant].popleft()
+            if not queues[tenant]:
+                del queues[tenant]
+            self._virtual_time[priority] = max(self._virtual_time[priority], request.start)
+            stats = self.stats[priority]
+            stats.served += 1
+            stats.waits.append(time() - request.queued_at)
+            return request
+        return None
+
+    def _dispatch(self) -> None:
+        """
+        Sends the queued requests through the pool, meant to run in the background.
+        """
+        while True:
+            with self._condition:
+                while not self._closed and not any(self._queues.values()):
+                    self._condition.wait()
+                if self._closed:
+                    return
+                earliest = self._expire(time())
+                if not any(self._queues.values()):
+                    continue
+
+            # The request is only picked once a worker is free, so it is the most urgent one by then.
+            # Waiting no longer than the earliest deadline lets expired requests fail right away.
+            worker = self.pool.acquire(None if earliest is None else max(earliest - time(), 0))
+            if worker is None:
+                continue
+            with self._condition:
+                request = self._pop()
+            if request is None or not request.future.set_running_or_notify_cancel():
+                self.pool.release(worker)
+                continue
+
+            try:
+                request.future.set_result(worker.send_message(request.message, **request.kwargs))
+            except BaseException as e:
+                request.future.set_exception(e)
+            finally:
+                self.pool.release(worker)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the queue wait metrics of every priority class.
+
+        Returns:
+        ----------
+            Dict[str, Dict[str, float]]: By class, the number of queued, served and expired requests, and the average, p50 and p99 waits in seconds.
+        """
+        with self._condition:
+            return {
+                priority: {
+                    "queued": stats.queued,
+                    "served": stats.served,
+                    "expired": stats.expired,
+                    "waiting": sum(len(queue) for queue in self._queues[priority].values()),
+                    "average_wait": stats.average_wait,
+                    "p50_wait": stats.percentile(0.5),
+                    "p99_wait": stats.percentile(0.99),
+                }
+                for priority, stats in self.stats.items()
+            }
+
+    def close(self) -> None:
+        """
+        Stop dispatching, failing the requests still queued.
+        """
+        with self._condition:
+            self._closed = True
+            requests = [request for queues in self._queues.values() for queue in queues.values() for request in queue]
+            for queues in self._queues.values():
+                queues.clear()
+            self._condition.notify_all()
+        for request in requests:
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError("Scheduler was closed"))
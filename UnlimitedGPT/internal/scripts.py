@@ -0,0 +1,311 @@
+"""
+JavaScript snippets executed inside the ChatGPT page.
+"""
+
+# Fetches a batch of backend API requests in parallel from within the page, reusing its cookies and
+# Cloudflare clearance, in a single WebDriver round trip.
+# Each request is a {path, method, body} object. The access token is cached on the window and
+# refreshed once if a request comes back as 401.
+# Returns a list of {status, body} objects, in the order of the requests.
+fetch_backend_api = """
+const requests = arguments[0];
+const done = arguments[arguments.length - 1];
+(async () => {
+    let refreshing = null;
+    const getToken = async (refresh) => {
+        if (refresh || !window.__unlimitedgptAccessToken) {
+            // Concurrent requests share a single refresh
+            refreshing = refreshing || fetch("/api/auth/session")
+                .then((response) => response.json())
+                .then((session) => { window.__unlimitedgptAccessToken = session.accessToken; })
+                .finally(() => { refreshing = null; });
+            await refreshing;
+        }
+        return window.__unlimitedgptAccessToken;
+    };
+    const send = async (request, refresh) => {
+        const headers = {"Authorization": `Bearer ${await getToken(refresh)}`};
+        if (request.body !== null) {
+            headers["Content-Type"] = "application/json";
+        }
+        return fetch(request.path, {
+            method: request.method,
+            headers: headers,
+            body: request.body === null ? undefined : JSON.stringify(request.body),
+        });
+    };
+    const fetchOne = async (request) => {
+        try {
+            let response = await send(request, false);
+            if (response.status === 401) {
+                response = await send(request, true);
+            }
+            return {status: response.status, body: await response.text()};
+        } catch (error) {
+            return {status: 0, body: String(error)};
+        }
+    };
+    done(await Promise.all(requests.map(fetchOne)));
+})().catch((error) => done(requests.map(() => ({status: 0, body: String(error)}))));
+"""
+
+# Routes the already-loaded app to a path without reloading it.
+# Clicks the matching sidebar link if there is one, otherwise goes through the Next.js router.
+# Returns the method used, or null if neither is available.
+navigate_in_app = """
+const path = arguments[0];
+const link = Array.from(document.querySelectorAll("nav a[href]")).find(
+    (a) => a.getAttribute("href") === path
+);
+if (link) {
+    link.click();
+    return "link";
+}
+if (window.next && window.next.router && typeof window.next.router.push === "function") {
+    window.next.router.push(path);
+    return "router";
+}
+return null;
+"""
+
+# Types text into an element in chunks, waiting between chunks inside the page.
+# `insertText` fires the same beforeinput/input events as typing, so the app reacts as if typed.
+# Returns the element's value, or null if the browser refused the insertion.
+type_text = """
+const [element, text, chunkSize, delay] = arguments;
+const done = arguments[arguments.length - 1];
+const characters = Array.from(text);
+let index = 0;
+element.focus();
+const step = () => {
+    if (index >= characters.length) {
+        done(element.value);
+        return;
+    }
+    const chunk = characters.slice(index, index + chunkSize).join("");
+    index += chunkSize;
+    if (!document.execCommand("insertText", false, chunk)) {
+        done(null);
+        return;
+    }
+    setTimeout(step, delay * 1000);
+};
+step();
+"""
+
+# Appends a chunk of a large message to a buffer kept on the window, emptying it first if asked.
+append_to_buffer = """
+if (arguments[1] || !window.__unlimitedgptBuffer) {
+    window.__unlimitedgptBuffer = [];
+}
+window.__unlimitedgptBuffer.push(arguments[0]);
+"""
+
+# Sets the buffered message as the textbox value with a single native input event, then submits it.
+# The native setter is used so React notices the change. Returns whether the message was submitted.
+submit_buffer = """
+const textbox = arguments[0];
+const timeout = arguments[1];
+const done = arguments[arguments.length - 1];
+const text = (window.__unlimitedgptBuffer || []).join("");
+delete window.__unlimitedgptBuffer;
+const setter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, "value").set;
+setter.call(textbox, text);
+textbox.dispatchEvent(new Event("input", {bubbles: true}));
+requestAnimationFrame(() => {
+    const container = textbox.form || textbox.parentElement;
+    const button = container && container.querySelector("button[data-testid='send-button'], button[type='submit']");
+    if (button && !button.disabled) {
+        button.click();
+    } else {
+        textbox.dispatchEvent(new KeyboardEvent("keydown", {key: "Enter", code: "Enter", keyCode: 13, bubbles: true}));
+    }
+    // The app empties the textbox once it has taken the message, which may take a while on a busy page
+    const deadline = Date.now() + timeout;
+    const poll = () => {
+        if (textbox.value !== text) {
+            done(true);
+        } else if (Date.now() >= deadline) {
+            done(false);
+        } else {
+            setTimeout(poll, 50);
+        }
+    };
+    poll();
+});
+"""
+
+# Wraps `fetch` so the event stream of every `/backend-api/conversation` request is parsed as it arrives.
+# The assembled assistant message is kept in `window.__unlimitedgptCapture`.
+capture_conversation_stream = """
+(() => {
+    if (window.__unlimitedgptCaptureInstalled) {
+        return;
+    }
+    window.__unlimitedgptCaptureInstalled = true;
+    const originalFetch = window.fetch;
+    window.fetch = async function (...args) {
+        const response = await originalFetch.apply(this, args);
+        try {
+            const url = new URL(typeof args[0] === "string" ? args[0] : args[0].url, location.href);
+            if (url.pathname !== "/backend-api/conversation" || !response.body) {
+                return response;
+            }
+            const capture = {
+                done: false,
+                status: response.status,
+                text: "",
+                message_id: null,
+                parent_message_id: null,
+                conversation_id: null,
+                error: null,
+                finish_reason: null,
+                events: 0,
+                updated: Date.now(),
+            };
+            window.__unlimitedgptCapture = capture;
+            const reader = response.clone().body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            const handle = (event) => {
+                for (const line of event.split("\\n")) {
+                    if (!line.startsWith("data: ")) {
+                        continue;
+                    }
+                    const data = line.slice(6);
+                    if (data === "[DONE]") {
+                        capture.done = true;
+                        continue;
+                    }
+                    try {
+                        const payload = JSON.parse(data);
+                        capture.events += 1;
+                        capture.updated = Date.now();
+                        if (payload.conversation_id) {
+                            capture.conversation_id = payload.conversation_id;
+                        }
+                        if (payload.error) {
+                            capture.error = payload.error;
+                        }
+                        const message = payload.message;
+                        if (message && message.author && message.author.role === "assistant" && message.content && message.content.parts) {
+                            capture.text = message.content.parts.join("");
+                            capture.message_id = message.id;
+                            capture.parent_message_id = (message.metadata && message.metadata.parent_id) || payload.parent_message_id || null;
+                            const finish = message.metadata && message.metadata.finish_details;
+                            if (finish) {
+                                // "max_tokens" when the response was cut and can be continued
+                                capture.finish_reason = finish.type;
+                            }
+                        }
+                    } catch (error) {}
+                }
+            };
+            (async () => {
+                while (true) {
+                    const {value, done} = await reader.read();
+                    if (done) {
+                        break;
+                    }
+                    buffer += decoder.decode(value, {stream: true}).replace(/\\r/g, "");
+                    let index;
+                    while ((index = buffer.indexOf("\\n\\n")) !== -1) {
+                        handle(buffer.slice(0, index));
+                        buffer = buffer.slice(index + 2);
+                    }
+                }
+                handle(buffer);
+                capture.done = true;
+            })().catch((error) => {
+                capture.error = String(error);
+                capture.done = true;
+            });
+        } catch (error) {}
+        return response;
+    };
+})();
+"""
+
+# Hides the conversation turns older than the last `keep` with a stylesheet rule on a marker attribute,
+# leaving the nodes React owns untouched, so re-renders keep working. Hidden turns are skipped next time.
+# Returns the number of turns hidden, or null if no turns were found.
+prune_conversation_turns = """
+const [selector, keep] = arguments;
+if (!document.getElementById("unlimitedgpt-pruned-style")) {
+    const style = document.createElement("style");
+    style.id = "unlimitedgpt-pruned-style";
+    style.textContent = "[data-unlimitedgpt-pruned] { display: none !important; }";
+    document.head.appendChild(style);
+}
+const turns = Array.from(document.querySelectorAll(selector));
+if (turns.length === 0) {
+    return null;
+}
+let pruned = 0;
+for (const turn of turns.slice(0, Math.max(turns.length - keep, 0))) {
+    if (turn.hasAttribute("data-unlimitedgpt-pruned")) {
+        continue;
+    }
+    turn.setAttribute("data-unlimitedgpt-pruned", "");
+    pruned++;
+}
+return pruned;
+"""
+
+# Counts the nodes of the page outside of the turns hidden by `prune_conversation_turns`,
+# which is what pruning can shrink.
+visible_node_count = """
+const walker = document.createTreeWalker(document, NodeFilter.SHOW_ALL, {
+    acceptNode: (node) => node.nodeType === Node.ELEMENT_NODE && node.hasAttribute("data-unlimitedgpt-pruned")
+        ? NodeFilter.FILTER_REJECT
+        : NodeFilter.FILTER_ACCEPT,
+});
+let count = 1;
+while (walker.nextNode()) {
+    count++;
+}
+return count;
+"""
+
+# Reads the length of the text streaming in, found by the XPath in arguments[0].
+# Returns null once nothing is streaming.
+generation_progress = """
+const streaming = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+return streaming === null ? null : streaming.textContent.length;
+"""
+
+# Sets the local storage items of a snapshot, given as a JSON object in place of %s, on every
+# page of chat.openai.com before its own scripts run. Items the page already has are left alone.
+seed_local_storage = """
+(() => {
+    if (location.hostname !== "chat.openai.com") {
+        return;
+    }
+    for (const [key, value] of Object.entries(%s)) {
+        if (localStorage.getItem(key) === null) {
+            localStorage.setItem(key, value);
+        }
+    }
+})();
+"""
+
+# Gets the text of the visible alerts (found by the XPath in arguments[0]), and of the error notices
+# (arguments[2]) of the latest conversation turn (arguments[1]), leaving the answers themselves out.
+latest_errors = """
+const [alertXPath, turnSelector, errorSelector] = arguments;
+const texts = [];
+const alerts = document.evaluate(alertXPath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+for (let i = 0; i < alerts.snapshotLength; i++) {
+    const alert = alerts.snapshotItem(i);
+    if (alert.offsetParent !== null) {
+        texts.push(alert.innerText);
+    }
+}
+const turns = document.querySelectorAll(turnSelector);
+if (turns.length > 0) {
+    for (const notice of turns[turns.length - 1].querySelectorAll(errorSelector)) {
+        texts.push(notice.innerText);
+    }
+}
+return texts;
+"""
@@ -0,0 +1,468 @@
+import gzip
+import sqlite3
+from hashlib import sha1
+from json import loads
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+from UnlimitedGPT.internal.selectors import ChatGPTVariables as CGPTV
+from UnlimitedGPT.internal.store import _to_timestamp
+
+if TYPE_CHECKING:
+    from UnlimitedGPT.UnlimitedGPT import ChatGPT
+
+
+class SearchResult:
+    """Class representing a conversation matching a search."""
+
+    def __init__(self, conversation_id: str, title: Optional[str], message_id: str, snippet: str, score: float):
+        """
+        Initialize a SearchResult object.
+
+        Args:
+        ----------
+            conversation_id (str): The ID of the conversation, ready for `switch_conversation`.
+            title (Optional[str]): The title of the conversation, if known.
+            message_id (str): The ID of its best matching message.
+            snippet (str): The matching text of that message, matches between brackets.
+            score (float): The BM25 rank of that message, lower is better.
+        """
+        self.conversation_id = conversation_id
+        self.title = title
+        self.message_id = message_id
+        self.snippet = snippet
+        self.score = score
+
+    def __repr__(self):
+        return f'<SearchResult conversation_id="{self.conversation_id}" title="{self.title}" snippet="{self.snippet}" score={self.score:.3f}>'
+
+
+class SearchIndex:
+    """
+    A local full-text index of conversation messages, backed by SQLite FTS5.
+
+    It is fed by exported or synced conversations and by the responses of `send_message`,
+    updated in place, and searched without touching the browser.
+
+    Args:
+    ----------
+        path (str, optional): The path of the SQLite database. Defaults to 'search.db'.
+
+    Raises:
+    ----------
+        ValueError: If SQLite was built without FTS5.
+    """
+
+    def __init__(self, path: str = "search.db") -> None:
+        self.path = path
+        self.logger = getLogger("pyChatGPT")
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        try:
+            with self._connection:
+                self._connection.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS messages (
+                        id INTEGER PRIMARY KEY,
+                        message_id TEXT UNIQUE,
+                        conversation_id TEXT,
+                        role TEXT,
+                        create_time REAL,
+                        content TEXT
+                    );
+                    CREATE INDEX IF NOT EXISTS messages_conversation_id ON messages (conversation_id);
+                    CREATE TABLE IF NOT EXISTS conversations (
+                        id TEXT PRIMARY KEY,
+                        title TEXT,
+                        update_time REAL
+                    );
+                    CREATE TABLE IF NOT EXISTS failed (
+                        id TEXT PRIMARY KEY
+                    );
+                    CREATE TABLE IF NOT EXISTS meta (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    );
+                    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                        content, content='messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+                        INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+                        INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS messages_update AFTER UPDATE OF content ON messages BEGIN
+                        INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                        INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+                    END;
+                    """
+                )
+        except sqlite3.OperationalError as e:
+            if "fts5" in str(e):
+                raise ValueError("Your SQLite was built without FTS5, which the search index requires")
+            raise e
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def __reduce__(self):
+        # Sent to a worker process, which opens the same database
+        return SearchIndex, (self.path,)
+
+    def __repr__(self):
+        return f'<SearchIndex path="{self.path}" messages={len(self)}>'
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self._connection.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, **values: Optional[str]) -> None:
+        """
+        Set meta values in one transaction, deleting the ones set to None.
+        """
+        with self._lock, self._connection:
+            for key, value in values.items():
+                if value is None:
+                    self._connection.execute("DELETE FROM meta WHERE key = ?", (key,))
+                else:
+                    self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _upsert(
+        self,
+        rows: List[Tuple[str, str, str, Optional[float], str]],
+        conversations: List[Tuple[str, Optional[str], Optional[float]]],
+        full: bool = False,
+    ) -> None:
+        """
+        Insert or update messages, given as (message_id, conversation_id, role, create_time, content) rows,
+        and the (id, title, update_time) of their conversations, in one transaction.
+
+        When the rows are full conversations, their other messages are dropped first: the ones `add_response`
+        indexed under IDs derived from their text, which the real messages replace, and the ones no longer
+        in the conversation, e.g. an edited message. Their title is kept when it is missing, like in
+        the conversations table.
+        """
+        with self._lock, self._connection:
+            if full:
+                self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS kept (message_id TEXT PRIMARY KEY)")
+                self._connection.execute("DELETE FROM kept")
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO kept (message_id) VALUES (?)",
+                    [(row[0],) for row in rows]
+                    + [(f"{conversation_id}:title",) for conversation_id, _, _ in conversations],
+                )
+                self._connection.executemany(
+                    "DELETE FROM messages WHERE conversation_id = ? AND message_id NOT IN (SELECT message_id FROM kept)",
+                    [(conversation_id,) for conversation_id, _, _ in conversations],
+                )
+                self._connection.executemany(
+                    "DELETE FROM failed WHERE id = ?", [(conversation_id,) for conversation_id, _, _ in conversations]
+                )
+            self._connection.executemany(
+                """
+                INSERT INTO messages (message_id, conversation_id, role, create_time, content) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(message_id) DO UPDATE SET
+                    conversation_id = excluded.conversation_id,
+                    content = excluded.content
+                WHERE content IS NOT excluded.content OR conversation_id IS NOT excluded.conversation_id
+                """,
+                rows,
+            )
+            self._connection.executemany(
+                """
+                INSERT INTO conversations (id, title, update_time) VALUES (?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = COALESCE(excluded.title, conversations.title),
+                    update_time = COALESCE(excluded.update_time, conversations.update_time)
+                """,
+                conversations,
+            )
+
+    @staticmethod
+    def _to_rows(
+        conversation: dict,
+    ) -> Tuple[List[Tuple[str, str, str, Optional[float], str]], Tuple[str, Optional[str], Optional[float]]]:
+        """
+        Turns a conversation into its message rows and its conversation row.
+        """
+        conversation_id = conversation.get("id") or conversation.get("conversation_id")
+        title = conversation.get("title")
+        rows = []
+        if title:
+            # The title is indexed as a message of its own, so conversations can be found by it
+            rows.append((f"{conversation_id}:title", conversation_id, "title", None, title))
+        for node in (conversation.get("mapping") or {}).values():
+            message = node.get("message")
+            if not message:
+                continue
+            parts = (message.get("content") or {}).get("parts") or []
+            content = "\n".join(part for part in parts if isinstance(part, str)).strip()
+            if not content:
+                continue
+            rows.append(
+                (
+                    message["id"],
+                    conversation_id,
+                    (message.get("author") or {}).get("role"),
+                    _to_timestamp(message.get("create_time")),
+                    content,
+                )
+            )
+        return rows, (conversation_id, title, _to_timestamp(conversation.get("update_time")))
+
+    def add_conversations(self, conversations: Iterable[dict], batch_size: int = 100) -> int:
+        """
+        Index full conversations, as fetched from the backend API or written by `export_conversations`.
+
+        Args:
+        ----------
+            conversations (Iterable[dict]): The conversations, with their `mapping` of messages.
+            batch_size (int, optional): The number of conversations written per transaction. Defaults to 100.
+
+        Returns:
+        ----------
+            int: The number of conversations indexed.
+        """
+        count = 0
+        rows, batch = [], []
+        for conversation in conversations:
+            conversation_rows, conversation_row = self._to_rows(conversation)
+            rows.extend(conversation_rows)
+            batch.append(conversation_row)
+            if len(batch) >= batch_size:
+                self._upsert(rows, batch, full=True)
+                count += len(batch)
+                rows, batch = [], []
+        if batch:
+            self._upsert(rows, batch, full=True)
+            count += len(batch)
+        return count
+
+    def add_conversation(self, conversation: dict) -> None:
+        """
+        Index a full conversation, as fetched from the backend API or written by `export_conversations`.
+
+        Args:
+        ----------
+            conversation (dict): The conversation, with its `mapping` of messages.
+        """
+        self.add_conversations([conversation])
+
+    def add_export(self, path: str) -> int:
+        """
+        Index the conversations of a JSON lines file written by `export_conversations`, reading it line by line.
+
+        Args:
+        ----------
+            path (str): The file, gzipped if it ends with '.gz'.
+
+        Returns:
+        ----------
+            int: The number of conversations indexed.
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            count = self.add_conversations(loads(line) for line in f if line.strip())
+        self.logger.debug(f"Indexed {count} conversations from {path}")
+        return count
+
+    def add_response(self, response: ChatGPTResponse, message: Optional[str] = None) -> None:
+        """
+        Index a response returned by `send_message`, along with the message it answers.
+
+        Args:
+        ----------
+            response (ChatGPTResponse): The response.
+            message (Optional[str], optional): The message that was sent. Defaults to None.
+        """
+        if response is None or response.failed or not response.response or not response.conversation_id:
+            return
+        conversation_id = response.conversation_id
+
+        def message_id(role: str, text: str, known: Optional[str]) -> str:
+            # Without the stream captured the IDs are unknown, so they are derived from the text
+            return known or f"{conversation_id}:{role}:{sha1(text.encode()).hexdigest()[:16]}"
+
+        rows = [
+            (message_id("assistant", response.response, response.message_id), conversation_id, "assistant", None, response.response)
+        ]
+        if message:
+            rows.append((message_id("user", message, response.parent_message_id), conversation_id, "user", None, message))
+        self._upsert(rows, [(conversation_id, None, None)])
+
+    def _fetch(self, chatgpt: "ChatGPT", conversation_ids: List[str], concurrency: int) -> int:
+        """
+        Fetch and index conversations `concurrency` at a time, remembering the ones that could not be
+        fetched so the next sync retries them.
+
+        Returns:
+        ----------
+            int: The number of conversations indexed.
+        """
+        synced = 0
+        for start in range(0, len(conversation_ids), concurrency):
+            batch = conversation_ids[start:start + concurrency]
+            conversations = chatgpt.bridge.batch(
+                [f"{CGPTV.conversation_path}/{conversation_id}" for conversation_id in batch]
+            )
+            synced += self.add_conversations(
+                {"id": conversation_id, **conversation}
+                for conversation_id, conversation in zip(batch, conversations)
+                if conversation is not None
+            )
+            failed = [(conversation_id,) for conversation_id, conversation in zip(batch, conversations) if conversation is None]
+            if failed:
+                self.logger.debug(f"Could not fetch {len(failed)} conversations, will retry them next sync")
+                with self._lock, self._connection:
+                    self._connection.executemany("INSERT OR IGNORE INTO failed (id) VALUES (?)", failed)
+        return synced
+
+    def sync(
+        self, chatgpt: "ChatGPT", page_size: int = 100, concurrency: int = 8, max_pages: Optional[int] = None
+    ) -> int:
+        """
+        Fetch and index the conversations updated since they were last indexed.
+
+        The conversations that could not be fetched last time are retried first. Pages are then fetched
+        most recently updated first, and fetching stops at the first page that only holds conversations
+        indexed since their last update. A sync stopped early, by a failed page or `max_pages`, saves its
+        offset, and the next sync resumes from it.
+
+        Args:
+        ----------
+            chatgpt (ChatGPT): The ChatGPT instance to fetch the conversations with.
+            page_size (int, optional): The number of conversations listed at once. Defaults to 100.
+            concurrency (int, optional): The number of conversations fetched at once. Defaults to 8.
+            max_pages (Optional[int], optional): The maximum number of pages to fetch. Defaults to None.
+
+        Returns:
+        ----------
+            int: The number of conversations indexed.
+        """
+        with self._lock:
+            failed = [row[0] for row in self._connection.execute("SELECT id FROM failed").fetchall()]
+        synced = self._fetch(chatgpt, failed, concurrency)
+
+        resume_offset = self._get_meta("resume_offset")
+        offset = int(resume_offset) if resume_offset is not None else 0
+        pages = 0
+        complete = False
+        while max_pages is None or pages < max_pages:
+            page = chatgpt.get_conversations_page(offset=offset, limit=page_size, order="updated")
+            if page is None:
+                self.logger.debug("Could not fetch conversations page, stopping sync")
+                break
+            if not page.conversations:
+                complete = True
+                break
+            pages += 1
+
+            ids = [conversation.conversation_id for conversation in page.conversations]
+            with self._lock:
+                indexed = dict(
+                    self._connection.execute(
+                        f"SELECT id, update_time FROM conversations WHERE id IN ({', '.join('?' * len(ids))})", ids
+                    ).fetchall()
+                )
+            stale = [
+                conversation.conversation_id
+                for conversation in page.conversations
+                if indexed.get(conversation.conversation_id) is None
+                or (_to_timestamp(conversation.update_time) or 0) > indexed[conversation.conversation_id]
+            ]
+            synced += self._fetch(chatgpt, stale, concurrency)
+
+            offset += len(page.conversations)
+            if not stale or offset >= page.total:
+                complete = True
+                break
+
+        if complete:
+            self._set_meta(resume_offset=None)
+        else:
+            self.logger.debug(f"Sync stopped early, will resume from offset {offset}")
+            self._set_meta(resume_offset=str(offset))
+        self.logger.debug(f"Indexed {synced} conversations in {pages} pages")
+        return synced
+
+    @staticmethod
+    def _quote(query: str) -> str:
+        """
+        Turns free text into an FTS5 query matching every word, so punctuation is not taken as syntax.
+        """
+        return " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+
+    def search(self, query: str, limit: int = 10, raw: bool = False) -> List[SearchResult]:
+        """
+        Find the conversations best matching a query, ranked by their best matching message.
+
+        Args:
+        ----------
+            query (str): The words to look for, all of which must be found in a message.
+            limit (int, optional): The maximum number of conversations to return. Defaults to 10.
+            raw (bool, optional): Whether the query uses the FTS5 syntax (e.g. `python OR rust`, `"exact phrase"`, `pyth*`). Defaults to False.
+
+        Returns:
+        ----------
+            List[SearchResult]: The matching conversations, best first.
+
+        Raises:
+        ----------
+            ValueError: If a raw query is not valid FTS5 syntax.
+        """
+        try:
+            return self._search(query if raw else self._quote(query), limit)
+        except sqlite3.OperationalError as e:
+            if not raw:
+                raise e
+            raise ValueError(f"Invalid search query {query!r}: {e}") from e
+
+    def _search(self, query: str, limit: int) -> List[SearchResult]:
+        if not query:
+            return []
+        with self._lock:
+            # bm25() can't be aggregated, so the built-in rank (bm25 by default) is, and the
+            # snippets of the few best messages are made afterwards
+            rows = self._connection.execute(
+                """
+                SELECT messages.conversation_id, conversations.title, messages.message_id, messages.id, MIN(matches.rank) AS score
+                FROM (SELECT rowid, rank FROM messages_fts WHERE messages_fts MATCH ?) AS matches
+                JOIN messages ON messages.id = matches.rowid
+                LEFT JOIN conversations ON conversations.id = messages.conversation_id
+                GROUP BY messages.conversation_id
+                ORDER BY score
+                LIMIT ?
+                """,
+                (query, limit),
+            ).fetchall()
+            results = []
+            for conversation_id, title, message_id, rowid, score in rows:
+                snippet = self._connection.execute(
+                    "SELECT snippet(messages_fts, 0, '[', ']', '...', 12) FROM messages_fts WHERE messages_fts MATCH ? AND rowid = ?",
+                    (query, rowid),
+                ).fetchone()[0]
+                results.append(SearchResult(conversation_id, title, message_id, snippet, score))
+        return results
+
+    def remove(self, conversation_id: str) -> None:
+        """
+        Remove a conversation from the index.
+
+        Args:
+        ----------
+            conversation_id (str): The conversation ID.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+            self._connection.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
@@ -15,6 +15,12 @@ class ChatGPTVariables:
 
     # Popups and such
     alert = (By.XPATH, '//div[@role="alert"]')
+    rate_limit_phrases = (
+        "too many requests",
+        "usage cap",
+        "limit of messages",
+        "rate limit",
+    )
     intro = (By.ID, "headlessui-portal-root")
 
     # Responses and such
@@ -23,6 +29,9 @@ class ChatGPTVariables:
         '//div[starts-with(@class, "result-streaming markdown prose")]',
     )
     potential_error_response = (By.XPATH, '//div[@class="flex-1 overflow-hidden"]//div[p]')
+    conversation_turn = (By.CSS_SELECTOR, 'div[data-testid^="conversation-turn-"]')
+    # Error notices rendered in place of, or below, a response
+    turn_error = (By.CSS_SELECTOR, ".border-red-500, .text-red-500, .text-red-600")
     normal_response = (
         By.XPATH,
         '//*[@id="__next"]/div[1]/div[2]/div/main/div[1]/div/div/div/div[2]/div/div[2]/div[1]/div/div/p'
@@ -32,6 +41,8 @@ class ChatGPTVariables:
         By.XPATH,
         "/html/body/div[1]/div[1]/div[2]/div/main/div[2]/form/div/div[1]/div/div[2]/div/button",
     )
+    stop_generating = (By.XPATH, '//form//button[contains(., "Stop generating")]')
+    continue_generating = (By.XPATH, '//form//button[contains(., "Continue generating")]')
     new_chat = (By.LINK_TEXT, "New chat")
     clear_chat = (By.LINK_TEXT, "Clear chat")
 
@@ -52,6 +63,12 @@ class ChatGPTVariables:
         By.LINK_TEXT,
         "Settings",
     )
+    menu_popup = (By.CSS_SELECTOR, '[role="menu"]')
+    settings_dialog = (By.CSS_SELECTOR, '[role="dialog"]')
+    general = (
+        By.CSS_SELECTOR,
+        'button[id^="radix-"][id$="-trigger-General"]',
+    )
     theme_button = (By.CSS_SELECTOR, "button[role='combobox']")
     data_controls = (
         By.CSS_SELECTOR,
@@ -62,5 +79,44 @@ class ChatGPTVariables:
         "//button[.//div[text()='Manage']]"
     )
 
+    # Fallback strategies, tried in order (CSS first, where it only matches the element) until one of them matches.
+    # Elements without an entry only use their own selector.
+    fallbacks = {
+        "textbox": [
+            (By.CSS_SELECTOR, "#prompt-textarea"),
+            textbox,
+        ],
+        "normal_response": [
+            (By.CSS_SELECTOR, "div.markdown.prose p"),
+            normal_response,
+        ],
+        "regenerate_response": [
+            (By.XPATH, '//form//button[contains(., "Regenerate")]'),
+            regenerate_response,
+        ],
+        "stop_generating": [
+            (By.CSS_SELECTOR, 'button[aria-label="Stop generating"]'),
+            stop_generating,
+        ],
+        "new_chat": [
+            (By.CSS_SELECTOR, 'nav a[href="/"]'),
+            new_chat,
+        ],
+        "menu_button": [
+            (By.CSS_SELECTOR, 'nav button[id^="headlessui-menu-button"]'),
+            (By.XPATH, '//nav//button[contains(@id, "headlessui-menu-button")]'),
+            menu_button,
+        ],
+    }
+
     # URLs
+    base_url = "https://chat.openai.com"
     chat_url = "https://chat.openai.com/chat"
+    # The route the app itself opens conversations on, for page loads and in-app navigation alike
+    conversation_route = "/c/{conversation_id}"
+
+    # Backend API paths, fetched from within the page
+    accounts_check_path = "/backend-api/accounts/check/v4-2023-04-27"
+    conversations_path = "/backend-api/conversations"
+    conversation_path = "/backend-api/conversation"
+    shared_conversations_path = "/backend-api/shared_conversations"
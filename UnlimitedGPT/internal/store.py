@@ -0,0 +1,365 @@
+import sqlite3
+from datetime import datetime, timezone
+from json import dumps, loads
+from logging import getLogger
+from threading import Lock
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+from UnlimitedGPT.internal.objects import Conversation
+
+if TYPE_CHECKING:
+    from UnlimitedGPT.UnlimitedGPT import ChatGPT
+
+
+def _to_timestamp(value: Union[str, float, int, datetime, None]) -> Optional[float]:
+    """
+    Converts a backend API time (ISO string or epoch seconds) to epoch seconds.
+
+    Args:
+    ----------
+        value (Union[str, float, int, datetime, None]): The time to convert.
+
+    Returns:
+    ----------
+        Optional[float]: The time in seconds since the epoch, or None if it is missing.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _to_isoformat(timestamp: Optional[float]) -> Optional[str]:
+    """
+    Converts epoch seconds back to an ISO string.
+    """
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class ConversationStore:
+    """
+    A local SQLite store of conversation metadata, synced incrementally from ChatGPT.
+
+    Queries are answered from the local database, so they never touch the browser.
+
+    Args:
+    ----------
+        path (str, optional): The path of the SQLite database. Defaults to 'conversations.db'.
+    """
+
+    def __init__(self, path: str = "conversations.db") -> None:
+        self.path = path
+        self.logger = getLogger("pyChatGPT")
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id TEXT PRIMARY KEY,
+                    title TEXT,
+                    create_time REAL,
+                    update_time REAL
+                );
+                CREATE INDEX IF NOT EXISTS conversations_title ON conversations (title COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS conversations_create_time ON conversations (create_time);
+                CREATE INDEX IF NOT EXISTS conversations_update_time ON conversations (update_time);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                """
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def __repr__(self):
+        return f'<ConversationStore path="{self.path}" conversations={len(self)} watermark={self.watermark}>'
+
+    @property
+    def watermark(self) -> Optional[float]:
+        """
+        The latest update time seen by the last complete sync, in seconds since the epoch.
+        """
+        value = self._get_meta("watermark")
+        return float(value) if value is not None else None
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, **values: Optional[str]) -> None:
+        """
+        Set meta values in one transaction, deleting the ones set to None.
+        """
+        with self._lock, self._connection:
+            for key, value in values.items():
+                if value is None:
+                    self._connection.execute("DELETE FROM meta WHERE key = ?", (key,))
+                else:
+                    self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self._connection.close()
+
+    def upsert(self, conversations: List[Conversation]) -> None:
+        """
+        Insert or update conversations.
+
+        Args:
+        ----------
+            conversations (List[Conversation]): The conversations to store.
+        """
+        rows = [
+            (
+                conversation.conversation_id,
+                conversation.name,
+                _to_timestamp(conversation.create_time),
+                _to_timestamp(conversation.update_time),
+            )
+            for conversation in conversations
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                """
+                INSERT INTO conversations (id, title, create_time, update_time) VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    title = excluded.title,
+                    create_time = COALESCE(excluded.create_time, conversations.create_time),
+                    update_time = COALESCE(excluded.update_time, conversations.update_time)
+                """,
+                rows,
+            )
+
+    def _stored_update_time(self, conversation_id: str) -> Optional[float]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT update_time FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sync(self, chatgpt: "ChatGPT", page_size: int = 28, max_pages: Optional[int] = None) -> int:
+        """
+        Fetch the conversations updated since the last sync and store them.
+
+        Pages are fetched newest first, and fetching stops at the first conversation older than
+        the watermark (one updated at the watermark itself is only skipped if it is stored with that
+        update time). The watermark only moves once a sync gets there (or to the end of the list):
+        a sync stopped early, by a failed page or `max_pages`, saves the `(update_time, id)` of the last
+        conversation it saw, and the next sync resumes after it. Conversations updated in between move
+        to the top of the list and shift the rest, so its saved offset is only a hint: the next sync
+        skips the conversations it already saw, and steps back when the list shifted the other way.
+
+        Args:
+        ----------
+            chatgpt (ChatGPT): The ChatGPT instance to fetch the conversations with.
+            page_size (int, optional): The number of conversations per page. Defaults to 28.
+            max_pages (Optional[int], optional): The maximum number of pages to fetch. Defaults to None.
+
+        Returns:
+        ----------
+            int: The number of conversations that were added or updated.
+        """
+        watermark = self.watermark
+        resume_offset = self._get_meta("resume_offset")
+        resume_cursor = self._get_meta("resume_cursor")
+        pending_watermark = self._get_meta("pending_watermark")
+        newest = float(pending_watermark) if pending_watermark is not None else watermark
+        offset = int(resume_offset) if resume_offset is not None else 0
+        cursor: Optional[Tuple[float, str]] = tuple(loads(resume_cursor)) if resume_cursor is not None else None
+        last_seen = cursor
+        # Until the page holding the cursor is found, the offset may have to step back
+        seeking = cursor is not None and offset > 0
+        pages = 0
+        synced = 0
+        complete = False
+        self.logger.debug(
+            f"Syncing conversations since {_to_isoformat(watermark)}{f' from offset {offset}' if offset else ''}..."
+        )
+
+        while max_pages is None or pages < max_pages:
+            page = chatgpt.get_conversations_page(offset=offset, limit=page_size, order="updated")
+            if page is None:
+                self.logger.debug("Could not fetch conversations page, stopping sync")
+                break
+            pages += 1
+
+            if seeking and page.conversations:
+                first_time = _to_timestamp(page.conversations[0].update_time or page.conversations[0].create_time)
+                if first_time is not None and first_time < cursor[0] and offset > 0:
+                    # Conversations were deleted above the offset, so some not yet seen are before it
+                    offset = max(offset - page_size, 0)
+                    continue
+                seeking = False
+
+            fresh = []
+            reached_watermark = False
+            for conversation in page.conversations:
+                update_time = _to_timestamp(conversation.update_time or conversation.create_time)
+                if update_time is not None:
+                    last_seen = (update_time, conversation.conversation_id)
+                if cursor is not None and update_time is not None and (
+                    update_time > cursor[0] or (update_time, conversation.conversation_id) == cursor
+                ):
+                    # Seen before the sync stopped, or updated since, which the next sync gets
+                    continue
+                if watermark is not None and update_time is not None:
+                    if update_time < watermark:
+                        reached_watermark = True
+                        break
+                    if update_time == watermark and self._stored_update_time(conversation.conversation_id) == update_time:
+                        continue
+                fresh.append(conversation)
+                if update_time is not None and (newest is None or update_time > newest):
+                    newest = update_time
+
+            self.upsert(fresh)
+            synced += len(fresh)
+
+            offset += len(page.conversations)
+            if reached_watermark or not page.conversations or offset >= page.total:
+                complete = True
+                break
+
+        if complete:
+            self._set_meta(
+                watermark=str(newest) if newest is not None else None,
+                resume_offset=None,
+                resume_cursor=None,
+                pending_watermark=None,
+            )
+        else:
+            # Conversations past the cursor are older than the ones synced, so the watermark
+            # can't move past them until they are synced too
+            self.logger.debug(f"Sync stopped early, will resume after {last_seen} (offset {offset})")
+            self._set_meta(
+                resume_offset=str(offset),
+                resume_cursor=dumps(last_seen) if last_seen is not None else None,
+                pending_watermark=str(newest) if newest is not None else None,
+            )
+        self.logger.debug(f"Synced {synced} conversations in {pages} pages")
+        return synced
+
+    def _query(self, where: str, parameters: tuple, order: str, limit: Optional[int]) -> List[Conversation]:
+        """
+        Run a query over the stored conversations.
+        """
+        query = f"SELECT id, title, create_time, update_time FROM conversations {where} ORDER BY {order}"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters = parameters + (limit,)
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [
+            Conversation(title, conversation_id, _to_isoformat(create_time), _to_isoformat(update_time))
+            for conversation_id, title, create_time, update_time in rows
+        ]
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        """
+        Get a stored conversation by its ID.
+
+        Args:
+        ----------
+            conversation_id (str): The conversation ID.
+
+        Returns:
+        ----------
+            Optional[Conversation]: The conversation, or None if it is not stored.
+        """
+        conversations = self._query("WHERE id = ?", (conversation_id,), "id", 1)
+        return conversations[0] if conversations else None
+
+    def recent(self, n: int = 10) -> List[Conversation]:
+        """
+        Get the most recently updated conversations.
+
+        Args:
+        ----------
+            n (int, optional): The number of conversations to return. Defaults to 10.
+
+        Returns:
+        ----------
+            List[Conversation]: The conversations, most recently updated first.
+        """
+        return self._query("", (), "COALESCE(update_time, create_time) DESC", n)
+
+    def by_title(self, text: str, limit: Optional[int] = None) -> List[Conversation]:
+        """
+        Get the conversations whose title contains the given text, ignoring case.
+
+        Args:
+        ----------
+            text (str): The text to look for.
+            limit (Optional[int], optional): The maximum number of conversations to return. Defaults to None.
+
+        Returns:
+        ----------
+            List[Conversation]: The matching conversations, most recently updated first.
+        """
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return self._query(
+            "WHERE title LIKE ? ESCAPE '\\'",
+            (f"%{escaped}%",),
+            "COALESCE(update_time, create_time) DESC",
+            limit,
+        )
+
+    def between(
+        self,
+        start: Union[str, float, datetime, None] = None,
+        end: Union[str, float, datetime, None] = None,
+        field: str = "create_time",
+        limit: Optional[int] = None,
+    ) -> List[Conversation]:
+        """
+        Get the conversations created (or updated) within a date range.
+
+        Args:
+        ----------
+            start (Union[str, float, datetime, None], optional): The start of the range, inclusive. Defaults to None.
+            end (Union[str, float, datetime, None], optional): The end of the range, exclusive. Defaults to None.
+            field (str, optional): Either 'create_time' or 'update_time'. Defaults to 'create_time'.
+            limit (Optional[int], optional): The maximum number of conversations to return. Defaults to None.
+
+        Returns:
+        ----------
+            List[Conversation]: The matching conversations, oldest first.
+
+        Raises:
+        ----------
+            ValueError: If the field is invalid.
+        """
+        if field not in ("create_time", "update_time"):
+            raise ValueError("Invalid field, must be 'create_time' or 'update_time'")
+
+        conditions = []
+        parameters = ()
+        if start is not None:
+            conditions.append(f"{field} >= ?")
+            parameters += (_to_timestamp(start),)
+        if end is not None:
+            conditions.append(f"{field} < ?")
+            parameters += (_to_timestamp(end),)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query(where, parameters, field, limit)
@@ -0,0 +1,275 @@
+from collections import deque
+from contextlib import contextmanager
+from logging import getLogger
+from threading import Condition, Event, Thread
+from time import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+from UnlimitedGPT.internal.objects import WorkerHealth
+
+if TYPE_CHECKING:
+    from UnlimitedGPT.UnlimitedGPT import ChatGPT
+
+
+class WorkerSupervisor:
+    """
+    A pool of ChatGPT instances that checks their health, recycles them after a number of
+    messages or when a threshold is crossed, and keeps warm spares ready to replace them.
+
+    Args:
+    ----------
+        factory (Callable[[], ChatGPT]): Creates a new, ready to use, ChatGPT instance.
+        size (int, optional): The number of workers in rotation. Defaults to 1.
+        spares (int, optional): The number of warm spares kept ready in the background. Defaults to 1.
+        max_messages (Optional[int], optional): Messages after which a worker is recycled. Defaults to 200.
+        max_heap_mb (Optional[float], optional): Renderer heap size, in MB, after which a worker is recycled. Defaults to 512.
+        max_error_rate (Optional[float], optional): Error rate after which a worker is recycled. Defaults to 0.5.
+        min_messages (int, optional): Messages needed before the error rate is taken into account. Defaults to 10.
+        check_interval (float, optional): Time between health checks of idle workers, in seconds. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], "ChatGPT"],
+        size: int = 1,
+        spares: int = 1,
+        max_messages: Optional[int] = 200,
+        max_heap_mb: Optional[float] = 512,
+        max_error_rate: Optional[float] = 0.5,
+        min_messages: int = 10,
+        check_interval: float = 30,
+    ) -> None:
+        self.factory = factory
+        self.size = size
+        self.spares = spares
+        self.max_messages = max_messages
+        self.max_heap_mb = max_heap_mb
+        self.max_error_rate = max_error_rate
+        self.min_messages = min_messages
+        self.check_interval = check_interval
+        self.logger = getLogger("pyChatGPT")
+
+        self.recycled = 0
+        self._condition = Condition()
+        self._idle = deque()
+        self._busy: List["ChatGPT"] = []
+        self._spares = deque()
+        self._starting_spares = 0
+        self._closed = Event()
+
+        for _ in range(size):
+            self._idle.append(self.factory())
+        self._refill_spares()
+        Thread(target=self._monitor, daemon=True).start()
+
+    def __repr__(self):
+        return f"<WorkerSupervisor idle={len(self._idle)} busy={len(self._busy)} spares={len(self._spares)} recycled={self.recycled}>"
+
+    @property
+    def workers(self) -> List["ChatGPT"]:
+        """
+        The workers in rotation, idle or busy.
+        """
+        with self._condition:
+            return list(self._idle) + list(self._busy)
+
+    def _start_spare(self) -> None:
+        """
+        Starts a spare worker, meant to run in the background.
+        """
+        try:
+            spare = self.factory()
+        except BaseException as e:
+            self.logger.debug(f"Could not start spare worker: {e}")
+            spare = None
+        with self._condition:
+            self._starting_spares -= 1
+            if spare is not None:
+                if self._closed.is_set():
+                    Thread(target=spare.__del__, daemon=True).start()
+                else:
+                    self._spares.append(spare)
+            self._condition.notify_all()
+
+    def _refill_spares(self) -> None:
+        """
+        Starts enough spares in the background to have `spares` of them.
+        """
+        with self._condition:
+            missing = self.spares - len(self._spares) - self._starting_spares
+            self._starting_spares += max(missing, 0)
+        for _ in range(missing):
+            Thread(target=self._start_spare, daemon=True).start()
+
+    def needs_recycling(self, worker: "ChatGPT", health: Optional[WorkerHealth] = None) -> bool:
+        """
+        Whether a worker should be replaced.
+
+        Args:
+        ----------
+            worker (ChatGPT): The worker to check.
+            health (Optional[WorkerHealth], optional): Its health, checked if not given. Defaults to None.
+
+        Returns:
+        ----------
+            bool: Whether the worker should be replaced.
+        """
+        health = health or worker.get_health()
+        if not health.responsive:
+            return True
+        if self.max_messages is not None and health.messages_sent >= self.max_messages:
+            return True
+        if (
+            self.max_heap_mb is not None
+            and health.js_heap_used is not None
+            and health.js_heap_used >= self.max_heap_mb * 1024 * 1024
+        ):
+            return True
+        if (
+            self.max_error_rate is not None
+            and health.messages_sent >= self.min_messages
+            and health.error_rate >= self.max_error_rate
+        ):
+            return True
+        return False
+
+    def _replace(self, worker: "ChatGPT") -> "ChatGPT":
+        """
+        Closes a worker in the background and returns its replacement, a warm spare if one is ready.
+        """
+        self.logger.debug("Recycling worker...")
+        Thread(target=worker.__del__, daemon=True).start()
+        self.recycled += 1
+
+        with self._condition:
+            spare = self._spares.popleft() if self._spares else None
+        if spare is None:
+            self.logger.debug("No warm spare ready, starting a new worker...")
+            spare = self.factory()
+        self._refill_spares()
+        return spare
+
+    def acquire(self, timeout: Optional[float] = None, prefer: Optional["ChatGPT"] = None) -> Optional["ChatGPT"]:
+        """
+        Take an idle worker out of rotation until it is released.
+
+        Args:
+        ----------
+            timeout (Optional[float], optional): Time to wait for an idle worker. Defaults to None (wait forever).
+            prefer (Optional[ChatGPT], optional): A worker to take if it is idle, e.g. the one already on a conversation. Defaults to None.
+
+        Returns:
+        ----------
+            Optional[ChatGPT]: The worker, or None if none became idle in time.
+        """
+        end_time = None if timeout is None else time() + timeout
+        with self._condition:
+            while not self._idle:
+                remaining = None if end_time is None else end_time - time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            if prefer is not None and prefer in self._idle:
+                self._idle.remove(prefer)
+                worker = prefer
+            else:
+                worker = self._idle.popleft()
+            self._busy.append(worker)
+            return worker
+
+    def release(self, worker: "ChatGPT") -> None:
+        """
+        Put a worker back into rotation, replacing it first if it needs recycling.
+        Once the pool is closed, this does nothing, as `close` already closed the worker.
+
+        Args:
+        ----------
+            worker (ChatGPT): The worker to release.
+        """
+        if self._closed.is_set():
+            return
+
+        replacement = worker
+        try:
+            if self.needs_recycling(worker):
+                replacement = self._replace(worker)
+        except BaseException:
+            # The worker was closed but no replacement could be started, so capacity shrinks
+            with self._condition:
+                self._busy.remove(worker)
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            closed = self._closed.is_set()
+            if not closed:
+                self._busy.remove(worker)
+                self._idle.append(replacement)
+                self._condition.notify()
+        if closed and replacement is not worker:
+            # Closed while the worker was being replaced: `close` took the worker, but not its replacement
+            replacement.__del__()
+
+    @contextmanager
+    def worker(self, timeout: Optional[float] = None) -> Iterator["ChatGPT"]:
+        """
+        Use an idle worker within a `with` block.
+
+        Args:
+        ----------
+            timeout (Optional[float], optional): Time to wait for an idle worker. Defaults to None (wait forever).
+
+        Raises:
+        ----------
+            TimeoutError: If no worker became idle in time.
+        """
+        worker = self.acquire(timeout)
+        if worker is None:
+            raise TimeoutError("No idle worker")
+        try:
+            yield worker
+        finally:
+            self.release(worker)
+
+    def _monitor(self) -> None:
+        """
+        Checks the idle workers periodically, replacing the unhealthy ones.
+        """
+        while not self._closed.wait(self.check_interval):
+            with self._condition:
+                idle = list(self._idle)
+            for worker in idle:
+                with self._condition:
+                    if worker not in self._idle:
+                        continue
+                    self._idle.remove(worker)
+                    self._busy.append(worker)
+                try:
+                    self.release(worker)
+                except BaseException as e:
+                    self.logger.debug(f"Could not check worker: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of idle, busy, spare and recycled workers.
+        """
+        with self._condition:
+            return {
+                "idle": len(self._idle),
+                "busy": len(self._busy),
+                "spares": len(self._spares),
+                "recycled": self.recycled,
+            }
+
+    def close(self) -> None:
+        """
+        Stop the health checks and close every worker and spare, including the busy ones.
+        Releasing a worker afterwards does nothing.
+        """
+        self._closed.set()
+        with self._condition:
+            workers = list(self._idle) + list(self._busy) + list(self._spares)
+            self._idle.clear()
+            self._busy.clear()
+            self._spares.clear()
+        for worker in workers:
+            worker.__del__()
@@ -0,0 +1,487 @@
+"""
+server.py
+
+A local, OpenAI compatible, chat completions server backed by a pool of ChatGPT instances.
+
+Run it with `python -m UnlimitedGPT.server --token <session_token>`.
+"""
+
+import argparse
+from copy import copy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle
+from json import dumps, loads
+from logging import getLogger
+from os import environ
+from select import select
+from socket import MSG_PEEK
+from threading import Event, Lock, Thread
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+from weakref import WeakValueDictionary
+
+from UnlimitedGPT.UnlimitedGPT import ChatGPT
+from UnlimitedGPT.internal.cancellation import CancellationToken
+from UnlimitedGPT.internal.coalesce import RequestCoalescer
+from UnlimitedGPT.internal.exceptions import InvalidConversationID, RateLimitExceeded, UnlimitedGPTException
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+from UnlimitedGPT.internal.supervisor import WorkerSupervisor
+
+
+class ChatCompletionServer(ThreadingHTTPServer):
+    """
+    An HTTP server exposing `/v1/chat/completions` on top of a pool of ChatGPT instances.
+
+    Requests beyond the workers and the queue are refused with a 429, and requests carrying a
+    `conversation_id` go to the worker already on that conversation whenever it is idle.
+    With `coalesce`, identical non-streaming requests for a new conversation that arrive while one is in flight
+    share its generation. Only the request that ran it gets the conversation ID, as the others cannot continue
+    a conversation that is not theirs.
+
+    Args:
+    ----------
+        address (Tuple[str, int]): The host and port to listen on.
+        pool (WorkerSupervisor): The pool of workers serving the requests.
+        queue_size (int, optional): The number of requests allowed to wait for a worker. Defaults to 16.
+        queue_timeout (Optional[float], optional): Time a request may wait for a worker before a 503. Defaults to None (wait forever).
+        message_timeout (int, optional): Time to wait for a response, passed to `send_message`. Defaults to 240.
+        model (str, optional): The model name reported in the responses. Defaults to 'gpt-3.5-turbo'.
+        coalesce (bool, optional): Whether identical requests in flight share a generation. Defaults to False.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        pool: WorkerSupervisor,
+        queue_size: int = 16,
+        queue_timeout: Optional[float] = None,
+        message_timeout: int = 240,
+        model: str = "gpt-3.5-turbo",
+        coalesce: bool = False,
+    ) -> None:
+        super().__init__(address, ChatCompletionHandler)
+        self.pool = pool
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.message_timeout = message_timeout
+        self.model = model
+        self.logger = getLogger("pyChatGPT")
+        self._lock = Lock()
+        self._pending = 0
+        self._affinity: "WeakValueDictionary[str, ChatGPT]" = WeakValueDictionary()
+        self.coalescer = RequestCoalescer() if coalesce else None
+
+    def admit(self) -> bool:
+        """
+        Admit a request unless every worker is busy and the queue is full.
+
+        Returns:
+        ----------
+            bool: Whether the request was admitted, in which case `finish` must be called once it is done.
+        """
+        with self._lock:
+            if self._pending >= self.pool.size + self.queue_size:
+                return False
+            self._pending += 1
+            return True
+
+    def finish(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def acquire(self, conversation_id: str) -> Optional[ChatGPT]:
+        """
+        Acquire a worker, preferring the one that last served the conversation, and put it on that conversation.
+
+        Args:
+        ----------
+            conversation_id (str): The conversation to continue, empty for a new one.
+
+        Returns:
+        ----------
+            Optional[ChatGPT]: The worker, or None if none became idle in time.
+        """
+        with self._lock:
+            preferred = self._affinity.get(conversation_id) if conversation_id else None
+        worker = self.pool.acquire(self.queue_timeout, prefer=preferred)
+        if worker is None:
+            return None
+
+        try:
+            if not conversation_id:
+                if worker.conversation_id:
+                    worker.reset_conversation()
+            elif worker.conversation_id != conversation_id:
+                self.logger.debug(f"Worker is not on conversation {conversation_id}, switching...")
+                worker.switch_conversation(conversation_id)
+        except BaseException:
+            self.pool.release(worker)
+            raise
+        return worker
+
+    def remember(self, worker: ChatGPT) -> None:
+        """
+        Remember the conversation a worker is on, so the next request for it goes to the same worker.
+        """
+        if worker.conversation_id:
+            with self._lock:
+                self._affinity[worker.conversation_id] = worker
+
+    def generate(
+        self,
+        prompt: str,
+        conversation_id: str = "",
+        on_progress: Optional[Callable[[str], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[ChatGPTResponse]:
+        """
+        Send a prompt through a worker of the pool.
+
+        Args:
+        ----------
+            prompt (str): The message to send.
+            conversation_id (str, optional): The conversation to continue, empty for a new one. Defaults to ''.
+            on_progress (Optional[Callable[[str], None]], optional): Called with the response so far while it streams in. Defaults to None.
+            cancel_token (Optional[CancellationToken], optional): Stops generation once cancelled, or once every request sharing it was. Defaults to None.
+
+        Returns:
+        ----------
+            Optional[ChatGPTResponse]: The response, without a conversation ID if it was shared from another request's generation.
+
+        Raises:
+        ----------
+            TimeoutError: If no worker became idle within `queue_timeout`.
+        """
+        if not conversation_id and on_progress is None and self.coalescer is not None:
+            response, shared = self.coalescer.share(
+                ("generate", prompt), lambda token: self._generate(prompt, "", None, token), cancel_token
+            )
+            if shared and response is not None:
+                # The conversation belongs to the request that ran the generation
+                response = copy(response)
+                response.conversation_id = None
+            return response
+        return self._generate(prompt, conversation_id, on_progress, cancel_token)
+
+    def _generate(
+        self,
+        prompt: str,
+        conversation_id: str,
+        on_progress: Optional[Callable[[str], None]],
+        cancel_token: Optional[CancellationToken],
+    ) -> Optional[ChatGPTResponse]:
+        worker = self.acquire(conversation_id)
+        if worker is None:
+            raise TimeoutError("No worker became available in time")
+        try:
+            response = worker.send_message(
+                prompt, timeout=self.message_timeout, on_progress=on_progress, cancel_token=cancel_token
+            )
+            self.remember(worker)
+            return response
+        finally:
+            self.pool.release(worker)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of pending requests along with the pool's and the coalescer's statistics.
+        """
+        with self._lock:
+            pending = self._pending
+        stats = {"pending": pending, **self.pool.stats()}
+        if self.coalescer is not None:
+            stats.update(self.coalescer.stats())
+        return stats
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    server: ChatCompletionServer
+
+    def log_message(self, format: str, *args) -> None:
+        self.server.logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, data: dict) -> None:
+        body = dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, error_type: str) -> None:
+        self._send_json(status, {"error": {"message": message, "type": error_type}})
+
+    def _send_event(self, data: dict) -> None:
+        self.wfile.write(f"data: {dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+    def _watch_disconnect(self, cancel_token: CancellationToken, done: Event) -> None:
+        """
+        Cancels the request once the client closes the connection, meant to run in the background.
+        """
+        while not done.is_set():
+            try:
+                readable, _, _ = select([self.connection], [], [], 0.5)
+                if not readable:
+                    continue
+                # A readable socket with nothing to read has been closed by the client
+                if not self.connection.recv(1, MSG_PEEK):
+                    return cancel_token.cancel("client disconnected")
+                # A keep-alive client already sent its next request, which stays readable until
+                # this one is answered, so poll at the same pace instead of spinning
+                done.wait(0.5)
+            except (OSError, ValueError):
+                return cancel_token.cancel("client disconnected")
+
+    @staticmethod
+    def _build_prompt(messages: List[dict], conversation_id: str) -> str:
+        """
+        Turns the chat messages into a single message: the last user message when continuing a
+        conversation, since ChatGPT already has the history, or the whole transcript otherwise.
+        """
+        if conversation_id or len(messages) == 1:
+            return next(
+                (message["content"] for message in reversed(messages) if message.get("role") == "user"),
+                messages[-1]["content"],
+            )
+        return "\n\n".join(f'{message.get("role", "user")}: {message["content"]}' for message in messages)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, self.server.stats())
+        elif self.path == "/v1/models":
+            self._send_json(
+                200, {"object": "list", "data": [{"id": self.server.model, "object": "model", "owned_by": "openai"}]}
+            )
+        else:
+            self._send_error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+    def do_POST(self) -> None:
+        if self.path != "/v1/chat/completions":
+            return self._send_error(404, f"Unknown path {self.path}", "invalid_request_error")
+
+        try:
+            request = loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            messages = request["messages"]
+            assert messages, "messages must not be empty"
+        except (ValueError, KeyError, TypeError, AssertionError) as e:
+            return self._send_error(400, f"Invalid request: {e}", "invalid_request_error")
+
+        if not self.server.admit():
+            return self._send_error(429, "Too many requests queued, try again later", "rate_limit_error")
+        try:
+            self._complete(
+                messages,
+                request.get("conversation_id") or "",
+                bool(request.get("stream", False)),
+                request.get("model") or self.server.model,
+            )
+        finally:
+            self.server.finish()
+
+    def _complete(self, messages: List[dict], conversation_id: str, stream: bool, model: str) -> None:
+        completion_id = f"chatcmpl-{uuid4().hex}"
+        created = int(time())
+        streamed = {"text": ""}
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        cancel_token = CancellationToken()
+
+        def on_progress(text: str) -> None:
+            if cancel_token.cancelled:
+                return
+            try:
+                if not streamed["text"]:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Cache-Control", "no-cache")
+                    self.end_headers()
+                    self._send_event(chunk({"role": "assistant", "content": ""}))
+                self._send_event(chunk({"content": text[len(streamed["text"]):]}))
+            except (BrokenPipeError, ConnectionResetError):
+                return cancel_token.cancel("client disconnected")
+            streamed["text"] = text
+
+        error = None
+        response: Optional[ChatGPTResponse] = None
+        done = Event()
+        Thread(target=self._watch_disconnect, args=(cancel_token, done), daemon=True).start()
+        try:
+            response = self.server.generate(
+                self._build_prompt(messages, conversation_id),
+                conversation_id,
+                on_progress if stream else None,
+                cancel_token,
+            )
+        except InvalidConversationID as e:
+            error = (404, f"Invalid conversation: {e}", "invalid_request_error")
+        except RateLimitExceeded as e:
+            error = (429, str(e), "rate_limit_error")
+        except UnlimitedGPTException as e:
+            error = (503, str(e), "server_error")
+        except TimeoutError as e:
+            error = (503, str(e), "server_error")
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.logger.debug("Client disconnected while streaming")
+            return
+        except Exception as e:
+            error = (500, str(e), "server_error")
+        finally:
+            done.set()
+
+        if cancel_token.cancelled:
+            self.server.logger.debug(f"Request cancelled ({cancel_token.reason}), generation stopped")
+            return
+        if error is None and (response is None or response.failed):
+            error = (502, "ChatGPT did not respond", "server_error")
+
+        if stream and streamed["text"]:
+            # The headers are out already, so errors can only be reported within the stream
+            if error is not None:
+                self._send_event({"error": {"message": error[1], "type": error[2]}})
+            else:
+                self._send_event(chunk({"content": response.response[len(streamed["text"]):]}))
+                self._send_event({**chunk({}, "stop"), "conversation_id": response.conversation_id})
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+        if error is not None:
+            return self._send_error(*error)
+
+        if stream:
+            # The response was not streamed as it arrived, e.g. without `capture_stream`, so it comes in one chunk
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self._send_event(chunk({"role": "assistant", "content": response.response}))
+            self._send_event({**chunk({}, "stop"), "conversation_id": response.conversation_id})
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        self._send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "conversation_id": response.conversation_id,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": response.response},
+                        "finish_reason": "stop",
+                    }
+                ],
+            },
+        )
+
+
+def create_server(
+    pool: WorkerSupervisor,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    queue_size: int = 16,
+    queue_timeout: Optional[float] = None,
+    message_timeout: int = 240,
+    coalesce: bool = False,
+) -> ChatCompletionServer:
+    """
+    Create a chat completions server on top of an existing pool, e.g. one built with custom worker options.
+
+    Args:
+    ----------
+        pool (WorkerSupervisor): The pool of workers serving the requests.
+        host (str, optional): The host to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): The port to listen on, 0 for any free port. Defaults to 8000.
+        queue_size (int, optional): The number of requests allowed to wait for a worker. Defaults to 16.
+        queue_timeout (Optional[float], optional): Time a request may wait for a worker before a 503. Defaults to None (wait forever).
+        message_timeout (int, optional): Time to wait for a response. Defaults to 240.
+        coalesce (bool, optional): Whether identical requests for a new conversation in flight share a generation. Defaults to False.
+
+    Returns:
+    ----------
+        ChatCompletionServer: The server, call `serve_forever` to start it.
+    """
+    return ChatCompletionServer((host, port), pool, queue_size, queue_timeout, message_timeout, coalesce=coalesce)
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m UnlimitedGPT.server",
+        description="Serve an OpenAI compatible /v1/chat/completions endpoint backed by ChatGPT instances.",
+    )
+    parser.add_argument(
+        "--token",
+        action="append",
+        dest="tokens",
+        help="A session token, can be repeated to spread the workers over several accounts. Defaults to $SESSION_TOKEN.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="The number of ChatGPT instances. Defaults to 1.")
+    parser.add_argument("--spares", type=int, default=0, help="The number of warm spares. Defaults to 0.")
+    parser.add_argument("--host", default="127.0.0.1", help="The host to listen on. Defaults to 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8000, help="The port to listen on. Defaults to 8000.")
+    parser.add_argument("--queue-size", type=int, default=16, help="Requests allowed to wait for a worker. Defaults to 16.")
+    parser.add_argument("--queue-timeout", type=float, default=None, help="Time a request may wait for a worker.")
+    parser.add_argument("--message-timeout", type=int, default=240, help="Time to wait for a response. Defaults to 240.")
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="Let identical requests for a new conversation share a generation. Shared responses cannot be continued.",
+    )
+    parser.add_argument("--proxy", default=None, help="The proxy server URL.")
+    parser.add_argument("--headless", action="store_true", help="Run the browsers in headless mode.")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging.")
+    options = parser.parse_args(args)
+
+    tokens = options.tokens or [environ.get("SESSION_TOKEN", "")]
+    if not all(tokens):
+        parser.error("a session token is required, pass --token or set $SESSION_TOKEN")
+
+    token_cycle = cycle(tokens)
+    token_lock = Lock()
+
+    def factory() -> ChatGPT:
+        with token_lock:
+            token = next(token_cycle)
+        return ChatGPT(
+            token,
+            proxy=options.proxy,
+            verbose=options.verbose,
+            headless=options.headless,
+            capture_stream=True,
+        )
+
+    pool = WorkerSupervisor(factory, size=options.workers, spares=options.spares)
+    server = create_server(
+        pool,
+        options.host,
+        options.port,
+        options.queue_size,
+        options.queue_timeout,
+        options.message_timeout,
+        options.coalesce,
+    )
+    print(f"Serving on http://{options.host}:{server.server_address[1]}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
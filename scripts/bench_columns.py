@@ -0,0 +1,100 @@
+"""
+bench_columns.py
+
+Compares getting synthetic conversations as objects, the way they were read before the
+columnar exports, with `to_columns`, `to_numpy` and `to_arrow`. No browser is needed:
+
+    python scripts/bench_columns.py --items 100000 --repeat 5
+
+`to_numpy` and `to_arrow` are skipped when NumPy or PyArrow is not installed
+(`pip install UnlimitedGPT[columns]`). The peak memory is the Python heap's, which leaves out
+the buffers PyArrow allocates itself.
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from importlib.util import find_spec
+from time import perf_counter
+from typing import Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from UnlimitedGPT.internal.objects import Conversations  # noqa: E402
+
+
+def make_items(count: int, epoch: bool) -> list:
+    """
+    Builds `count` conversations as the backend API lists them, times as ISO strings or epoch seconds.
+    """
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    items = []
+    for index in range(count):
+        created = start + timedelta(seconds=index * 37)
+        updated = created + timedelta(minutes=index % 90)
+        items.append(
+            {
+                "id": f"{index:08x}-0000-4000-8000-000000000000",
+                "title": f"Conversation {index}",
+                "create_time": created.timestamp() if epoch else created.isoformat(),
+                "update_time": updated.timestamp() if epoch else updated.isoformat(),
+                "mapping": None,
+                "current_node": None,
+            }
+        )
+    return items
+
+
+def from_objects(items: list):
+    """The way a caller built columns before: an object per conversation, then a list per attribute."""
+    conversations = Conversations(items, False, len(items), 0, len(items)).conversations
+    return {
+        "id": [conversation.conversation_id for conversation in conversations],
+        "title": [conversation.name for conversation in conversations],
+        "create_time": [conversation.create_time for conversation in conversations],
+        "update_time": [conversation.update_time for conversation in conversations],
+    }
+
+
+def measure(function: Callable, items: list, repeat: int) -> Tuple[float, float]:
+    """
+    Returns the best time of `repeat` runs in milliseconds, and the peak memory of a run in MB.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = perf_counter()
+        function(items)
+        best = min(best, perf_counter() - started)
+    tracemalloc.start()
+    function(items)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000, help="Synthetic conversations. Defaults to 100000.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measure, the best is kept. Defaults to 5.")
+    options = parser.parse_args()
+
+    page = lambda items: Conversations(items, False, len(items), 0, len(items))  # noqa: E731
+    methods = [("objects", from_objects), ("to_columns", lambda items: page(items).to_columns())]
+    if find_spec("numpy"):
+        methods.append(("to_numpy", lambda items: page(items).to_numpy()))
+    if find_spec("pyarrow"):
+        methods.append(("to_arrow", lambda items: page(items).to_arrow()))
+
+    print(f"{options.items} conversations, best of {options.repeat}")
+    print(f"{'times':>6} {'method':>11} {'ms':>9} {'peak MB':>8}")
+    for epoch in (False, True):
+        items = make_items(options.items, epoch)
+        for name, function in methods:
+            milliseconds, peak = measure(function, items, options.repeat)
+            print(f"{'epoch' if epoch else 'iso':>6} {name:>11} {milliseconds:>9.1f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
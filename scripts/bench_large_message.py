@@ -0,0 +1,124 @@
+"""
+bench_large_message.py
+
+Measures how long it takes to get a large message into the textbox, and how many WebDriver calls it
+takes, by assigning it in a single script call (as INSTANT mode did before) and through the page-side
+buffer `_submit_large_message` fills in chunks. Nothing is submitted, the textbox is emptied after
+each run. Needs a session token:
+
+    python scripts/bench_large_message.py --token <token> --sizes-kb 64 256 1024 4096
+
+With `--split`, a message of the first size is also sent with `max_message_length`, reporting the
+time of every part and the `parts_sent` of the response. That one is really sent.
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+from typing import Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from UnlimitedGPT import ChatGPT  # noqa: E402
+from UnlimitedGPT.internal import scripts  # noqa: E402
+
+# The first half of `scripts.submit_buffer`: set the buffered message with one input event, without submitting it
+SET_BUFFER = """
+const textbox = arguments[0];
+const text = (window.__unlimitedgptBuffer || []).join("");
+delete window.__unlimitedgptBuffer;
+const setter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, "value").set;
+setter.call(textbox, text);
+textbox.dispatchEvent(new Event("input", {bubbles: true}));
+"""
+CLEAR = "arguments[0].value = ''; arguments[0].dispatchEvent(new Event('input', {bubbles: true}));"
+
+
+def count_calls(api: ChatGPT) -> Callable[[], int]:
+    """
+    Counts the commands sent to the WebDriver.
+    """
+    execute = api.driver.execute
+    calls = [0]
+
+    def counted(*args, **kwargs):
+        calls[0] += 1
+        return execute(*args, **kwargs)
+
+    api.driver.execute = counted
+    return lambda: calls[0]
+
+
+def single_call(api: ChatGPT, textbox, message: str) -> None:
+    api.driver.execute_script("arguments[0].value = arguments[1];", textbox, message)
+
+
+def buffered(api: ChatGPT, textbox, message: str) -> None:
+    for index in range(0, len(message), api._transfer_chunk_size):
+        api.driver.execute_script(
+            scripts.append_to_buffer, message[index:index + api._transfer_chunk_size], index == 0
+        )
+    api.driver.execute_script(SET_BUFFER, textbox)
+
+
+def measure(api: ChatGPT, calls: Callable[[], int], method: Callable, message: str) -> Tuple[float, int, bool]:
+    """
+    Puts the message into the textbox, returning the seconds and WebDriver calls it took, and whether it got there.
+    """
+    textbox = api._get_textbox()
+    api.driver.execute_script(CLEAR, textbox)
+    started_calls = calls()
+    started = perf_counter()
+    method(api, textbox, message)
+    elapsed = perf_counter() - started
+    used_calls = calls() - started_calls
+    length = api.driver.execute_script("return arguments[0].value.length;", textbox)
+    api.driver.execute_script(CLEAR, textbox)
+    return elapsed, used_calls, length == len(message)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token", required=True, help="A session token.")
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[64, 256, 1024, 4096], help="Message sizes.")
+    parser.add_argument("--split", action="store_true", help="Also send a split message of the first size.")
+    parser.add_argument("--max-message-length", type=int, default=16000, help="Part length with --split. Defaults to 16000.")
+    options = parser.parse_args()
+
+    api = ChatGPT(options.token)
+    try:
+        calls = count_calls(api)
+        print(f"{'size KB':>8} {'method':>12} {'seconds':>8} {'calls':>6} {'set':>4}")
+        for size in options.sizes_kb:
+            message = ("lorem ipsum dolor sit amet " * (size * 1024 // 27 + 1))[:size * 1024]
+            for name, method in (("single call", single_call), ("buffered", buffered)):
+                elapsed, used_calls, complete = measure(api, calls, method, message)
+                print(f"{size:>8} {name:>12} {elapsed:>8.2f} {used_calls:>6} {'yes' if complete else 'no':>4}")
+
+        if options.split:
+            message = ("lorem ipsum dolor sit amet\n" * (options.sizes_kb[0] * 1024 // 27 + 1))[:options.sizes_kb[0] * 1024]
+            timings = []
+            original = api.send_message.__wrapped__
+
+            def timed(self, *args, **kwargs):
+                started = perf_counter()
+                try:
+                    return original(self, *args, **kwargs)
+                finally:
+                    timings.append(perf_counter() - started)
+
+            # Each part goes through the undecorated method, timing it; the split message itself is timed last
+            api.send_message = lambda *args, **kwargs: timed(api, *args, **kwargs)
+            response = timed(api, message, max_message_length=options.max_message_length)
+            parts = timings[:-1]
+            print(
+                f"split {options.sizes_kb[0]} KB: {len(parts)} parts, {timings[-1]:.1f}s in total,"
+                f" {sum(parts) / max(len(parts), 1):.1f}s per part, parts_sent={response.parts_sent}"
+            )
+    finally:
+        del api
+
+
+if __name__ == "__main__":
+    main()
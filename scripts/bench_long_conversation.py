@@ -0,0 +1,60 @@
+"""
+bench_long_conversation.py
+
+Measures the latency of every message of a long conversation, once without and once with
+`max_dom_nodes`, to show how much a growing page slows the sends down and how much pruning
+recovers. Needs a session token, each run starts a new conversation:
+
+    python scripts/bench_long_conversation.py --token <token> --turns 200 --max-dom-nodes 5000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+from time import perf_counter
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from UnlimitedGPT import ChatGPT  # noqa: E402
+
+
+def run(token: str, turns: int, max_dom_nodes: Optional[int]) -> None:
+    """
+    Sends `turns` short messages in a new conversation, printing the latency percentiles per block of turns.
+    """
+    api = ChatGPT(token, max_dom_nodes=max_dom_nodes)
+    latencies: List[float] = []
+    try:
+        for turn in range(turns):
+            started = perf_counter()
+            api.send_message(f"Reply with the number {turn} and nothing else")
+            latencies.append(perf_counter() - started)
+        metrics = api.get_page_metrics()
+        label = "off" if max_dom_nodes is None else str(max_dom_nodes)
+        block = max(turns // 4, 1)
+        for start in range(0, turns, block):
+            part = latencies[start : start + block]
+            print(
+                f"{label:>8} {start + 1:>5}-{start + len(part):<5} {statistics.median(part):>10.2f}"
+                f" {max(part):>8.2f} {metrics.get('Nodes', 0):>8.0f} {api.pruned_turns:>7} {api.page_reloads:>8}"
+            )
+    finally:
+        del api
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token", required=True, help="A session token.")
+    parser.add_argument("--turns", type=int, default=200, help="Messages per conversation. Defaults to 200.")
+    parser.add_argument("--max-dom-nodes", type=int, default=5000, help="The threshold of the pruned run. Defaults to 5000.")
+    options = parser.parse_args()
+
+    print(f"{'pruning':>8} {'turns':<11} {'median s':>10} {'max s':>8} {'nodes':>8} {'pruned':>7} {'reloads':>8}")
+    for max_dom_nodes in (None, options.max_dom_nodes):
+        run(options.token, options.turns, max_dom_nodes)
+
+
+if __name__ == "__main__":
+    main()
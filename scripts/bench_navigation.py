@@ -0,0 +1,65 @@
+"""
+bench_navigation.py
+
+Measures how long `switch_conversation` takes to go back and forth between the latest
+conversations of the account, navigating within the page and with full page loads.
+Needs a session token and at least two conversations:
+
+    python scripts/bench_navigation.py --token <token> --conversations 5 --rounds 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+from time import perf_counter
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from UnlimitedGPT import ChatGPT  # noqa: E402
+
+
+def run(api: ChatGPT, conversation_ids: List[str], rounds: int) -> List[float]:
+    """
+    Switches to every conversation `rounds` times, returning the time of each switch.
+    """
+    timings = []
+    for _ in range(rounds):
+        for conversation_id in conversation_ids:
+            started = perf_counter()
+            api.switch_conversation(conversation_id)
+            timings.append(perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token", required=True, help="A session token.")
+    parser.add_argument("--conversations", type=int, default=5, help="Conversations to switch between. Defaults to 5.")
+    parser.add_argument("--rounds", type=int, default=3, help="Times every conversation is switched to. Defaults to 3.")
+    options = parser.parse_args()
+
+    api = ChatGPT(options.token)
+    try:
+        page = api.get_conversations_page(limit=options.conversations)
+        conversation_ids = [conversation.conversation_id for conversation in page.conversations]
+        if len(conversation_ids) < 2:
+            parser.error("The account needs at least two conversations")
+
+        in_app = run(api, conversation_ids, options.rounds)
+        # Without in-app navigation, every switch is a full page load
+        api._navigate_in_app = lambda *args, **kwargs: False
+        page_loads = run(api, conversation_ids, options.rounds)
+    finally:
+        del api
+
+    print(f"{len(conversation_ids)} conversations, {options.rounds} rounds")
+    print(f"{'navigation':>11} {'median s':>9} {'p90 s':>7} {'max s':>7}")
+    for label, timings in (("in-app", in_app), ("page load", page_loads)):
+        p90 = statistics.quantiles(timings, n=10)[-1] if len(timings) > 1 else timings[0]
+        print(f"{label:>11} {statistics.median(timings):>9.2f} {p90:>7.2f} {max(timings):>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
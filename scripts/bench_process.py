@@ -0,0 +1,95 @@
+"""
+bench_process.py
+
+Compares the throughput of workers running as threads of this process (`ChatGPT`) and as
+processes of their own (`ProcessChatGPT`), for an increasing number of workers.
+
+By default, the workers are stand-ins that spend each message parsing a JSON payload, the
+CPU bound part of a worker, so the scaling with cores shows without a browser:
+
+    python scripts/bench_process.py --messages 40 --payload-kb 512
+
+With `--token`, real instances are used and every worker sends `--messages` short prompts.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import UnlimitedGPT.UnlimitedGPT as module  # noqa: E402
+from UnlimitedGPT import ProcessChatGPT  # noqa: E402
+
+
+class StandIn:
+    """Does the CPU bound work of a response: parsing the logged event stream."""
+
+    payload = ""
+
+    def __init__(self, *args, **kwargs) -> None:
+        pass
+
+    def send_message(self, message: str, **kwargs) -> int:
+        return len(json.loads(StandIn.payload)["events"])
+
+    def __del__(self) -> None:
+        pass
+
+
+def run(workers: list, messages: int) -> float:
+    """
+    Sends `messages` messages through every worker at once, returning the messages per second.
+    """
+
+    def work(worker) -> None:
+        for _ in range(messages):
+            worker.send_message("Reply with OK")
+
+    started = perf_counter()
+    with ThreadPoolExecutor(len(workers)) as executor:
+        list(executor.map(work, workers))
+    return len(workers) * messages / (perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token", default=None, help="A session token, to benchmark real instances.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--messages", type=int, default=40, help="Messages per worker. Defaults to 40.")
+    parser.add_argument("--payload-kb", type=int, default=512, help="Size of the parsed payload. Defaults to 512.")
+    options = parser.parse_args()
+
+    if options.token:
+        args, start_method = (options.token,), "spawn"
+        thread_factory = module.ChatGPT
+    else:
+        event = {"message": {"content": {"parts": ["x" * 64]}}, "conversation_id": "0" * 36}
+        count = options.payload_kb * 1024 // len(json.dumps(event))
+        StandIn.payload = json.dumps({"events": [event] * count})
+        # Forked workers inherit the stand-in in place of ChatGPT
+        module.ChatGPT = StandIn
+        args, start_method = (), "fork"
+        thread_factory = StandIn
+
+    print(f"{os.cpu_count()} cores, {options.messages} messages per worker")
+    print(f"{'workers':>8} {'threads msg/s':>14} {'processes msg/s':>16} {'speedup':>8}")
+    for count in sorted(set(options.workers)):
+        threads = [thread_factory(*args) for _ in range(count)]
+        thread_rate = run(threads, options.messages)
+        del threads
+
+        processes = [ProcessChatGPT(*args, start_method=start_method) for _ in range(count)]
+        try:
+            process_rate = run(processes, options.messages)
+        finally:
+            for process in processes:
+                process.close()
+        print(f"{count:>8} {thread_rate:>14.1f} {process_rate:>16.1f} {process_rate / thread_rate:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
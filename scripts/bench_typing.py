@@ -0,0 +1,107 @@
+"""
+bench_typing.py
+
+Measures the wall time and the number of WebDriver calls it takes to type a message into the
+textbox in SLOW mode, for each way of typing it. Nothing is sent, the textbox is emptied after
+each run. Needs a session token:
+
+    python scripts/bench_typing.py --token <token> --length 500 --delay 0 --chunk-size 1
+
+- `send_keys`: one `send_keys` call per character, how SLOW mode typed before.
+- `key events`: a CDP `Input.dispatchKeyEvent` key down and key up per character.
+- `insertText`: a CDP `Input.insertText` call per chunk, the fallback of `_type_message`.
+- `in-page`: `_type_message`, typing every chunk inside the page in one call.
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter, sleep
+from typing import Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from UnlimitedGPT import ChatGPT  # noqa: E402
+
+
+def count_calls(api: ChatGPT) -> Callable[[], int]:
+    """
+    Counts the commands sent to the WebDriver, which every element and CDP call goes through.
+    """
+    execute = api.driver.execute
+    calls = [0]
+
+    def counted(*args, **kwargs):
+        calls[0] += 1
+        return execute(*args, **kwargs)
+
+    api.driver.execute = counted
+    return lambda: calls[0]
+
+
+def send_keys(api: ChatGPT, textbox, message: str, delay: float, chunk_size: int) -> None:
+    for character in message:
+        textbox.send_keys(character)
+        sleep(delay)
+
+
+def key_events(api: ChatGPT, textbox, message: str, delay: float, chunk_size: int) -> None:
+    textbox.click()
+    for character in message:
+        api.driver.execute_cdp_cmd("Input.dispatchKeyEvent", {"type": "keyDown", "text": character})
+        api.driver.execute_cdp_cmd("Input.dispatchKeyEvent", {"type": "keyUp"})
+        sleep(delay)
+
+
+def insert_text(api: ChatGPT, textbox, message: str, delay: float, chunk_size: int) -> None:
+    textbox.click()
+    for index in range(0, len(message), chunk_size):
+        api.driver.execute_cdp_cmd("Input.insertText", {"text": message[index:index + chunk_size]})
+        sleep(delay)
+
+
+def in_page(api: ChatGPT, textbox, message: str, delay: float, chunk_size: int) -> None:
+    api._type_message(textbox, message, delay, chunk_size)
+
+
+def measure(api: ChatGPT, calls: Callable[[], int], method: Callable, message: str, delay: float, chunk_size: int) -> Tuple[float, int, bool]:
+    """
+    Types the message, returning the seconds and WebDriver calls it took, and whether the textbox holds it.
+    """
+    textbox = api._get_textbox()
+    api.driver.execute_script("arguments[0].value = ''; arguments[0].dispatchEvent(new Event('input', {bubbles: true}));", textbox)
+    started_calls = calls()
+    started = perf_counter()
+    method(api, textbox, message, delay, chunk_size)
+    elapsed = perf_counter() - started
+    used_calls = calls() - started_calls
+    typed = textbox.get_attribute("value") == message
+    api.driver.execute_script("arguments[0].value = ''; arguments[0].dispatchEvent(new Event('input', {bubbles: true}));", textbox)
+    return elapsed, used_calls, typed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--token", required=True, help="A session token.")
+    parser.add_argument("--length", type=int, default=500, help="Characters typed. Defaults to 500.")
+    parser.add_argument("--delay", type=float, default=0, help="Delay between chunks, in seconds. Defaults to 0.")
+    parser.add_argument("--chunk-size", type=int, default=1, help="Characters typed at once. Defaults to 1.")
+    options = parser.parse_args()
+
+    message = ("The quick brown fox jumps over the lazy dog. " * (options.length // 45 + 1))[:options.length]
+    methods = [("send_keys", send_keys), ("key events", key_events), ("insertText", insert_text), ("in-page", in_page)]
+
+    api = ChatGPT(options.token)
+    try:
+        calls = count_calls(api)
+        print(f"{options.length} characters, {options.delay}s delay per {options.chunk_size} characters")
+        print(f"{'method':>11} {'seconds':>8} {'calls':>6} {'typed':>6}")
+        for name, method in methods:
+            elapsed, used_calls, typed = measure(api, calls, method, message, options.delay, options.chunk_size)
+            print(f"{name:>11} {elapsed:>8.2f} {used_calls:>6} {'yes' if typed else 'no':>6}")
+    finally:
+        del api
+
+
+if __name__ == "__main__":
+    main()
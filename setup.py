@@ -30,6 +30,11 @@ setup(
     long_description_content_type="text/markdown",
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        "numpy": ["numpy"],
+        "arrow": ["pyarrow"],
+        "columns": ["numpy", "pyarrow"],
+    },
     python_requires=">=3.8.0",
     classifiers=[
         "Development Status :: 5 - Production/Stable",
@@ -0,0 +1,154 @@
+from threading import Event, Thread
+from time import sleep, time
+
+from UnlimitedGPT.internal.cancellation import CancellationToken
+from UnlimitedGPT.internal.coalesce import RequestCoalescer
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time() + timeout
+    while not predicate():
+        assert time() < deadline, "timed out"
+        sleep(0.01)
+
+
+def in_thread(function, *args, **kwargs):
+    """Runs a function in the background, returning its results as they arrive."""
+    results = []
+
+    def run():
+        try:
+            results.append(function(*args, **kwargs))
+        except BaseException as e:
+            results.append(e)
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+    return thread, results
+
+
+def test_identical_calls_in_flight_share_the_result():
+    coalescer = RequestCoalescer()
+    release = Event()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        release.wait(5)
+        return "shared"
+
+    leader, leader_results = in_thread(coalescer.call, "key", generate)
+    wait_until(lambda: calls)
+    follower, follower_results = in_thread(coalescer.call, "key", generate)
+    wait_until(lambda: coalescer.coalesced == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert leader_results == follower_results == ["shared"]
+    assert calls == [1]
+    assert coalescer.stats() == {"generations": 1, "coalesced": 1, "in_flight": 0}
+    # Once it finished, the same call runs again
+    assert coalescer.call("key", lambda: "again") == "again"
+
+
+def test_exceptions_are_raised_in_every_caller():
+    coalescer = RequestCoalescer()
+    release = Event()
+
+    def generate():
+        release.wait(5)
+        raise KeyError("failed")
+
+    leader, leader_results = in_thread(coalescer.call, "key", generate)
+    wait_until(lambda: coalescer.generations == 1)
+    follower, follower_results = in_thread(coalescer.call, "key", generate)
+    wait_until(lambda: coalescer.coalesced == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert isinstance(leader_results[0], KeyError)
+    assert isinstance(follower_results[0], KeyError)
+
+
+def test_cancelled_follower_leaves_without_stopping_the_generation():
+    coalescer = RequestCoalescer()
+    release = Event()
+    shared_tokens = []
+
+    def generate(token):
+        shared_tokens.append(token)
+        release.wait(5)
+        return "shared"
+
+    leader, leader_results = in_thread(coalescer.share, "key", generate)
+    wait_until(lambda: shared_tokens)
+    follower_token = CancellationToken()
+    follower, follower_results = in_thread(coalescer.share, "key", generate, follower_token)
+    wait_until(lambda: coalescer.coalesced == 1)
+
+    follower_token.cancel("client left")
+    follower.join(5)
+    assert follower_results == [(None, True)]
+    assert not shared_tokens[0].cancelled
+
+    release.set()
+    leader.join(5)
+    assert leader_results == [("shared", False)]
+
+
+def test_generation_is_cancelled_once_every_caller_left():
+    coalescer = RequestCoalescer()
+    shared_tokens = []
+
+    def generate(token):
+        shared_tokens.append(token)
+        token.wait(5)
+        return "partial"
+
+    leader_token, follower_token = CancellationToken(), CancellationToken()
+    leader, leader_results = in_thread(coalescer.share, "key", generate, leader_token)
+    wait_until(lambda: shared_tokens)
+    follower, follower_results = in_thread(coalescer.share, "key", generate, follower_token)
+    wait_until(lambda: coalescer.coalesced == 1)
+
+    leader_token.cancel("client left")
+    sleep(0.5)
+    assert not shared_tokens[0].cancelled
+    follower_token.cancel("client left")
+    leader.join(5)
+    follower.join(5)
+
+    assert shared_tokens[0].cancelled
+    assert shared_tokens[0].reason == "client left"
+    assert leader_results == [("partial", False)]
+    assert follower_results == [(None, True)]
+
+
+class FakeTarget:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, message, **kwargs):
+        self.messages.append(message)
+        return ChatGPTResponse(message)
+
+
+def test_calls_with_progress_callbacks_or_unhashable_arguments_are_not_coalesced():
+    target = FakeTarget()
+    coalescer = RequestCoalescer(target)
+    coalescer.send_message("Hi", on_progress=print)
+    coalescer.send_message("Hi", options=["unhashable"])
+    assert coalescer.send_message("Hi").response == "Hi"
+
+    assert target.messages == ["Hi", "Hi", "Hi"]
+    assert coalescer.generations == 1
+
+
+def test_arguments_are_part_of_the_key():
+    coalescer = RequestCoalescer(FakeTarget())
+    coalescer.send_message("Hi", timeout=10)
+    coalescer.send_message("Hi", timeout=20)
+    assert coalescer.generations == 2
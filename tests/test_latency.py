@@ -0,0 +1,109 @@
+import pickle
+
+import pytest
+
+from UnlimitedGPT.internal import latency
+from UnlimitedGPT.internal.latency import LatencyModel
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A clock that only moves when told to."""
+
+    class Clock:
+        now = 1000.0
+
+        def __call__(self):
+            return self.now
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    clock = Clock()
+    monkeypatch.setattr(latency, "time", clock)
+    return clock
+
+
+def test_defaults_until_enough_responses_are_seen():
+    model = LatencyModel(min_samples=3, first_progress=30, stall=20)
+    assert model.windows("account", 100, 240) == (30, 20, 240)
+    assert model.windows("account", 100, 10) == (10, 10, 10)
+
+    for _ in range(2):
+        model.record("account", 100, 1, 1, 5)
+    assert model.windows("account", 100, 240) == (30, 20, 240)
+
+
+def test_windows_are_learned_per_account_and_prompt_size():
+    model = LatencyModel(min_samples=3, headroom=3, min_window=1)
+    for _ in range(3):
+        model.record("account", 100, 2, 1, 10)
+    assert model.windows("account", 100, 240) == (6, 3, 240)
+    # Unseen prompt sizes use the account's responses as a whole
+    assert model.windows("account", 100_000, 240) == (6, 3, 240)
+    assert model.windows("other", 100, 240) == (60, 60, 240)
+
+    for _ in range(3):
+        model.record("account", 100_000, 20, 2, 60)
+    assert model.windows("account", 100_000, 240) == (60, 6, 240)
+    assert model.windows("account", 100, 240) == (6, 3, 240)
+
+
+def test_windows_are_kept_between_the_minimum_and_the_timeout():
+    model = LatencyModel(min_samples=1, headroom=3, min_window=10)
+    model.record("account", 100, 1, 100, 200)
+    assert model.windows("account", 100, 120) == (10, 120, 120)
+
+
+def test_watchdog_expires_without_progress(clock):
+    watchdog = LatencyModel(first_progress=5, stall=3).watch("account", 100, 60)
+    clock.advance(4)
+    assert not watchdog.check()
+    clock.advance(2)
+    assert watchdog.check()
+    assert watchdog.expired == "no progress"
+
+
+def test_watchdog_expires_once_the_text_stalls(clock):
+    watchdog = LatencyModel(first_progress=5, stall=3).watch("account", 100, 60)
+    for _ in range(5):
+        clock.advance(2)
+        assert watchdog.update(watchdog.progress + 10)
+        assert not watchdog.check()
+    assert not watchdog.update(watchdog.progress)
+    clock.advance(4)
+    assert watchdog.check()
+    assert watchdog.expired == "stalled"
+
+
+def test_watchdog_expires_at_the_deadline_while_text_arrives(clock):
+    watchdog = LatencyModel(first_progress=5, stall=3).watch("account", 100, 10)
+    for _ in range(6):
+        clock.advance(2)
+        watchdog.update(watchdog.progress + 10)
+    assert watchdog.check()
+    assert watchdog.expired == "deadline"
+
+
+def test_finished_watchdog_teaches_the_model(clock):
+    model = LatencyModel(min_samples=1, headroom=2, min_window=1)
+    watchdog = model.watch("account", 100, 60)
+    clock.advance(3)
+    watchdog.update(10)
+    clock.advance(1)
+    watchdog.update(20)
+    clock.advance(2)
+    watchdog.finish()
+    assert model.windows("account", 100, 60) == (6, 4, 60)
+
+    # Responses that never showed text tell nothing
+    model.watch("other", 100, 60).finish()
+    assert model.windows("other", 100, 60) == (60, 60, 60)
+
+
+def test_model_pickles_without_its_lock():
+    model = LatencyModel(min_samples=1, min_window=1)
+    model.record("account", 100, 1, 1, 1)
+    copy = pickle.loads(pickle.dumps(model))
+    assert copy.windows("account", 100, 60) == model.windows("account", 100, 60)
+    copy.record("account", 100, 1, 1, 1)
@@ -0,0 +1,162 @@
+import pickle
+from threading import local
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from UnlimitedGPT.internal.exceptions import CircuitOpen, RateLimitExceeded
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+from UnlimitedGPT.internal.retry import CircuitBreaker, RetryPolicy, mark_submitted, resilient
+
+
+def flaky(*results):
+    """A function returning (or raising) each of the results in turn, counting its calls."""
+    results = list(results)
+
+    def function():
+        function.calls += 1
+        result = results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    function.calls = 0
+    return function
+
+
+class FakeChatGPT:
+    """Runs `action` through `resilient`, like a `ChatGPT` method."""
+
+    def __init__(self, action, retry_policy=None, circuit_breaker=None, alive=True):
+        self._resilient = local()
+        self.action = action
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.alive = alive
+
+    def ping(self):
+        return self.alive
+
+    @resilient
+    def send_message(self):
+        return self.action(self)
+
+
+def test_delay_grows_exponentially_up_to_the_cap():
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(1, 5)] == [1, 2, 4, 5]
+
+
+def test_retries_until_it_succeeds():
+    function = flaky(TimeoutException(), ChatGPTResponse("", failed=True), ChatGPTResponse("ok"))
+    assert RetryPolicy(max_attempts=3, base_delay=0).call(function).response == "ok"
+    assert function.calls == 3
+
+
+def test_last_result_or_exception_is_kept_once_the_attempts_run_out():
+    function = flaky(None, None)
+    assert RetryPolicy(max_attempts=2, base_delay=0).call(function) is None
+    assert function.calls == 2
+
+    function = flaky(TimeoutException(), TimeoutException())
+    with pytest.raises(TimeoutException):
+        RetryPolicy(max_attempts=2, base_delay=0).call(function)
+
+
+def test_other_exceptions_are_not_retried():
+    function = flaky(KeyError("key"), ChatGPTResponse("ok"))
+    with pytest.raises(KeyError):
+        RetryPolicy(base_delay=0).call(function)
+    assert function.calls == 1
+
+
+def test_call_while_stops_retrying_once_it_can_no_longer():
+    function = flaky(ChatGPTResponse("", failed=True), ChatGPTResponse("ok"))
+    assert RetryPolicy(base_delay=0).call_while(lambda: False, function).failed
+    assert function.calls == 1
+
+
+def test_circuit_opens_after_consecutive_failures_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_time=0.05)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    breaker.opened_at -= 0.05
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    # A failed probe opens it again right away
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.opened_at -= 0.05
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_pickles_without_its_lock():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    copy = pickle.loads(pickle.dumps(breaker))
+    assert copy.state == CircuitBreaker.OPEN
+    copy.record_success()
+    assert copy.state == CircuitBreaker.CLOSED
+
+
+def test_resilient_call_is_not_retried_once_submitted():
+    def action(chatgpt):
+        calls.append(1)
+        mark_submitted(chatgpt)
+        return ChatGPTResponse("", failed=True)
+
+    calls = []
+    chatgpt = FakeChatGPT(action, RetryPolicy(max_attempts=3, base_delay=0))
+    assert chatgpt.send_message().failed
+    assert calls == [1]
+
+
+def test_resilient_call_is_retried_until_submitted():
+    results = [TimeoutException(), ChatGPTResponse("ok")]
+
+    def action(chatgpt):
+        result = results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    chatgpt = FakeChatGPT(action, RetryPolicy(max_attempts=2, base_delay=0), breaker)
+    assert chatgpt.send_message().response == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_refuses_calls():
+    breaker = CircuitBreaker(failure_threshold=1)
+    chatgpt = FakeChatGPT(lambda chatgpt: None, circuit_breaker=breaker)
+    assert chatgpt.send_message() is None
+    with pytest.raises(CircuitOpen):
+        chatgpt.send_message()
+
+    # Half open, a probe through a dead browser opens it again
+    breaker.opened_at -= breaker.recovery_time
+    chatgpt.alive = False
+    with pytest.raises(CircuitOpen):
+        chatgpt.send_message()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_library_errors_do_not_open_the_circuit():
+    def action(chatgpt):
+        raise RateLimitExceeded("Rate limited")
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    chatgpt = FakeChatGPT(action, circuit_breaker=breaker)
+    with pytest.raises(RateLimitExceeded):
+        chatgpt.send_message()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,163 @@
+from threading import Condition, local
+
+import pytest
+
+from UnlimitedGPT.internal.exceptions import DeadlineExceeded, RateLimitExceeded
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+from UnlimitedGPT.internal.scheduler import AccountScheduler, FairScheduler
+
+
+class FakeWorker:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, message, **kwargs):
+        self.messages.append(message)
+        return ChatGPTResponse(message)
+
+
+class FakePool:
+    """Duck types the `WorkerSupervisor` methods the scheduler uses."""
+
+    def __init__(self, workers):
+        self.size = len(workers)
+        self.idle = list(workers)
+        self.condition = Condition()
+
+    def acquire(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.idle, timeout):
+                return None
+            return self.idle.pop(0)
+
+    def release(self, worker):
+        with self.condition:
+            self.idle.append(worker)
+            self.condition.notify()
+
+
+class FakeChatGPT:
+    """Stands in for a ChatGPT instance, raising `RateLimitExceeded` for the accounts in `limited`."""
+
+    def __init__(self, session_token):
+        self._session_token = session_token
+        self._resilient = local()
+        self.limited = set()
+        self.submit = True
+        self.sent = []
+
+    def switch_account(self, session_token):
+        self._session_token = session_token
+
+    def send_message(self, message, **kwargs):
+        self._resilient.submitted = self.submit
+        if self._session_token in self.limited:
+            raise RateLimitExceeded("Rate limited")
+        self.sent.append((self._session_token, message))
+        return ChatGPTResponse(message)
+
+
+@pytest.fixture
+def held():
+    """A pool of one worker, held until the requests are queued."""
+    worker = FakeWorker()
+    pool = FakePool([worker])
+    pool.acquire()
+    schedulers = []
+
+    def make(**kwargs):
+        scheduler = FairScheduler(pool, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield worker, pool, make
+    for scheduler in schedulers:
+        scheduler.close()
+
+
+def test_priority_classes_and_weights_decide_the_order(held):
+    worker, pool, make = held
+    scheduler = make(weights={"heavy": 2.5})
+    futures = [scheduler.submit(f"heavy {index}", tenant="heavy") for index in range(4)]
+    futures += [scheduler.submit(f"light {index}", tenant="light") for index in range(2)]
+    futures.append(scheduler.submit("urgent", tenant="light", priority="interactive"))
+    pool.release(worker)
+
+    for future in futures:
+        assert future.result(5).response
+    # Finish tags 0.4, 0.8, 1.2 and 1.6 for heavy, 1 and 2 for light
+    assert worker.messages == ["urgent", "heavy 0", "heavy 1", "light 0", "heavy 2", "heavy 3", "light 1"]
+    metrics = scheduler.metrics()
+    assert metrics["interactive"]["served"] == 1
+    assert metrics["batch"]["served"] == 6
+
+
+def test_requests_past_their_deadline_are_dropped(held):
+    worker, pool, make = held
+    scheduler = make()
+    expiring = scheduler.submit("expiring", deadline=0.1)
+    waiting = scheduler.submit("waiting")
+
+    with pytest.raises(DeadlineExceeded):
+        expiring.result(5)
+    pool.release(worker)
+    assert waiting.result(5).response == "waiting"
+    assert worker.messages == ["waiting"]
+    assert scheduler.metrics()["batch"]["expired"] == 1
+
+
+def test_closing_fails_the_queued_requests(held):
+    worker, pool, make = held
+    scheduler = make()
+    future = scheduler.submit("queued")
+    scheduler.close()
+
+    with pytest.raises(RuntimeError):
+        future.result(5)
+    with pytest.raises(RuntimeError):
+        scheduler.submit("late")
+
+
+def test_unknown_priority_class(held):
+    worker, pool, make = held
+    with pytest.raises(ValueError):
+        make().submit("message", priority="urgent")
+
+
+def test_account_is_kept_until_its_quota_runs_out():
+    chatgpt = FakeChatGPT("a")
+    scheduler = AccountScheduler(chatgpt, ["a", "b"], max_messages=2)
+    for index in range(3):
+        scheduler.send_message(str(index))
+
+    assert chatgpt.sent == [("a", "0"), ("a", "1"), ("b", "2")]
+    assert scheduler.accounts["a"].remaining() == 0
+    assert scheduler.accounts["b"].remaining() == 1
+
+
+def test_rate_limited_account_cools_down():
+    chatgpt = FakeChatGPT("a")
+    chatgpt.limited = {"a"}
+    scheduler = AccountScheduler(chatgpt, ["a", "b"], cooldown=60)
+
+    assert scheduler.send_message("Hi").response == "Hi"
+    assert chatgpt.sent == [("b", "Hi")]
+    assert scheduler.accounts["a"].remaining() == 0
+
+
+def test_messages_not_submitted_do_not_count():
+    chatgpt = FakeChatGPT("a")
+    chatgpt.submit = False
+    scheduler = AccountScheduler(chatgpt, ["a"], max_messages=1)
+    scheduler.send_message("Hi")
+
+    assert scheduler.accounts["a"].remaining() == 1
+
+
+def test_gives_up_once_every_account_is_limited_past_max_wait():
+    chatgpt = FakeChatGPT("a")
+    scheduler = AccountScheduler(chatgpt, ["a"], max_messages=1, max_wait=0)
+    scheduler.send_message("Hi")
+
+    with pytest.raises(RateLimitExceeded):
+        scheduler.send_message("Again")
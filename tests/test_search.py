@@ -0,0 +1,99 @@
+import pytest
+
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+from UnlimitedGPT.internal.search import SearchIndex
+
+
+def make_conversation(conversation_id, title, messages, update_time=1):
+    return {
+        "id": conversation_id,
+        "title": title,
+        "update_time": update_time,
+        "mapping": {
+            message_id: {
+                "message": {
+                    "id": message_id,
+                    "author": {"role": role},
+                    "create_time": update_time,
+                    "content": {"parts": [text]},
+                }
+            }
+            for message_id, role, text in messages
+        },
+    }
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex(":memory:")
+    yield index
+    index.close()
+
+
+def test_search_finds_conversations_by_their_messages_and_title(index):
+    index.add_conversation(make_conversation("a", "Rust lifetimes", [("a1", "user", "How do borrows work?")]))
+    index.add_conversation(make_conversation("b", "Cooking", [("b1", "user", "A recipe for pancakes")]))
+
+    results = index.search("pancakes")
+    assert [result.conversation_id for result in results] == ["b"]
+    assert results[0].title == "Cooking"
+    assert results[0].message_id == "b1"
+    assert "[pancakes]" in results[0].snippet
+    assert [result.conversation_id for result in index.search("lifetimes")] == ["a"]
+    assert index.search("missing") == []
+
+
+def test_search_ranks_the_best_match_first(index):
+    index.add_conversation(make_conversation("a", None, [("a1", "user", "python " + "filler " * 50)]))
+    index.add_conversation(make_conversation("b", None, [("b1", "user", "python python python")]))
+
+    assert [result.conversation_id for result in index.search("python")] == ["b", "a"]
+
+
+def test_free_text_is_not_taken_as_syntax(index):
+    index.add_conversation(make_conversation("a", None, [("a1", "user", "What is C++ used for?")]))
+
+    assert [result.conversation_id for result in index.search('C++ "used')] == ["a"]
+
+
+def test_raw_query(index):
+    index.add_conversation(make_conversation("a", None, [("a1", "user", "python")]))
+    index.add_conversation(make_conversation("b", None, [("b1", "user", "rust")]))
+
+    assert sorted(result.conversation_id for result in index.search("python OR rust", raw=True)) == ["a", "b"]
+    with pytest.raises(ValueError):
+        index.search('"unterminated', raw=True)
+
+
+def test_messages_no_longer_in_the_conversation_are_dropped(index):
+    index.add_conversation(make_conversation("a", "Title", [("a1", "user", "first draft"), ("a2", "assistant", "reply")]))
+    index.add_conversation(make_conversation("a", "Title", [("a3", "user", "edited question"), ("a2", "assistant", "reply")]))
+
+    assert index.search("draft") == []
+    assert [result.message_id for result in index.search("edited")] == ["a3"]
+    # The title and the two messages
+    assert len(index) == 3
+
+
+def test_responses_are_replaced_by_the_full_conversation(index):
+    index.add_response(ChatGPTResponse("The answer is 42", conversation_id="a"), "What is the answer?")
+    assert [result.conversation_id for result in index.search("answer")] == ["a"]
+    assert len(index) == 2
+
+    index.add_conversation(
+        make_conversation("a", "Answers", [("a1", "user", "What is the answer?"), ("a2", "assistant", "The answer is 42")])
+    )
+    assert len(index) == 3
+    assert index.search("42")[0].message_id == "a2"
+
+
+def test_failed_responses_are_not_indexed(index):
+    index.add_response(ChatGPTResponse("partial", conversation_id="a", failed=True), "Hi")
+    assert len(index) == 0
+
+
+def test_remove(index):
+    index.add_conversation(make_conversation("a", "Title", [("a1", "user", "hello")]))
+    index.remove("a")
+    assert len(index) == 0
+    assert index.search("hello") == []
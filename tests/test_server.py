@@ -0,0 +1,223 @@
+import socket
+from http.client import HTTPConnection
+from json import dumps, loads
+from threading import Condition, Event, Thread
+from time import sleep, time
+
+import pytest
+
+from UnlimitedGPT.internal.objects import ChatGPTResponse
+from UnlimitedGPT.server import create_server
+
+
+class FakeWorker:
+    """Stands in for a ChatGPT instance, answering through `reply`."""
+
+    def __init__(self, name, reply=None):
+        self.name = name
+        self.conversation_id = ""
+        self.reply = reply or (lambda worker, prompt, on_progress, cancel_token: f"{worker.name}: {prompt}")
+        self.prompts = []
+        self.switches = []
+
+    def reset_conversation(self):
+        self.conversation_id = ""
+
+    def switch_conversation(self, conversation_id):
+        self.switches.append(conversation_id)
+        self.conversation_id = conversation_id
+
+    def send_message(self, prompt, timeout=240, on_progress=None, cancel_token=None):
+        self.prompts.append(prompt)
+        text = self.reply(self, prompt, on_progress, cancel_token)
+        if cancel_token is not None and cancel_token.cancelled:
+            return ChatGPTResponse(text, conversation_id=self.conversation_id or None, cancelled=True)
+        if not self.conversation_id:
+            self.conversation_id = f"conversation-{self.name}"
+        return ChatGPTResponse(text, conversation_id=self.conversation_id)
+
+
+class FakePool:
+    """Duck types the `WorkerSupervisor` methods the server uses."""
+
+    def __init__(self, workers):
+        self.workers = list(workers)
+        self.size = len(self.workers)
+        self.idle = list(self.workers)
+        self.condition = Condition()
+
+    def acquire(self, timeout=None, prefer=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.idle, timeout):
+                return None
+            worker = prefer if prefer in self.idle else self.idle[0]
+            self.idle.remove(worker)
+            return worker
+
+    def release(self, worker):
+        with self.condition:
+            self.idle.append(worker)
+            self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return {"workers": self.size, "idle": len(self.idle)}
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(workers, **kwargs):
+        server = create_server(FakePool(workers), port=0, **kwargs)
+        Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def post(server, body, timeout=10):
+    connection = HTTPConnection(*server.server_address, timeout=timeout)
+    connection.request("POST", "/v1/chat/completions", dumps(body), {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time() + timeout
+    while not predicate():
+        assert time() < deadline, "timed out"
+        sleep(0.01)
+
+
+def test_completion(serve):
+    server = serve([FakeWorker("a")])
+    status, data = post(server, {"messages": [{"role": "user", "content": "Hi"}]})
+    assert status == 200
+    body = loads(data)
+    assert body["choices"][0]["message"] == {"role": "assistant", "content": "a: Hi"}
+    assert body["conversation_id"] == "conversation-a"
+
+
+def test_invalid_request(serve):
+    server = serve([FakeWorker("a")])
+    status, data = post(server, {"messages": []})
+    assert status == 400
+    assert loads(data)["error"]["type"] == "invalid_request_error"
+
+
+def test_requests_beyond_the_workers_and_the_queue_are_refused(serve):
+    release = Event()
+
+    def reply(worker, prompt, on_progress, cancel_token):
+        release.wait(10)
+        return "done"
+
+    server = serve([FakeWorker("a", reply)], queue_size=1)
+    results = []
+    threads = [
+        Thread(target=lambda: results.append(post(server, {"messages": [{"role": "user", "content": "Hi"}]})))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    # One request on the worker and one in the queue
+    wait_until(lambda: server.stats()["pending"] == 2)
+
+    status, data = post(server, {"messages": [{"role": "user", "content": "Hi"}]})
+    assert status == 429
+    assert loads(data)["error"]["type"] == "rate_limit_error"
+
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    assert sorted(status for status, _ in results) == [200, 200]
+    # The request is finished right after its response is written
+    wait_until(lambda: server.stats()["pending"] == 0)
+
+
+def test_streaming_sends_the_progress_as_it_arrives(serve):
+    def reply(worker, prompt, on_progress, cancel_token):
+        on_progress("Hel")
+        on_progress("Hello")
+        return "Hello there"
+
+    server = serve([FakeWorker("a", reply)])
+    status, data = post(server, {"messages": [{"role": "user", "content": "Hi"}], "stream": True})
+    assert status == 200
+
+    events = [line[len("data: "):] for line in data.decode().split("\n\n") if line]
+    assert events[-1] == "[DONE]"
+    chunks = [loads(event) for event in events[:-1]]
+    assert chunks[0]["choices"][0]["delta"] == {"role": "assistant", "content": ""}
+    assert [chunk["choices"][0]["delta"].get("content") for chunk in chunks[1:-1]] == ["Hel", "lo", " there"]
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+    assert chunks[-1]["conversation_id"] == "conversation-a"
+
+
+def test_client_disconnect_cancels_the_generation(serve):
+    cancelled = Event()
+
+    def reply(worker, prompt, on_progress, cancel_token):
+        deadline = time() + 10
+        while not cancel_token.cancelled and time() < deadline:
+            sleep(0.01)
+        if cancel_token.cancelled:
+            cancelled.set()
+        return "partial"
+
+    worker = FakeWorker("a", reply)
+    server = serve([worker])
+    body = dumps({"messages": [{"role": "user", "content": "Hi"}]}).encode()
+    client = socket.create_connection(server.server_address)
+    client.sendall(
+        b"POST /v1/chat/completions HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    wait_until(lambda: worker.prompts)
+    client.close()
+
+    assert cancelled.wait(5)
+    wait_until(lambda: server.stats()["pending"] == 0)
+    assert server.stats()["idle"] == 1
+
+
+def test_conversation_goes_to_the_worker_already_on_it(serve):
+    first, second = FakeWorker("a"), FakeWorker("b")
+    server = serve([first, second])
+
+    status, data = post(server, {"messages": [{"role": "user", "content": "Hi"}]})
+    assert status == 200
+    conversation_id = loads(data)["conversation_id"]
+    served = first if first.prompts else second
+
+    for _ in range(3):
+        status, data = post(
+            server, {"messages": [{"role": "user", "content": "Again"}], "conversation_id": conversation_id}
+        )
+        assert status == 200
+        assert loads(data)["conversation_id"] == conversation_id
+    assert served.prompts == ["Hi", "Again", "Again", "Again"]
+    assert served.switches == []
+
+
+def test_conversation_moves_to_another_worker_when_its_own_is_busy(serve):
+    first, second = FakeWorker("a"), FakeWorker("b")
+    server = serve([first, second])
+    status, data = post(server, {"messages": [{"role": "user", "content": "Hi"}]})
+    conversation_id = loads(data)["conversation_id"]
+    served, other = (first, second) if first.prompts else (second, first)
+
+    assert server.pool.acquire(prefer=served) is served
+    status, data = post(server, {"messages": [{"role": "user", "content": "Again"}], "conversation_id": conversation_id})
+    assert status == 200
+    assert other.switches == [conversation_id]
+    assert other.prompts == ["Again"]
+    server.pool.release(served)
@@ -0,0 +1,110 @@
+from UnlimitedGPT.internal.objects import Conversations
+from UnlimitedGPT.internal.store import ConversationStore
+
+
+class FakeChatGPT:
+    """Lists `items` most recently updated first, failing every page after `fail_after` of them."""
+
+    def __init__(self, items):
+        self.items = items
+        self.fail_after = None
+        self.pages = 0
+
+    def get_conversations_page(self, offset=0, limit=28, order="updated"):
+        self.pages += 1
+        if self.fail_after is not None and self.pages > self.fail_after:
+            return None
+        items = sorted(self.items, key=lambda item: (item["update_time"], item["id"]), reverse=True)
+        return Conversations(items[offset:offset + limit], False, limit, offset, len(items))
+
+
+def make_items(count, start=0):
+    return [
+        {"id": f"c{index:03}", "title": f"Conversation {index}", "create_time": index, "update_time": index}
+        for index in range(start, start + count)
+    ]
+
+
+def test_sync_stores_every_conversation_and_sets_the_watermark():
+    store = ConversationStore(":memory:")
+    assert store.sync(FakeChatGPT(make_items(50)), page_size=10) == 50
+    assert len(store) == 50
+    assert store.watermark == 49
+
+
+def test_sync_only_fetches_until_the_watermark():
+    items = make_items(50)
+    chatgpt = FakeChatGPT(items)
+    store = ConversationStore(":memory:")
+    store.sync(chatgpt, page_size=10)
+
+    items.extend(make_items(3, start=100))
+    chatgpt.pages = 0
+    assert store.sync(chatgpt, page_size=10) == 3
+    assert chatgpt.pages == 1
+    assert store.watermark == 102
+
+
+def test_conversation_updated_at_the_watermark_is_synced():
+    items = [{"id": "a", "title": "a", "create_time": 1, "update_time": 5}]
+    chatgpt = FakeChatGPT(items)
+    store = ConversationStore(":memory:")
+    store.sync(chatgpt)
+
+    items.append({"id": "b", "title": "b", "create_time": 1, "update_time": 5})
+    assert store.sync(chatgpt) == 1
+    assert store.get("b") is not None
+    assert store.sync(chatgpt) == 0
+
+
+def test_stopped_sync_resumes_after_conversations_moved_to_the_top():
+    items = make_items(100)
+    chatgpt = FakeChatGPT(items)
+    store = ConversationStore(":memory:")
+    assert store.sync(chatgpt, page_size=10, max_pages=3) == 30
+    assert store.watermark is None
+
+    # New conversations shift the ones not yet seen down the list
+    items.extend(make_items(5, start=200))
+    assert store.sync(chatgpt, page_size=10) == 70
+    assert len(store) == 100
+    # The watermark can't pass the conversations added after the sync started
+    assert store.watermark == 99
+    assert store.sync(chatgpt, page_size=10) == 5
+    assert len(store) == 105
+    assert store.watermark == 204
+
+
+def test_stopped_sync_resumes_after_conversations_were_deleted_above_it():
+    items = make_items(100)
+    chatgpt = FakeChatGPT(items)
+    store = ConversationStore(":memory:")
+    store.sync(chatgpt, page_size=10, max_pages=3)
+
+    # Deleted conversations shift the ones not yet seen up, before the saved offset
+    del items[90:100]
+    store.sync(chatgpt, page_size=10)
+    assert len(store) == 100
+    assert all(store.get(f"c{index:03}") is not None for index in range(90))
+
+
+def test_failed_page_keeps_the_watermark():
+    chatgpt = FakeChatGPT(make_items(50))
+    chatgpt.fail_after = 2
+    store = ConversationStore(":memory:")
+    assert store.sync(chatgpt, page_size=10) == 20
+    assert store.watermark is None
+
+    chatgpt.fail_after = None
+    assert store.sync(chatgpt, page_size=10) == 30
+    assert store.watermark == 49
+
+
+def test_queries():
+    store = ConversationStore(":memory:")
+    store.sync(FakeChatGPT(make_items(20)))
+
+    assert [conversation.conversation_id for conversation in store.recent(3)] == ["c019", "c018", "c017"]
+    assert [conversation.conversation_id for conversation in store.by_title("conversation 1", limit=2)] == ["c019", "c018"]
+    assert [conversation.conversation_id for conversation in store.between(5, 8)] == ["c005", "c006", "c007"]
+    assert store.get("missing") is None